@@ -21,13 +21,68 @@ except Exception:
 class Settings(BaseSettings):
     # ---- Core ----
     DATABASE_URL: str
+    DEBUG: bool = False
     # ---- Auth/JWT ----
     JWT_SECRET: str
     JWT_ALG: str
     JWT_EXPIRE_MINUTES: int
     REFRESH_EXPIRE_DAYS: int = 7
+    AUTH_CLAIMS_CACHE_TTL_SEC: int = 60  # 0 disables the verified-token cache
+    AUTH_CLAIMS_CACHE_MAX: int = 4096
+    # ---- Vitals ingestion ----
+    VITALS_BATCH_MAX: int = 5000
+    VITALS_MAX_CLOCK_SKEW_SEC: int = 300  # how far in the future measured_at may be
+    VITALS_IMPORT_CHUNK: int = 5000  # rows per INSERT/commit during streaming imports
+    VITALS_IMPORT_MAX_ERRORS: int = 100  # per-line errors echoed back (all are counted)
+    VITALS_IMPORT_MAX_LINE_BYTES: int = 65536
+    VITALS_SERIES_MAX_POINTS: int = 5000  # upper bound for /vitals/series?points=
+    VITALS_SERIES_DEFAULT_DAYS: int = 30  # range when ?from= is omitted
+    VITALS_BASELINE_ALPHA: float = 0.05  # EWMA weight of each new reading (~20-reading memory)
+    VITALS_BASELINE_MIN_READINGS: int = 10  # readings before z-scores are reported
+    VITALS_ANOMALY_Z: float = 3.0  # |z| at/over which a field is listed as anomalous
+    REPORT_STATS_DEFAULT_DAYS: int = 7  # /reports/stats range when ?from= is omitted
+    REPORT_SKETCH_K: int = 200  # KLL sketch size; percentile rank error ~1.7/k
+    REPORT_SNAPSHOT_MAX_AGE_SEC: int = 21600  # precomputed summaries older than this are recomputed
+    REPORT_PRECOMPUTE_CHUNK: int = 500  # users per worker task
+    REPORT_PRECOMPUTE_WORKERS: int = 0  # 0 = os.cpu_count()
+    REPORT_ACTIVE_DAYS: int = 30  # users with vitals/symptoms this recent are precomputed
+    # ---- Cohort analytics (admin) ----
+    COHORT_DEFAULT_DAYS: int = 30  # range when ?from= is omitted
+    COHORT_CHUNK_USERS: int = 2000  # users per GROUP BY statement
+    COHORT_WORKERS: int = 4  # concurrent chunk statements (keep below the DB pool size)
+    COHORT_CACHE_TTL_SEC: int = 900
+    COHORT_CACHE_MAX: int = 256
+    # ---- SQL instrumentation ----
+    SQL_QUERY_BUDGET: int = 20  # statements per request before a warning
+    SQL_N_PLUS_ONE_THRESHOLD: int = 5  # identical statements per request
+    SQL_SLOW_QUERY_MS: int = 200  # 0 disables the slow-query log
+    # ---- Caching (optional Redis) ----
+    REDIS_URL: Optional[str] = None
+    USER_CACHE_ENABLED: bool = True
+    USER_CACHE_BACKEND: str = "memory"  # memory|redis
+    USER_CACHE_TTL_SEC: int = 30
+    USER_CACHE_MAX: int = 10000
+    REPORT_CACHE_ENABLED: bool = True
+    REPORT_CACHE_BACKEND: str = "memory"  # memory|redis
+    REPORT_CACHE_TTL_SEC: int = 300  # bounds how long readings ageing out of the window stay counted
+    REPORT_CACHE_MAX: int = 5000
     # ---- LLM (optional) ----
     OPENAI_API_KEY: Optional[str] = None
+    LLM_MODEL: str = "gpt-4o-mini"  # part of the response cache key
+    LLM_BASE_URL: str = "https://api.openai.com/v1"  # any OpenAI-compatible endpoint (benchmarks.fake_llm_server)
+    LLM_TIMEOUT_SEC: float = 15.0  # total deadline per upstream call
+    LLM_CONNECT_TIMEOUT_SEC: float = 3.0
+    LLM_MAX_CONCURRENCY: int = 8  # in-flight upstream calls per worker
+    LLM_QUEUE_TIMEOUT_SEC: float = 2.0  # wait for a slot before falling back
+    LLM_MAX_CONNECTIONS: int = 16  # pooled keep-alive connections per worker
+    LLM_BREAKER_FAILURES: int = 5  # consecutive failures that open the circuit
+    LLM_BREAKER_RESET_SEC: float = 30.0  # open time before a trial call
+    LLM_SINGLE_FLIGHT: bool = True  # identical concurrent cache misses share one upstream call
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_BACKEND: str = "db"  # db|redis|memory (persistent tier behind the in-process LRU)
+    LLM_CACHE_TTL_SEC: int = 604800  # 7 days
+    LLM_CACHE_MEMORY_MAX: int = 2048  # in-process entries
+    LLM_CACHE_MAX_ROWS: int = 100000  # db tier; oldest entries are pruned past this
     # ---- Web Push (optional) ----
     VAPID_PUBLIC_KEY: Optional[str] = None
     VAPID_PRIVATE_KEY: Optional[str] = None
@@ -38,11 +93,20 @@ class Settings(BaseSettings):
     SMTP_USER: Optional[str] = None
     SMTP_PASSWORD: Optional[str] = None
     SMTP_FROM: Optional[str] = None
+    # ---- Audit sink (background batched writer) ----
+    AUDIT_SINK_ENABLED: bool = True
+    AUDIT_QUEUE_MAX: int = 10000
+    AUDIT_BATCH_SIZE: int = 200
+    AUDIT_FLUSH_INTERVAL_MS: int = 1000
+    AUDIT_QUEUE_POLICY: str = "drop"  # drop|drop_oldest|block
+    AUDIT_BLOCK_TIMEOUT_MS: int = 50
     # ---- CORS (dev defaults) ----
     # Accept either JSON list string or comma-separated string for convenience
     CORS_ORIGINS: Union[List[str], str] = []
+    # ---- Admin ----
+    ADMIN_EMAILS: Union[List[str], str] = []  # verified accounts allowed on /admin (same formats as CORS_ORIGINS)
 
-    @field_validator("CORS_ORIGINS", mode="before")
+    @field_validator("CORS_ORIGINS", "ADMIN_EMAILS", mode="before")
     @classmethod
     def assemble_cors_origins(cls, v: Any) -> List[str]:
         if v is None:
@@ -4,26 +4,47 @@ from fastapi.middleware.cors import CORSMiddleware
 from .db import Base, engine
 import os
 from .routers import auth, profiles, vitals, symptoms, goals, reports, meds, account, reminders
-from .routers import cycles, consent
+from .routers import cycles, consent, admin
 import asyncio
-from datetime import datetime
+from datetime import datetime, timedelta
 import json as _json
 from .models_reminders import Reminder
 from .models_push import PushSubscription
 from .routers.reminders import webpush, WebPushException
 from .config import settings
-from . import models
 from .db import SessionLocal
-import jwt
+from .services.audit_sink import audit_sink
+from .security import get_auth_context, claims_cache
+from .services.user_cache import user_cache
+from .services.report_cache import report_cache
+from .services.cohorts import cohort_engine
+from .services.llm_cache import llm_cache
+from .services.llm_client import llm_client
+from .services import data_versions, metrics, query_stats
+from .pagination import NEXT_CURSOR_HEADER
+from fastapi.responses import PlainTextResponse
+import time
+from starlette.concurrency import run_in_threadpool
 
 app = FastAPI(title="ALPHA API", version="0.1.0")
 
+metrics.instrument_engine(engine)
+query_stats.instrument_engine(engine)
+metrics.stats_gauges("alpha_audit_sink", "Audit sink counters by field.", audit_sink.stats)
+metrics.stats_gauges("alpha_auth_claims_cache", "Verified-token cache stats by field.", claims_cache.stats)
+metrics.stats_gauges("alpha_user_cache", "User snapshot cache stats by field.", user_cache.stats)
+metrics.stats_gauges("alpha_report_cache", "Report summary cache stats by field.", report_cache.stats)
+metrics.stats_gauges("alpha_cohort_cache", "Cohort analytics cache stats by field.", cohort_engine.stats)
+metrics.stats_gauges("alpha_llm_cache", "LLM response cache stats by field.", llm_cache.stats)
+metrics.stats_gauges("alpha_llm_client", "LLM client concurrency and circuit breaker by field.", llm_client.stats)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.CORS_ORIGINS,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, data_versions.ETAG_HEADER],
 )
 
 
@@ -31,18 +52,12 @@ app.add_middleware(
 async def audit_middleware(request: Request, call_next):
     # Avoid logging docs and health
     path: str = request.url.path
-    if path.startswith("/healthz") or path.startswith("/docs") or path.startswith("/openapi"):
+    if (path.startswith("/healthz") or path.startswith("/docs") or path.startswith("/openapi")
+            or path == "/metrics"):
         return await call_next(request)
 
-    user_id = None
-    try:
-        auth = request.headers.get("authorization") or request.headers.get("Authorization")
-        if auth and auth.lower().startswith("bearer "):
-            token = auth.split(" ", 1)[1].strip()
-            payload = jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.JWT_ALG])
-            user_id = payload.get("sub")
-    except Exception:
-        user_id = None
+    # Decoded once here and reused by security.get_current_user
+    user_id = get_auth_context(request).user_id
 
     response = None
     success = True
@@ -53,23 +68,50 @@ async def audit_middleware(request: Request, call_next):
     finally:
         try:
             # Persist audit event (best-effort)
-            db = SessionLocal()
-            try:
-                seg = path.strip("/").split("/", 1)[0] or "root"
-                evt = models.AuditEvent(
-                    user_id=user_id,
-                    action=(request.method or "").lower(),
-                    resource=seg,
-                    success=bool(success),
-                    ip=(request.client.host if request.client else None),
-                )
-                db.add(evt)
-                db.commit()
-            finally:
-                db.close()
+            seg = path.strip("/").split("/", 1)[0] or "root"
+            evt = {
+                "user_id": user_id,
+                "action": (request.method or "").lower(),
+                "resource": seg,
+                "success": bool(success),
+                "ip": (request.client.host if request.client else None),
+                "created_at": datetime.utcnow(),
+            }
+            if audit_sink.running:
+                if audit_sink.policy == "block":
+                    await run_in_threadpool(audit_sink.submit, evt)
+                else:
+                    audit_sink.submit(evt)
+            else:
+                audit_sink.write_batch([evt])
         except Exception:
             pass
 
+@app.middleware("http")
+async def metrics_middleware(request: Request, call_next):
+    # Registered after audit_middleware, so it wraps it and times the full request
+    metrics.http_in_flight.inc()
+    start = time.perf_counter()
+    stats, token = query_stats.begin()
+    response = None
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        return response
+    finally:
+        query_stats.end(token)
+        metrics.http_in_flight.dec()
+        # Label by route template, never raw path, to bound cardinality
+        route_path = metrics.route_template(request.scope)
+        method = request.method
+        metrics.http_latency.observe(time.perf_counter() - start, route_path, method)
+        metrics.http_requests.inc(route_path, method, status_code)
+        debug_headers = query_stats.report(stats, method, route_path)
+        if response is not None:
+            response.headers.update(debug_headers)
+
+
 app.include_router(auth.router, prefix="/auth", tags=["Auth"])
 app.include_router(profiles.router, prefix="/profiles", tags=["Profiles"])
 app.include_router(vitals.router, prefix="/vitals", tags=["Vitals"])
@@ -81,6 +123,7 @@ app.include_router(account.router, prefix="/account", tags=["Account"])
 app.include_router(reminders.router, prefix="/reminders", tags=["Reminders"])
 app.include_router(cycles.router, prefix="/cycles", tags=["Cycles"])
 app.include_router(consent.router, prefix="/consent", tags=["Consent"])
+app.include_router(admin.router, prefix="/admin", tags=["Admin"])
 
 # Dev convenience: create tables if not disabled (for local SQLite/dev use)
 if os.getenv("ALPHA_DISABLE_CREATE_ALL") != "1":
@@ -91,16 +134,59 @@ if os.getenv("ALPHA_DISABLE_CREATE_ALL") != "1":
 def healthz():
     return {"status": "ok"}
 
+
+@app.get("/metrics", include_in_schema=False)
+def metrics_endpoint():
+    return PlainTextResponse(metrics.registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@app.get("/healthz/stats")
+def healthz_stats():
+    # Counters only (no user data); /healthz paths are skipped by the audit log
+    return {
+        "audit_sink": audit_sink.stats(),
+        "auth_claims_cache": claims_cache.stats(),
+        "user_cache": user_cache.stats(),
+        "report_cache": report_cache.stats(),
+        "cohort_cache": cohort_engine.stats(),
+        "llm_cache": llm_cache.stats(),
+        "llm_client": llm_client.stats(),
+    }
+
 # Include routers below (when you have them)
 # from .routers import auth, profiles, vitals, symptoms, goals, reports, meds, account
 # app.include_router(auth.router, prefix="/auth", tags=["Auth"])
 # ...
 
 
+@app.on_event("startup")
+def start_audit_sink():
+    if settings.AUDIT_SINK_ENABLED:
+        audit_sink.start()
+
+
+@app.on_event("shutdown")
+def stop_audit_sink():
+    # Drain queued audit rows before the process exits
+    audit_sink.stop()
+
+
+@app.on_event("startup")
+async def start_llm_client():
+    # One pooled upstream client per worker, on the serving loop
+    llm_client.start()
+
+
+@app.on_event("shutdown")
+async def stop_llm_client():
+    await llm_client.aclose()
+
+
 @app.on_event("startup")
 async def start_reminder_dispatcher():
     async def dispatcher():
         while True:
+            loop_start = time.perf_counter()
             try:
                 now = datetime.utcnow()
                 db = SessionLocal()
@@ -112,20 +198,26 @@ async def start_reminder_dispatcher():
                         .limit(20)
                         .all()
                     )
+                    # One query for every due reminder's subscriptions (avoids N+1).
+                    # Plain tuples: per-reminder commits would expire ORM rows.
+                    subs_by_user: dict[str, list[tuple[str, str | None]]] = {}
+                    if rows:
+                        for user_id, endpoint, keys_json in (
+                            db.query(PushSubscription.user_id, PushSubscription.endpoint, PushSubscription.keys_json)
+                            .filter(PushSubscription.user_id.in_({r.user_id for r in rows}))
+                            .all()
+                        ):
+                            subs_by_user.setdefault(user_id, []).append((endpoint, keys_json))
                     for r in rows:
                         try:
-                            subs = (
-                                db.query(PushSubscription)
-                                .filter(PushSubscription.user_id == r.user_id)
-                                .all()
-                            )
-                            for s in subs:
+                            subs = subs_by_user.get(r.user_id, [])
+                            for endpoint, keys_json in subs:
                                 if not webpush:
                                     break
                                 try:
-                                    keys = _json.loads(s.keys_json) if s.keys_json else {}
+                                    keys = _json.loads(keys_json) if keys_json else {}
                                     webpush(
-                                        subscription_info={"endpoint": s.endpoint, "keys": keys},
+                                        subscription_info={"endpoint": endpoint, "keys": keys},
                                         data=_json.dumps({"title": "ALPHA Reminder", "body": r.message}),
                                         vapid_private_key=settings.VAPID_PRIVATE_KEY,
                                         vapid_claims={"sub": f"mailto:{settings.VAPID_EMAIL}"},
@@ -134,17 +226,23 @@ async def start_reminder_dispatcher():
                                     pass
                             # mark sent; if recurring, reschedule next occurrence
                             r.sent_at = datetime.utcnow()
+                            metrics.dispatcher_lag.observe((r.sent_at - r.scheduled_at).total_seconds())
                             if r.recurrence in ("daily","weekly"):
                                 days = 1 if r.recurrence == "daily" else 7
                                 r.scheduled_at = r.scheduled_at + timedelta(days=days)
                                 r.sent_at = None
+                            data_versions.bump(db, r.user_id, "reminders")
                             db.commit()
+                            metrics.dispatcher_reminders.inc("sent")
                         except Exception:
                             db.rollback()
+                            metrics.dispatcher_reminders.inc("failed")
                 finally:
                     db.close()
             except Exception:
                 pass
+            metrics.dispatcher_loop.observe(time.perf_counter() - loop_start)
+            metrics.dispatcher_last_run.set(value=time.time())
             await asyncio.sleep(60)
 
     asyncio.create_task(dispatcher())
@@ -1,6 +1,6 @@
 from datetime import datetime
 from typing import Optional
-from sqlalchemy import String, Boolean, Integer, Float, DateTime, ForeignKey, Text, Column
+from sqlalchemy import String, Boolean, Integer, Float, DateTime, ForeignKey, Text, Column, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from .db import Base
 from sqlalchemy.dialects.postgresql import UUID
@@ -75,6 +75,9 @@ class Consent(Base):
 
 class AuditEvent(Base):
     __tablename__ = "audit_events"
+    __table_args__ = (
+        Index("ix_audit_events_user_id_created_at", "user_id", "created_at"),
+    )
     id: Mapped[str] = mapped_column(
         String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     user_id: Mapped[Optional[str]] = mapped_column(
@@ -92,10 +95,13 @@ class AuditEvent(Base):
 
 
 from .models_symptoms import SymptomRecord  # noqa: F401,E402  (import at end by design)
-from .models_vitals import VitalRecord  # noqa: F401,E402  (import at end by design)
+from .models_vitals import VitalRecord, VitalDailyRollup, VitalBaseline  # noqa: F401,E402  (import at end by design)
 from .models_push import PushSubscription  # noqa: F401,E402  (import at end by design)
 from .models_cycles import CycleEntry  # noqa: F401,E402  (import at end by design)
 from .models_password_reset import PasswordReset  # noqa: F401,E402  (import at end by design)
 from .models_refresh import RefreshToken  # noqa: F401,E402  (import at end by design)
 from .models_reminders import Reminder  # noqa: F401,E402  (import at end by design)
 from .models_email_verification import EmailVerification  # noqa: F401,E402  (import at end by design)
+from .models_versions import DataVersion  # noqa: F401,E402  (import at end by design)
+from .models_reports import ReportSnapshot, ReportJob  # noqa: F401,E402  (import at end by design)
+from .models_llm import LlmCacheEntry  # noqa: F401,E402  (import at end by design)
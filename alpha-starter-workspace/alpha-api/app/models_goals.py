@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import String, DateTime, ForeignKey, Text
+from sqlalchemy import String, DateTime, ForeignKey, Text, Index
 from sqlalchemy.orm import Mapped, mapped_column
 from .db import Base
 
@@ -9,6 +9,9 @@ def utcnow() -> datetime: return datetime.utcnow()
 
 class Goal(Base):
     __tablename__ = "goals"
+    __table_args__ = (
+        Index("ix_goals_user_id_created_at", "user_id", "created_at"),
+    )
     id: Mapped[str] = mapped_column(String(36), primary_key=True)
     user_id: Mapped[str] = mapped_column(String(36), ForeignKey(
         "users.id", ondelete="CASCADE"), index=True)
@@ -21,6 +24,9 @@ class Goal(Base):
 
 class GoalProgress(Base):
     __tablename__ = "goal_progress"
+    __table_args__ = (
+        Index("ix_goal_progress_user_id_goal_id_created_at", "user_id", "goal_id", "created_at"),
+    )
     id: Mapped[str] = mapped_column(String(36), primary_key=True)
     user_id: Mapped[str] = mapped_column(String(36), ForeignKey("users.id", ondelete="CASCADE"), index=True)
     goal_id: Mapped[str] = mapped_column(String(36), ForeignKey("goals.id", ondelete="CASCADE"), index=True)
@@ -0,0 +1,26 @@
+from datetime import datetime
+from sqlalchemy import String, Integer, Text, DateTime, Index
+from sqlalchemy.orm import Mapped, mapped_column
+from .db import Base
+
+
+def utcnow() -> datetime: return datetime.utcnow()
+
+
+class LlmCacheEntry(Base):
+    """Persistent tier of the LLM response cache (services.llm_cache).
+
+    ``key`` hashes the normalized input with the prompt version and model,
+    so entries never depend on who asked; ``value`` is the response JSON.
+    """
+    __tablename__ = "llm_cache_entries"
+    __table_args__ = (
+        Index("ix_llm_cache_entries_expires_at", "expires_at"),
+        Index("ix_llm_cache_entries_kind_created_at", "kind", "created_at"),
+    )
+    key: Mapped[str] = mapped_column(String(64), primary_key=True)
+    kind: Mapped[str] = mapped_column(String(16), nullable=False)  # meds|symptoms
+    value: Mapped[str] = mapped_column(Text, nullable=False)
+    hits: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=utcnow, nullable=False)
+    expires_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import String, DateTime, Text, ForeignKey
+from sqlalchemy import String, DateTime, Text, ForeignKey, Index, text
 from sqlalchemy.orm import Mapped, mapped_column
 from .db import Base
 
@@ -9,6 +9,12 @@ def utcnow() -> datetime: return datetime.utcnow()
 
 class Reminder(Base):
     __tablename__ = "reminders"
+    __table_args__ = (
+        Index("ix_reminders_user_id_scheduled_at", "user_id", "scheduled_at"),
+        # Partial index for the dispatcher's pending scan
+        Index("ix_reminders_pending_scheduled_at", "scheduled_at",
+              postgresql_where=text("sent_at IS NULL"), sqlite_where=text("sent_at IS NULL")),
+    )
     id: Mapped[str] = mapped_column(String(36), primary_key=True)
     user_id: Mapped[str] = mapped_column(String(36), ForeignKey("users.id", ondelete="CASCADE"), index=True)
     message: Mapped[str] = mapped_column(Text, nullable=False)
@@ -0,0 +1,38 @@
+from datetime import datetime
+from sqlalchemy import String, Integer, BigInteger, Float, Text, DateTime, ForeignKey
+from sqlalchemy.orm import Mapped, mapped_column
+from .db import Base
+
+
+def utcnow() -> datetime: return datetime.utcnow()
+
+
+class ReportSnapshot(Base):
+    """Precomputed /reports/summary payload (services.report_precompute).
+
+    ``vitals_version``/``symptoms_version`` are the user's data versions read
+    before computing; the snapshot is served only while they still match.
+    """
+    __tablename__ = "report_snapshots"
+    user_id: Mapped[str] = mapped_column(String(36), ForeignKey(
+        "users.id", ondelete="CASCADE"), primary_key=True)
+    period: Mapped[str] = mapped_column(String(16), primary_key=True)
+    vitals_version: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    symptoms_version: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    payload: Mapped[str] = mapped_column(Text, nullable=False)  # ReportSummaryOut JSON
+    computed_at: Mapped[datetime] = mapped_column(DateTime, default=utcnow, nullable=False)
+
+
+class ReportJob(Base):
+    """Progress of one precompute run; ``cursor`` is the last user id of the
+    completed prefix of chunks, so a rerun resumes after it."""
+    __tablename__ = "report_jobs"
+    job_id: Mapped[str] = mapped_column(String(64), primary_key=True)
+    periods: Mapped[str] = mapped_column(String(64), nullable=False)
+    cursor: Mapped[str | None] = mapped_column(String(36))
+    users_done: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    snapshots: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    seconds: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)  # busy time over all runs
+    started_at: Mapped[datetime] = mapped_column(DateTime, default=utcnow, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=utcnow, nullable=False)
+    finished_at: Mapped[datetime | None] = mapped_column(DateTime)
@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import String, DateTime, ForeignKey, Text
+from sqlalchemy import String, DateTime, ForeignKey, Text, Index
 from sqlalchemy.orm import Mapped, mapped_column
 from .db import Base
 
@@ -9,6 +9,9 @@ def utcnow() -> datetime: return datetime.utcnow()
 
 class SymptomRecord(Base):
     __tablename__ = "symptom_reports"
+    __table_args__ = (
+        Index("ix_symptom_reports_user_id_created_at", "user_id", "created_at"),
+    )
     id: Mapped[str] = mapped_column(String(36), primary_key=True)
     user_id: Mapped[str] = mapped_column(String(36), ForeignKey(
         "users.id", ondelete="CASCADE"), index=True)
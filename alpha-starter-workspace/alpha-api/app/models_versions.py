@@ -0,0 +1,18 @@
+from datetime import datetime
+from sqlalchemy import String, BigInteger, DateTime, ForeignKey
+from sqlalchemy.orm import Mapped, mapped_column
+from .db import Base
+
+
+def utcnow() -> datetime: return datetime.utcnow()
+
+
+class DataVersion(Base):
+    """Per-user, per-collection change counter (services.data_versions)."""
+    __tablename__ = "data_versions"
+    user_id: Mapped[str] = mapped_column(String(36), ForeignKey(
+        "users.id", ondelete="CASCADE"), primary_key=True)
+    collection: Mapped[str] = mapped_column(String(32), primary_key=True)
+    version: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime, default=utcnow, nullable=False)
@@ -1,12 +1,21 @@
 from datetime import datetime
-from sqlalchemy import String, Float, DateTime, ForeignKey
+from sqlalchemy import String, Float, Integer, Date, DateTime, ForeignKey, Index, Column, Table
 from sqlalchemy.orm import Mapped, mapped_column
 from .db import Base
+from .services.vital_flags import METRICS
 
 def utcnow() -> datetime: return datetime.utcnow()
 
 class VitalRecord(Base):
     __tablename__ = "vital_records"
+    __table_args__ = (
+        Index("ix_vital_records_user_id_created_at", "user_id", "created_at"),
+        # ?flag= filtering and per-flag report counts (index-only)
+        Index("ix_vital_records_user_id_bp_flag_created_at", "user_id", "bp_flag", "created_at"),
+        Index("ix_vital_records_user_id_hr_flag_created_at", "user_id", "hr_flag", "created_at"),
+        Index("ix_vital_records_user_id_temp_flag_created_at", "user_id", "temp_flag", "created_at"),
+        Index("ix_vital_records_user_id_glucose_flag_created_at", "user_id", "glucose_flag", "created_at"),
+    )
     id: Mapped[str] = mapped_column(String(36), primary_key=True)
     user_id: Mapped[str] = mapped_column(String(36), ForeignKey("users.id", ondelete="CASCADE"), index=True)
     systolic: Mapped[float | None] = mapped_column(Float)
@@ -16,3 +25,64 @@ class VitalRecord(Base):
     glucose_mgdl: Mapped[float | None] = mapped_column(Float)
     weight_kg: Mapped[float | None] = mapped_column(Float)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=utcnow, nullable=False)
+    # Stored at write time by services.vital_flags (NULL when the reading is missing)
+    bp_flag: Mapped[str | None] = mapped_column(String(32))
+    hr_flag: Mapped[str | None] = mapped_column(String(32))
+    temp_flag: Mapped[str | None] = mapped_column(String(32))
+    glucose_flag: Mapped[str | None] = mapped_column(String(32))
+    # Deviation from the user's own baseline at write time (services.vital_baselines):
+    # largest |z| over the reading's fields, and the fields at/over VITALS_ANOMALY_Z
+    anomaly_score: Mapped[float | None] = mapped_column(Float)
+    anomaly_metrics: Mapped[str | None] = mapped_column(String(128))
+
+
+VITAL_FIELDS = ("systolic", "diastolic", "heart_rate", "temperature_c", "glucose_mgdl", "weight_kg")
+
+
+# ---- Daily rollups (maintained by services.vital_rollups) ----
+ROLLUP_FIELDS = VITAL_FIELDS
+# n = readings with a value; sum/sumsq give mean and variance
+ROLLUP_ADDITIVE_STATS = ("n", "sum", "sumsq")
+
+
+def flag_count_column(metric: str, label: str) -> str:
+    return f"{metric}_{label.replace('-', '_')}"
+
+
+def rollup_columns() -> list[Column]:
+    """Fresh Column objects for vital_daily_rollups."""
+    cols = [
+        Column("user_id", String(36), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True),
+        Column("day", Date, primary_key=True),
+        Column("readings", Integer, nullable=False, default=0),
+    ]
+    for f in ROLLUP_FIELDS:
+        cols += [
+            Column(f"{f}_n", Integer, nullable=False, default=0),
+            Column(f"{f}_sum", Float, nullable=False, default=0.0),
+            Column(f"{f}_sumsq", Float, nullable=False, default=0.0),
+            Column(f"{f}_min", Float),
+            Column(f"{f}_max", Float),
+        ]
+    for m in METRICS:
+        cols += [Column(flag_count_column(m.name, label), Integer, nullable=False, default=0) for label in m.labels]
+    cols.append(Column("updated_at", DateTime, default=utcnow, nullable=False))
+    return cols
+
+
+class VitalDailyRollup(Base):
+    # One row per user per UTC day; the (user_id, day) primary key serves range reads
+    __table__ = Table("vital_daily_rollups", Base.metadata, *rollup_columns())
+
+
+# ---- Per-user baselines (maintained by services.vital_baselines) ----
+class VitalBaseline(Base):
+    """EWMA mean/variance of one vital field for one user (O(1) state)."""
+    __tablename__ = "vital_baselines"
+    user_id: Mapped[str] = mapped_column(String(36), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    field: Mapped[str] = mapped_column(String(32), primary_key=True)
+    n: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    mean: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    var: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    last_at: Mapped[datetime | None] = mapped_column(DateTime)  # created_at of the newest reading folded in
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=utcnow, onupdate=utcnow, nullable=False)
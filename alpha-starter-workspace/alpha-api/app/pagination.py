@@ -0,0 +1,89 @@
+"""Keyset (cursor) pagination shared by the list endpoints.
+
+List endpoints keep returning a plain JSON array; when more rows exist the
+opaque cursor for the next page is returned in the ``X-Next-Cursor`` header.
+Pages are fetched with a seek predicate on ``(sort column, id)`` so deep
+pages cost the same as the first one (no OFFSET).
+"""
+from __future__ import annotations
+
+import base64
+import json
+from datetime import datetime, timezone
+from typing import Any, Callable, Optional, Tuple
+
+from fastapi import HTTPException, Query, Response
+from sqlalchemy import and_, or_
+
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class PageParams:
+    def __init__(self, limit: int, cursor: Optional[Tuple[datetime, str]] = None,
+                 since: Optional[datetime] = None, until: Optional[datetime] = None) -> None:
+        self.limit = limit
+        self.cursor = cursor
+        self.since = since
+        self.until = until
+
+
+def _naive_utc(dt: Optional[datetime]) -> Optional[datetime]:
+    # Timestamps are stored as naive UTC
+    if dt is None or dt.tzinfo is None:
+        return dt
+    return dt.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def encode_cursor(ts: datetime, row_id: str) -> str:
+    raw = json.dumps([ts.isoformat(), row_id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        ts, row_id = json.loads(raw)
+        return datetime.fromisoformat(ts), str(row_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor") from None
+
+
+def page_params(default_limit: int, max_limit: int = 500) -> Callable[..., PageParams]:
+    """Build a dependency parsing ``cursor``/``limit``/``since``/``until``.
+
+    ``limit`` is clamped to ``[1, max_limit]``; ``since`` is inclusive and
+    ``until`` exclusive.
+    """
+    def dependency(
+        cursor: Optional[str] = Query(None, description="Opaque cursor from X-Next-Cursor"),
+        limit: Optional[int] = Query(None, description=f"Page size (default {default_limit}, max {max_limit})"),
+        since: Optional[datetime] = Query(None, description="Only rows at or after this time"),
+        until: Optional[datetime] = Query(None, description="Only rows before this time"),
+    ) -> PageParams:
+        n = default_limit if limit is None else max(1, min(max_limit, limit))
+        return PageParams(
+            limit=n,
+            cursor=decode_cursor(cursor) if cursor else None,
+            since=_naive_utc(since),
+            until=_naive_utc(until),
+        )
+    return dependency
+
+
+def paginate(query: Any, sort_col: Any, id_col: Any, page: PageParams, response: Response) -> list:
+    """Apply range filters and the seek predicate, newest first."""
+    if page.since is not None:
+        query = query.filter(sort_col >= page.since)
+    if page.until is not None:
+        query = query.filter(sort_col < page.until)
+    if page.cursor is not None:
+        ts, row_id = page.cursor
+        # The leading `<=` keeps the predicate a plain index range scan
+        query = query.filter(and_(sort_col <= ts, or_(sort_col < ts, id_col < row_id)))
+    rows = query.order_by(sort_col.desc(), id_col.desc()).limit(page.limit + 1).all()
+    if len(rows) > page.limit:
+        rows = rows[:page.limit]
+        last = rows[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(getattr(last, sort_col.key), getattr(last, id_col.key))
+    return rows
@@ -0,0 +1,72 @@
+"""Fast serialization path for the list endpoints.
+
+A list endpoint selects only the columns its response schema needs
+(``schema_columns``), so rows come back as plain tuples: no ORM entities and
+no identity map. ``json_rows`` zips them into dicts and encodes them with
+orjson (stdlib ``json`` if it is missing), returning the bytes as a
+``Response``. FastAPI does not re-validate a returned ``Response``; routes
+keep ``response_model`` so the OpenAPI schema is unchanged.
+
+The output is the same JSON the Pydantic path produced: keys in schema
+field order, naive datetimes in ISO format. ``smoke_test.py`` and
+``benchmarks/bench_list_serialization.py`` compare the two.
+"""
+from __future__ import annotations
+
+import json
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from fastapi import Response
+from pydantic import BaseModel
+
+try:
+    import orjson  # type: ignore
+except Exception:
+    orjson = None  # type: ignore
+
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def dumps_lines(items: Iterable[Any]) -> bytes:
+    """Newline-delimited JSON (one document per line, trailing newline)."""
+    if orjson is not None:
+        return b"".join(orjson.dumps(item, option=orjson.OPT_APPEND_NEWLINE) for item in items)
+    return b"".join(dumps(item) + b"\n" for item in items)
+
+
+def schema_columns(model: Any, schema: type[BaseModel], **sources: str) -> Tuple[List[str], List[Any]]:
+    """Response keys in ``schema`` field order and the ``model`` columns feeding
+    them. ``sources`` maps a field to a differently named column."""
+    keys = list(schema.model_fields)
+    return keys, [getattr(model, sources.get(k, k)) for k in keys]
+
+
+def json_rows(keys: Sequence[str], rows: Iterable[Sequence[Any]], response: Optional[Response] = None,
+              convert: Optional[Callable[[Dict[str, Any]], None]] = None) -> Response:
+    """JSON array of ``rows`` keyed by ``keys``.
+
+    ``convert`` may adjust each dict in place. Headers already set on the
+    endpoint's injected ``response`` (``X-Next-Cursor``, ``ETag``) are
+    carried over, since FastAPI only merges them into responses it builds.
+    """
+    items = [dict(zip(keys, r, strict=True)) for r in rows]
+    if convert is not None:
+        for item in items:
+            convert(item)
+    out = Response(content=dumps(items), media_type="application/json")
+    if response is not None:
+        out.raw_headers.extend(
+            (k, v) for k, v in response.raw_headers if k not in (b"content-length", b"content-type")
+        )
+    return out
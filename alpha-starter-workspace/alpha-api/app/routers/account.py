@@ -1,16 +1,21 @@
 from typing import Any, Dict
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from fastapi.responses import JSONResponse
 from fastapi.encoders import jsonable_encoder
 from sqlalchemy.orm import Session
 
 from ..db import get_db
 from .. import models
-from ..models_vitals import VitalRecord
+from ..models_vitals import VitalRecord, VitalDailyRollup, VitalBaseline
 from ..models_symptoms import SymptomRecord
 from ..models_goals import Goal
+from ..models_reports import ReportSnapshot
 from ..security import get_current_user, verify_password
+from ..services.report_cache import report_cache
+from ..services.user_cache import user_cache
+from ..pagination import PageParams, page_params, paginate
+from ..responses import json_rows
 
 
 router = APIRouter()
@@ -77,31 +82,21 @@ def export_account(
     return JSONResponse(content=jsonable_encoder(payload), media_type="application/json")
 
 
+AUDIT_KEYS = ("id", "action", "resource", "success", "ip", "created_at")
+
+
 @router.get("/audit")
 def list_audit(
-    limit: int = 100,
+    response: Response,
+    page: PageParams = Depends(page_params(100, max_limit=500)),
     db: Session = Depends(get_db),
     user: models.User = Depends(get_current_user)
 ):
-    limit = max(1, min(500, limit))
-    rows = (
-        db.query(models.AuditEvent)
-        .filter(models.AuditEvent.user_id == user.id)
-        .order_by(models.AuditEvent.created_at.desc())
-        .limit(limit)
-        .all()
+    rows = paginate(
+        db.query(*(getattr(models.AuditEvent, k) for k in AUDIT_KEYS)).filter(models.AuditEvent.user_id == user.id),
+        models.AuditEvent.created_at, models.AuditEvent.id, page, response,
     )
-    out = []
-    for r in rows:
-        out.append({
-            "id": r.id,
-            "action": r.action,
-            "resource": r.resource,
-            "success": r.success,
-            "ip": r.ip,
-            "created_at": r.created_at,
-        })
-    return jsonable_encoder(out)
+    return json_rows(AUDIT_KEYS, rows, response)
 
 
 class DeleteAccountIn(models.BaseModel if hasattr(models, 'BaseModel') else object):  # fallback if not using pydantic here
@@ -121,15 +116,22 @@ def delete_account(
     if not verify_password(password, user.password_hash):
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
+    user_id = user.id
     # Delete dependent records first to be safe, then the user
     db.query(VitalRecord).filter(VitalRecord.user_id == user.id).delete(synchronize_session=False)
+    db.query(VitalDailyRollup).filter(VitalDailyRollup.user_id == user.id).delete(synchronize_session=False)
+    db.query(VitalBaseline).filter(VitalBaseline.user_id == user.id).delete(synchronize_session=False)
     db.query(SymptomRecord).filter(SymptomRecord.user_id == user.id).delete(synchronize_session=False)
     db.query(Goal).filter(Goal.user_id == user.id).delete(synchronize_session=False)
     db.query(models.HealthProfile).filter(models.HealthProfile.user_id == user.id).delete(synchronize_session=False)
     db.query(models.Consent).filter(models.Consent.user_id == user.id).delete(synchronize_session=False)
     db.query(models.AuditEvent).filter(models.AuditEvent.user_id == user.id).delete(synchronize_session=False)
+    db.query(models.DataVersion).filter(models.DataVersion.user_id == user.id).delete(synchronize_session=False)
+    db.query(ReportSnapshot).filter(ReportSnapshot.user_id == user.id).delete(synchronize_session=False)
     db.query(models.User).filter(models.User.id == user.id).delete(synchronize_session=False)
     db.commit()
+    user_cache.invalidate(user_id)
+    report_cache.invalidate(user_id)
     # 204 No Content
     return
 
@@ -0,0 +1,78 @@
+from datetime import date, datetime
+from typing import Dict, List, Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from pydantic import BaseModel
+
+from .. import models
+from ..security import require_admin
+from ..services import cohorts
+from ..services.cohorts import cohort_engine
+from ..services.llm_cache import llm_cache
+
+
+class FieldMoments(BaseModel):
+    n: int
+    mean: Optional[float] = None
+    stddev: Optional[float] = None  # sample (n - 1)
+
+
+class Cohort(BaseModel):
+    age_band: Optional[str] = None  # only the dimensions asked for are set
+    sex: Optional[str] = None
+    activity_level: Optional[str] = None
+    users: int
+    readings: int
+    flags: Dict[str, int]
+    shares: Dict[str, float]  # of the readings with this metric present
+    fields: Dict[str, FieldMoments]
+
+
+class LlmCachePurgeOut(BaseModel):
+    memory: int  # entries dropped from this worker's in-process tier
+    store: int  # entries dropped from the persistent tier
+
+
+class CohortReportOut(BaseModel):
+    fingerprint: str
+    metric: str
+    by: List[str]
+    start: date
+    end: date
+    source: str
+    computed_at: datetime
+    seconds: float
+    chunks: int
+    cached: bool
+    cohorts: List[Cohort]
+
+
+router = APIRouter()
+
+
+@router.get("/cohorts", response_model=CohortReportOut)
+def get_cohorts(
+    metric: Literal["bp", "hr", "temp", "glucose"] = Query("bp"),
+    by: str = Query(",".join(cohorts.DIMENSIONS), description="Comma-separated: age_band, sex, activity_level"),
+    from_: date | None = Query(None, alias="from", description="Inclusive UTC day; default COHORT_DEFAULT_DAYS before to"),
+    to: date | None = Query(None, description="Inclusive UTC day; default today"),
+    source: Literal["rollups", "readings"] = Query("rollups"),
+    refresh: bool = Query(False, description="Recompute even if cached"),
+    _admin: models.User = Depends(require_admin),
+):
+    """Vital flag distribution per profile cohort, over all users (see services.cohorts)."""
+    try:
+        q = cohorts.make_query(metric, [d for d in by.split(",") if d.strip()], from_, to, source)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+    result, cached = cohort_engine.get(q, refresh=refresh)
+    return {**result, "cached": cached}
+
+
+@router.delete("/llm-cache", response_model=LlmCachePurgeOut)
+def purge_llm_cache(
+    kind: Optional[Literal["meds", "symptoms"]] = Query(None, description="Only this kind (default: all)"),
+    _admin: models.User = Depends(require_admin),
+):
+    """Drop cached LLM responses, e.g. after a bad answer or a model change."""
+    return llm_cache.purge(kind)
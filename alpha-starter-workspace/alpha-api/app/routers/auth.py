@@ -12,6 +12,7 @@ from ..security import new_uuid
 from datetime import datetime, timedelta, timezone
 import secrets
 from ..services import emailer
+from ..services.user_cache import user_cache
 from ..models_email_verification import EmailVerification
 
 
@@ -150,6 +151,7 @@ def password_reset(payload: PasswordResetConfirmIn, db: Session = Depends(get_db
     user.password_hash = hash_password(payload.new_password)
     rec.used = True
     db.commit()
+    user_cache.invalidate(user.id)
     return
 
 
@@ -199,6 +201,7 @@ def email_verify_confirm(payload: EmailVerifyConfirmIn, db: Session = Depends(ge
     user.email_verified = True
     rec.used = True
     db.commit()
+    user_cache.invalidate(user.id)
     return
 
 def _issue_refresh_token(db: Session, user_id: str) -> str:
@@ -274,4 +277,5 @@ def password_change(
         raise HTTPException(status_code=401, detail="Invalid credentials")
     user.password_hash = hash_password(payload.new_password)
     db.commit()
+    user_cache.invalidate(user.id)
     return
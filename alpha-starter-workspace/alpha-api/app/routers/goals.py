@@ -1,9 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.orm import Session
 from ..db import get_db
 from .. import models, schemas
 from ..models_goals import Goal, GoalProgress
 from ..security import get_current_user, new_uuid
+from ..pagination import PageParams, page_params, paginate
+from ..responses import json_rows, schema_columns
+from ..services import data_versions
 
 
 router = APIRouter()
@@ -31,6 +34,7 @@ def create_goal(
         cadence=payload.cadence,
     )
     db.add(rec)
+    data_versions.bump(db, user.id, "goals")
     db.commit()
     db.refresh(rec)
     return schemas.GoalOut(
@@ -39,25 +43,23 @@ def create_goal(
     )
 
 
+GOAL_OUT_KEYS, GOAL_OUT_COLUMNS = schema_columns(Goal, schemas.GoalOut)
+PROGRESS_OUT_KEYS, PROGRESS_OUT_COLUMNS = schema_columns(GoalProgress, schemas.GoalProgressOut)
+
+
 @router.get("", response_model=list[schemas.GoalOut])
 def list_goals(
+    response: Response,
+    page: PageParams = Depends(page_params(200)),
+    _etag: None = Depends(data_versions.conditional("goals")),
     db: Session = Depends(get_db),
     user: models.User = Depends(get_current_user)
 ):
-    rows = (
-        db.query(Goal)
-        .filter(Goal.user_id == user.id)
-        .order_by(Goal.created_at.desc())
-        .limit(200)
-        .all()
+    rows = paginate(
+        db.query(*GOAL_OUT_COLUMNS).filter(Goal.user_id == user.id),
+        Goal.created_at, Goal.id, page, response,
     )
-    return [
-        schemas.GoalOut(
-            id=r.id, user_id=r.user_id, created_at=r.created_at,
-            category=r.category, target_value=r.target_value, cadence=r.cadence,
-        )
-        for r in rows
-    ]
+    return json_rows(GOAL_OUT_KEYS, rows, response)
 
 
 @router.put("/{goal_id}", response_model=schemas.GoalOut)
@@ -80,6 +82,7 @@ def update_goal(
         rec.target_value = payload.target_value
     if payload.cadence is not None:
         rec.cadence = payload.cadence
+    data_versions.bump(db, user.id, "goals")
     db.commit()
     db.refresh(rec)
     return schemas.GoalOut(
@@ -101,6 +104,7 @@ def delete_goal(
     )
     if not deleted:
         raise HTTPException(status_code=404, detail="Goal not found")
+    data_versions.bump(db, user.id, "goals")
     db.commit()
     return
 
@@ -131,19 +135,15 @@ def add_progress(
 @router.get("/{goal_id}/progress", response_model=list[schemas.GoalProgressOut])
 def list_progress(
     goal_id: str,
+    response: Response,
+    page: PageParams = Depends(page_params(100)),
     db: Session = Depends(get_db),
     user: models.User = Depends(get_current_user)
 ):
-    rows = (
-        db.query(GoalProgress)
-        .filter(GoalProgress.goal_id == goal_id, GoalProgress.user_id == user.id)
-        .order_by(GoalProgress.created_at.desc())
-        .limit(100)
-        .all()
+    rows = paginate(
+        db.query(*PROGRESS_OUT_COLUMNS).filter(GoalProgress.goal_id == goal_id, GoalProgress.user_id == user.id),
+        GoalProgress.created_at, GoalProgress.id, page, response,
     )
-    return [
-        schemas.GoalProgressOut(id=r.id, goal_id=r.goal_id, user_id=r.user_id, value=r.value, note=r.note, created_at=r.created_at)
-        for r in rows
-    ]
+    return json_rows(PROGRESS_OUT_KEYS, rows, response)
 
 
@@ -22,7 +22,7 @@ router = APIRouter()
 
 
 @router.post("/decoder", response_model=MedDecodeOut, status_code=status.HTTP_201_CREATED)
-def decode_medication(payload: Dict[str, Any] | str = Body(...)):
+async def decode_medication(payload: Dict[str, Any] | str = Body(...)):
     # Accept robust payloads: either dict or a JSON string
     if isinstance(payload, str):
         try:
@@ -37,7 +37,7 @@ def decode_medication(payload: Dict[str, Any] | str = Body(...)):
     if not llm_client.is_configured():
         raise HTTPException(status_code=status.HTTP_501_NOT_IMPLEMENTED, detail="LLM not configured")
 
-    result = llm_client.decodeMedication(data.name, data.user_context)
+    result = await llm_client.decodeMedication(data.name, data.user_context)
 
     # Unit-safe guardrails: ensure text does not include dosage advice beyond label
     usage_text = result.get("usage") or "Follow the product label and pharmacist guidance."
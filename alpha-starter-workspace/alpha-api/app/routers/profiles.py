@@ -3,6 +3,7 @@ from sqlalchemy.orm import Session
 from ..db import get_db
 from .. import models, schemas
 from ..security import get_current_user, new_uuid
+from ..services import data_versions
 
 router = APIRouter()
 
@@ -21,6 +22,7 @@ def _join_csv(items: list[str] | None) -> str | None:
 
 @router.get("/me", response_model=schemas.ProfileOut)
 def get_me(
+    _etag: None = Depends(data_versions.conditional("profile")),
     db: Session = Depends(get_db),
     user: models.User = Depends(get_current_user)
 ):
@@ -93,6 +95,7 @@ def update_me(
     prof.emergency_contact_phone = payload.emergency_contact_phone
     prof.preferred_units = payload.preferred_units
 
+    data_versions.bump(db, user.id, "profile")
     db.commit()
     db.refresh(prof)
 
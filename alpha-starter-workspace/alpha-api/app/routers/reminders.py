@@ -1,5 +1,5 @@
 from datetime import datetime, timedelta
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from pydantic import BaseModel
 from typing import List, Any, Dict
 from sqlalchemy.orm import Session
@@ -7,8 +7,11 @@ from ..db import get_db
 from .. import models
 from ..security import get_current_user
 from ..security import new_uuid
+from ..pagination import PageParams, page_params, paginate
+from ..responses import json_rows, schema_columns
 from ..models_push import PushSubscription
 from ..models_reminders import Reminder
+from ..services import data_versions
 import json
 from ..config import settings
 
@@ -207,24 +210,29 @@ def schedule_reminder(
 ):
     rec = Reminder(id=new_uuid(), user_id=user.id, message=payload.message, scheduled_at=payload.scheduled_at, recurrence=payload.recurrence)
     db.add(rec)
+    data_versions.bump(db, user.id, "reminders")
     db.commit()
     db.refresh(rec)
     return ReminderOut(id=rec.id, user_id=rec.user_id, message=rec.message, scheduled_at=rec.scheduled_at, sent_at=rec.sent_at)
 
 
+REMINDER_OUT_KEYS, REMINDER_OUT_COLUMNS = schema_columns(Reminder, ReminderOut)
+
+
 @router.get("", response_model=List[ReminderOut])
 def list_reminders(
+    response: Response,
+    page: PageParams = Depends(page_params(200)),
+    _etag: None = Depends(data_versions.conditional("reminders")),
     db: Session = Depends(get_db),
     user: models.User = Depends(get_current_user)
 ):
-    rows = (
-        db.query(Reminder)
-        .filter(Reminder.user_id == user.id)
-        .order_by(Reminder.scheduled_at.desc())
-        .limit(200)
-        .all()
+    # Paged by scheduled_at (the list's sort order); since/until apply to it too
+    rows = paginate(
+        db.query(*REMINDER_OUT_COLUMNS).filter(Reminder.user_id == user.id),
+        Reminder.scheduled_at, Reminder.id, page, response,
     )
-    return [ReminderOut(id=r.id, user_id=r.user_id, message=r.message, scheduled_at=r.scheduled_at, sent_at=r.sent_at) for r in rows]
+    return json_rows(REMINDER_OUT_KEYS, rows, response)
 
 
 @router.delete("/{reminder_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -238,6 +246,8 @@ def delete_reminder(
         .filter(Reminder.id == reminder_id, Reminder.user_id == user.id)
         .delete(synchronize_session=False)
     )
+    if deleted:
+        data_versions.bump(db, user.id, "reminders")
     db.commit()
     if not deleted:
         raise HTTPException(status_code=404, detail="Reminder not found")
@@ -261,6 +271,7 @@ def update_reminder(
     rec.message = payload.message
     rec.scheduled_at = payload.scheduled_at
     rec.recurrence = payload.recurrence
+    data_versions.bump(db, user.id, "reminders")
     db.commit()
     db.refresh(rec)
     return ReminderOut(id=rec.id, user_id=rec.user_id, message=rec.message, scheduled_at=rec.scheduled_at, sent_at=rec.sent_at, recurrence=rec.recurrence)
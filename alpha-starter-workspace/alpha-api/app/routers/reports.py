@@ -1,87 +1,37 @@
 from datetime import datetime, timedelta
-from typing import Dict, List, Literal, Optional
+from typing import Dict, Literal, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Query
-from fastapi.responses import PlainTextResponse
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 
 from .. import models
+from ..config import settings
 from ..db import get_db
-from ..models_vitals import VitalRecord
-from ..models_symptoms import SymptomRecord
 from ..security import get_current_user
+from ..services import exports, report_summary, vital_stats
+from ..services.report_cache import report_cache
+from ..services.report_summary import ReportSummaryOut, SymptomSummary, VitalsSummary, compute_summary  # noqa: F401
+from .vitals import _naive_utc
 
 
-# Minimal flag helpers (kept consistent with vitals router thresholds)
-def flag_bp(sys: Optional[float], dia: Optional[float]) -> Optional[str]:
-    if sys is None or dia is None:
-        return None
-    if sys >= 180 or dia >= 120:
-        return "hypertensive-crisis"
-    if sys >= 140 or dia >= 90:
-        return "hypertension-stage2"
-    if sys >= 130 or dia >= 80:
-        return "hypertension-stage1"
-    if sys >= 120 and dia < 80:
-        return "elevated"
-    return "normal"
-
-
-def flag_hr(hr: Optional[float]) -> Optional[str]:
-    if hr is None:
-        return None
-    if hr < 40:
-        return "bradycardia-severe"
-    if hr < 60:
-        return "bradycardia"
-    if hr > 120:
-        return "tachycardia-severe"
-    if hr > 100:
-        return "tachycardia"
-    return "normal"
-
-
-def flag_temp(t: Optional[float]) -> Optional[str]:
-    if t is None:
-        return None
-    if t >= 39.0:
-        return "fever-high"
-    if t >= 38.0:
-        return "fever"
-    if t < 35.0:
-        return "hypothermia"
-    return "normal"
-
-
-def flag_glucose(g: Optional[float]) -> Optional[str]:
-    if g is None:
-        return None
-    if g >= 240:
-        return "hyperglycemia"
-    if g < 70:
-        return "hypoglycemia"
-    return "normal"
-
-
-class VitalsSummary(BaseModel):
-    total: int
-    bp: Dict[str, int]
-    hr: Dict[str, int]
-    temp: Dict[str, int]
-    glucose: Dict[str, int]
-
-
-class SymptomSummary(BaseModel):
-    total: int
-    by_severity: Dict[str, int]
-
-
-class ReportSummaryOut(BaseModel):
-    period: Literal["week", "month"]
-    vitals_summary: VitalsSummary
-    symptom_summary: SymptomSummary
-    markdown: str
+class MetricStats(BaseModel):
+    count: int
+    mean: Optional[float] = None
+    stddev: Optional[float] = None  # sample (n - 1)
+    min: Optional[float] = None
+    max: Optional[float] = None
+    p50: Optional[float] = None  # percentiles are sketch estimates (~1% rank error)
+    p90: Optional[float] = None
+    p99: Optional[float] = None
+
+
+class ReportStatsOut(BaseModel):
+    start: datetime
+    end: datetime
+    readings: int
+    metrics: Dict[str, MetricStats]
 
 
 router = APIRouter()
@@ -93,111 +43,27 @@ def get_summary(
     db: Session = Depends(get_db),
     user: models.User = Depends(get_current_user),
 ):
-    now = datetime.utcnow()
-    start = now - timedelta(days=7 if period == "week" else 30)
-
-    # Vitals aggregation
-    vitals_rows: List[VitalRecord] = (
-        db.query(VitalRecord)
-        .filter(VitalRecord.user_id == user.id)
-        .filter(VitalRecord.created_at >= start)
-        .order_by(VitalRecord.created_at.desc())
-        .all()
+    return report_cache.get_or_compute(
+        db, user.id, period, lambda versions: report_summary.summary(db, user.id, period, versions),
+        ReportSummaryOut.model_validate,
     )
 
-    bp_counts: Dict[str, int] = {k: 0 for k in [
-        "normal", "elevated", "hypertension-stage1", "hypertension-stage2", "hypertensive-crisis"
-    ]}
-    hr_counts: Dict[str, int] = {k: 0 for k in [
-        "normal", "bradycardia", "bradycardia-severe", "tachycardia", "tachycardia-severe"
-    ]}
-    temp_counts: Dict[str, int] = {k: 0 for k in [
-        "normal", "fever", "fever-high", "hypothermia"
-    ]}
-    glucose_counts: Dict[str, int] = {k: 0 for k in [
-        "normal", "hypoglycemia", "hyperglycemia"
-    ]}
-
-    for r in vitals_rows:
-        bpf = flag_bp(r.systolic, r.diastolic)
-        if bpf:
-            bp_counts[bpf] = bp_counts.get(bpf, 0) + 1
-        hrf = flag_hr(r.heart_rate)
-        if hrf:
-            hr_counts[hrf] = hr_counts.get(hrf, 0) + 1
-        tf = flag_temp(r.temperature_c)
-        if tf:
-            temp_counts[tf] = temp_counts.get(tf, 0) + 1
-        gf = flag_glucose(r.glucose_mgdl)
-        if gf:
-            glucose_counts[gf] = glucose_counts.get(gf, 0) + 1
-
-    vitals_summary = VitalsSummary(
-        total=len(vitals_rows),
-        bp=bp_counts,
-        hr=hr_counts,
-        temp=temp_counts,
-        glucose=glucose_counts,
-    )
-
-    # Symptoms aggregation
-    sym_rows: List[SymptomRecord] = (
-        db.query(SymptomRecord)
-        .filter(SymptomRecord.user_id == user.id)
-        .filter(SymptomRecord.created_at >= start)
-        .order_by(SymptomRecord.created_at.desc())
-        .all()
-    )
-    by_severity: Dict[str, int] = {}
-    for s in sym_rows:
-        sev = (s.severity or "unspecified").strip().lower()
-        by_severity[sev] = by_severity.get(sev, 0) + 1
-
-    symptom_summary = SymptomSummary(total=len(sym_rows), by_severity=by_severity)
-
-    # Markdown summary
-    lines: List[str] = []
-    lines.append(f"# ALPHA Summary ({period})")
-    lines.append("")
-    lines.append("## Vitals")
-    lines.append(f"Total entries: {vitals_summary.total}")
-    lines.append(
-        f"BP flags: normal {bp_counts['normal']}, elevated {bp_counts['elevated']}, "
-        f"stage1 {bp_counts['hypertension-stage1']}, stage2 {bp_counts['hypertension-stage2']}, "
-        f"crisis {bp_counts['hypertensive-crisis']}"
-    )
-    lines.append(
-        f"HR flags: normal {hr_counts['normal']}, brady {hr_counts['bradycardia']}/{hr_counts['bradycardia-severe']}, "
-        f"tachy {hr_counts['tachycardia']}/{hr_counts['tachycardia-severe']}"
-    )
-    lines.append(
-        f"Temp flags: normal {temp_counts['normal']}, fever {temp_counts['fever']}, "
-        f"fever-high {temp_counts['fever-high']}, hypothermia {temp_counts['hypothermia']}"
-    )
-    lines.append(
-        f"Glucose flags: normal {glucose_counts['normal']}, hypo {glucose_counts['hypoglycemia']}, "
-        f"hyper {glucose_counts['hyperglycemia']}"
-    )
-    lines.append("")
-    lines.append("## Symptoms")
-    lines.append(f"Total reports: {symptom_summary.total}")
-    if by_severity:
-        sev_str = ", ".join(f"{k}: {v}" for k, v in by_severity.items())
-        lines.append(f"By severity: {sev_str}")
-    else:
-        lines.append("By severity: none")
-    lines.append("")
-    lines.append(
-        "Note: This summary is informational and non-clinical. For medical concerns, consult a professional."
-    )
 
-    markdown = "\n".join(lines)
-
-    return ReportSummaryOut(
-        period=period,
-        vitals_summary=vitals_summary,
-        symptom_summary=symptom_summary,
-        markdown=markdown,
+@router.get("/stats", response_model=ReportStatsOut)
+def get_stats(
+    from_: datetime | None = Query(None, alias="from", description="Inclusive; default REPORT_STATS_DEFAULT_DAYS before to"),
+    to: datetime | None = Query(None, description="Exclusive; default now"),
+    db: Session = Depends(get_db),
+    user: models.User = Depends(get_current_user),
+):
+    end = _naive_utc(to) if to else datetime.utcnow()
+    start = _naive_utc(from_) if from_ else end - timedelta(days=settings.REPORT_STATS_DEFAULT_DAYS)
+    if start >= end:
+        raise HTTPException(status_code=400, detail="from must be before to")
+    readings, stats = vital_stats.range_stats(db, user.id, start, end)
+    return ReportStatsOut(
+        start=start, end=end, readings=readings,
+        metrics={f: MetricStats(**s.summary()) for f, s in stats.items()},
     )
 
 
@@ -212,3 +78,26 @@ def export_report(
     resp = PlainTextResponse(content=data.markdown, media_type="text/markdown; charset=utf-8")
     resp.headers["Content-Disposition"] = f"attachment; filename={filename}"
     return resp
+
+
+@router.get("/export/{dataset}", response_class=StreamingResponse)
+def export_data(
+    dataset: Literal["vitals", "symptoms"],
+    format: Literal["csv", "ndjson", "parquet"] = Query("csv"),
+    from_: datetime | None = Query(None, alias="from", description="Inclusive; default all history"),
+    to: datetime | None = Query(None, description="Exclusive; default no upper bound"),
+    user: models.User = Depends(get_current_user),
+):
+    """Raw rows, streamed in batches (see services.exports)."""
+    start = _naive_utc(from_) if from_ else None
+    end = _naive_utc(to) if to else None
+    if start is not None and end is not None and start >= end:
+        raise HTTPException(status_code=400, detail="from must be before to")
+    if format == "parquet" and not exports.parquet_available():
+        raise HTTPException(status_code=501, detail="pyarrow not installed")
+    filename = f"alpha-{dataset}.{format}"
+    return StreamingResponse(
+        exports.stream(dataset, format, user.id, start, end),
+        media_type=exports.MEDIA_TYPES[format],
+        headers={"Content-Disposition": f"attachment; filename={filename}"},
+    )
@@ -1,9 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException, Body
+from fastapi import APIRouter, Depends, HTTPException, Body, Response
 from sqlalchemy.orm import Session
 from ..db import get_db
 from .. import models, schemas
 from ..models_symptoms import SymptomRecord
 from ..security import get_current_user, new_uuid
+from ..pagination import PageParams, page_params, paginate
+from ..responses import json_rows, schema_columns
+from ..services import data_versions
+from ..services.report_cache import report_cache
 from ..services.llm_client import llm_client
 import json
 
@@ -36,7 +40,9 @@ def create_symptom(
         severity=data.severity,
     )
     db.add(rec)
+    data_versions.bump(db, user.id, "symptoms")
     db.commit()
+    report_cache.invalidate(user.id)
     db.refresh(rec)
 
     return schemas.SymptomOut(
@@ -45,25 +51,22 @@ def create_symptom(
     )
 
 
+SYMPTOM_OUT_KEYS, SYMPTOM_OUT_COLUMNS = schema_columns(SymptomRecord, schemas.SymptomOut)
+
+
 @router.get("", response_model=list[schemas.SymptomOut])
 def list_symptoms(
+    response: Response,
+    page: PageParams = Depends(page_params(50)),
+    _etag: None = Depends(data_versions.conditional("symptoms")),
     db: Session = Depends(get_db),
     user: models.User = Depends(get_current_user)
 ):
-    rows = (
-        db.query(SymptomRecord)
-        .filter(SymptomRecord.user_id == user.id)
-        .order_by(SymptomRecord.created_at.desc())
-        .limit(50)
-        .all()
+    rows = paginate(
+        db.query(*SYMPTOM_OUT_COLUMNS).filter(SymptomRecord.user_id == user.id),
+        SymptomRecord.created_at, SymptomRecord.id, page, response,
     )
-    out: list[schemas.SymptomOut] = []
-    for rec in rows:
-        out.append(schemas.SymptomOut(
-            id=rec.id, user_id=rec.user_id, created_at=rec.created_at,
-            description=rec.description, severity=rec.severity,
-        ))
-    return out
+    return json_rows(SYMPTOM_OUT_KEYS, rows, response)
 
 
 @router.put("/{symptom_id}", response_model=schemas.SymptomOut)
@@ -92,7 +95,9 @@ def update_symptom(
     if data.description:
         rec.description = data.description.strip()
     rec.severity = data.severity
+    data_versions.bump(db, user.id, "symptoms")
     db.commit()
+    report_cache.invalidate(user.id)
     db.refresh(rec)
     return schemas.SymptomOut(id=rec.id, user_id=rec.user_id, created_at=rec.created_at, description=rec.description, severity=rec.severity)
 
@@ -110,12 +115,14 @@ def delete_symptom(
     )
     if not deleted:
         raise HTTPException(status_code=404, detail="Symptom not found")
+    data_versions.bump(db, user.id, "symptoms")
     db.commit()
+    report_cache.invalidate(user.id)
     return
 
 
 @router.post("/analyze", response_model=schemas.SymptomAnalysisOut)
-def analyze_symptom(
+async def analyze_symptom(
     payload: dict | str = Body(...),
     db: Session = Depends(get_db),
     user: models.User = Depends(get_current_user)
@@ -152,7 +159,7 @@ def analyze_symptom(
     implications: list[str] = []
     if llm_client.is_configured():
         try:
-            llm = llm_client.analyzeSymptoms(data.description, data.severity if isinstance(data.severity, str) else None)
+            llm = await llm_client.analyzeSymptoms(data.description, data.severity if isinstance(data.severity, str) else None)
             for a in (llm.get("advice") or []):
                 if a and a not in advice:
                     advice.append(a)
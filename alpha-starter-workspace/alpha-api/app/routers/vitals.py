@@ -1,61 +1,35 @@
-from fastapi import APIRouter, Depends, HTTPException
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
+from sqlalchemy import insert, or_
 from sqlalchemy.orm import Session
 from ..db import get_db
 from .. import models, schemas
-from ..models_vitals import VitalRecord
+from ..models_vitals import VITAL_FIELDS, VitalRecord
+from ..config import settings
 from ..security import get_current_user, new_uuid
+from ..pagination import PageParams, page_params, paginate
+from ..responses import json_rows, schema_columns
+from ..services import data_versions, vital_baselines, vital_flags, vital_rollups, vital_series, vitals_import
+from ..services.report_cache import report_cache
 
 router = APIRouter()
 
 
-def flag_bp(sys: float | None, dia: float | None) -> str | None:
-    if sys is None or dia is None:
-        return None
-    if sys >= 180 or dia >= 120:
-        return "hypertensive-crisis"
-    if sys >= 140 or dia >= 90:
-        return "hypertension-stage2"
-    if sys >= 130 or dia >= 80:
-        return "hypertension-stage1"
-    if sys >= 120 and dia < 80:
-        return "elevated"
-    return "normal"
-
-
-def flag_hr(hr: float | None) -> str | None:
-    if hr is None:
-        return None
-    if hr < 40:
-        return "bradycardia-severe"
-    if hr < 60:
-        return "bradycardia"
-    if hr > 120:
-        return "tachycardia-severe"
-    if hr > 100:
-        return "tachycardia"
-    return "normal"
-
-
-def flag_temp(t: float | None) -> str | None:
-    if t is None:
-        return None
-    if t >= 39.0:
-        return "fever-high"
-    if t >= 38.0:
-        return "fever"
-    if t < 35.0:
-        return "hypothermia"
-    return "normal"
-
-
-def flag_glucose(g: float | None) -> str | None:
-    if g is None:
-        return None
-    if g >= 240:
-        return "hyperglycemia"
-    if g < 70:
-        return "hypoglycemia"
-    return "normal"
+def vital_out(rec: VitalRecord) -> schemas.VitalOut:
+    return schemas.VitalOut(
+        id=rec.id, user_id=rec.user_id, created_at=rec.created_at,
+        systolic=rec.systolic, diastolic=rec.diastolic,
+        heart_rate=rec.heart_rate, temperature_c=rec.temperature_c,
+        glucose_mgdl=rec.glucose_mgdl, weight_kg=rec.weight_kg,
+        bp_flag=rec.bp_flag, hr_flag=rec.hr_flag,
+        temp_flag=rec.temp_flag, glucose_flag=rec.glucose_flag,
+        anomaly_score=rec.anomaly_score, anomalies=vital_baselines.anomalies(rec.anomaly_metrics),
+    )
 
 
 @router.post("", response_model=schemas.VitalOut, status_code=201)
@@ -78,47 +52,205 @@ def create_vital(
         heart_rate=payload.heart_rate, temperature_c=payload.temperature_c,
         glucose_mgdl=payload.glucose_mgdl, weight_kg=payload.weight_kg,
     )
+    vital_flags.stamp_record(rec)
+    vital_baselines.score_record(db, rec)
     db.add(rec)
+    db.flush()
+    vital_rollups.apply_record(db, rec)
+    data_versions.bump(db, user.id, "vitals")
     db.commit()
+    report_cache.invalidate(user.id)
     db.refresh(rec)
 
-    return schemas.VitalOut(
-        id=rec.id, user_id=rec.user_id, created_at=rec.created_at,
-        systolic=rec.systolic, diastolic=rec.diastolic,
-        heart_rate=rec.heart_rate, temperature_c=rec.temperature_c,
-        glucose_mgdl=rec.glucose_mgdl, weight_kg=rec.weight_kg,
-        bp_flag=flag_bp(rec.systolic, rec.diastolic),
-        hr_flag=flag_hr(rec.heart_rate),
-        temp_flag=flag_temp(rec.temperature_c),
-        glucose_flag=flag_glucose(rec.glucose_mgdl),
-    )
+    return vital_out(rec)
+
+
+def _naive_utc(dt: datetime) -> datetime:
+    if dt.tzinfo is not None:
+        return dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return dt
+
+
+def build_vital_row(item: schemas.VitalBatchItemIn, user_id: str, now: datetime) -> tuple[dict | None, str | None]:
+    """Turn one validated reading into an insert row, or return an error message."""
+    values = {f: getattr(item, f) for f in VITAL_FIELDS}
+    if all(v is None for v in values.values()):
+        return None, "Provide at least one vital field"
+    measured_at = _naive_utc(item.measured_at) if item.measured_at else now
+    if measured_at > now + timedelta(seconds=settings.VITALS_MAX_CLOCK_SKEW_SEC):
+        return None, "measured_at is in the future"
+    return {"id": new_uuid(), "user_id": user_id, "created_at": measured_at, **values}, None
+
+
+def insert_vital_rows(db: Session, rows: list[dict]) -> None:
+    """Stamp flags and anomaly scores on ``rows``, insert them with one
+    executemany / multi-row INSERT, fold them into the daily rollups and commit."""
+    if not rows:
+        return
+    vital_flags.stamp_rows(rows)
+    vital_baselines.score_rows(db, rows)
+    # Core insert: the ORM bulk path drops None-valued keys and would split
+    # the rows into one INSERT per distinct column set
+    db.execute(insert(VitalRecord.__table__), rows)
+    vital_rollups.apply_inserted(db, rows)
+    user_ids = {r["user_id"] for r in rows}
+    for user_id in user_ids:
+        data_versions.bump(db, user_id, "vitals")
+    db.commit()
+    for user_id in user_ids:
+        report_cache.invalidate(user_id)
+
+
+@router.post("/batch", response_model=schemas.VitalBatchOut, status_code=201)
+def create_vitals_batch(
+    payload: schemas.VitalBatchIn,
+    db: Session = Depends(get_db),
+    user: models.User = Depends(get_current_user)
+):
+    now = datetime.utcnow()
+    rows: list[dict] = []
+    items: list[schemas.VitalBatchItemOut] = []
+    for i, item in enumerate(payload.readings):
+        row, error = build_vital_row(item, user.id, now)
+        if row is None:
+            items.append(schemas.VitalBatchItemOut(index=i, status="error", error=error))
+            continue
+        rows.append(row)
+        items.append(schemas.VitalBatchItemOut(index=i, status="created", id=row["id"]))
+
+    # One transaction for the whole batch; flags are stamped on the rows
+    insert_vital_rows(db, rows)
+    created = (it for it in items if it.status == "created")
+    for it, row in zip(created, rows, strict=True):
+        it.bp_flag, it.hr_flag = row["bp_flag"], row["hr_flag"]
+        it.temp_flag, it.glucose_flag = row["temp_flag"], row["glucose_flag"]
+        it.anomaly_score, it.anomalies = row["anomaly_score"], vital_baselines.anomalies(row["anomaly_metrics"])
+    return schemas.VitalBatchOut(created=len(rows), failed=len(items) - len(rows), items=items)
+
+
+@router.post("/import", response_model=schemas.VitalImportOut)
+async def import_vitals(
+    request: Request,
+    format: str | None = Query(None, description="ndjson|csv (default: from Content-Type)"),
+    db: Session = Depends(get_db),
+    user: models.User = Depends(get_current_user)
+):
+    """Stream historical readings from an NDJSON or CSV body.
+
+    Rows are validated like /vitals/batch items and committed every
+    VITALS_IMPORT_CHUNK rows, so a failure part-way keeps earlier chunks.
+    CSV uploads need a header row naming the vital fields and measured_at.
+    """
+    fmt = vitals_import.detect_format(format, request.headers.get("content-type"))
+    if fmt is None:
+        raise HTTPException(status_code=400, detail="Unsupported format (use ndjson or csv)")
+
+    user_id = user.id
+    now = datetime.utcnow()
+    chunk_size = max(1, settings.VITALS_IMPORT_CHUNK)
+    out = schemas.VitalImportOut(format=fmt, rows=0, imported=0, failed=0, chunks=0, errors=[])
+    rows: list[dict] = []
+
+    def fail(line: int, error: str) -> None:
+        out.failed += 1
+        if len(out.errors) < settings.VITALS_IMPORT_MAX_ERRORS:
+            out.errors.append(schemas.VitalImportError(line=line, error=error))
+        else:
+            out.errors_truncated = True
+
+    async def flush() -> None:
+        t0 = time.perf_counter()
+        # Sync session: keep the event loop free while the chunk is written
+        await run_in_threadpool(insert_vital_rows, db, rows)
+        vitals_import.import_chunks.observe(time.perf_counter() - t0)
+        vitals_import.import_rows.inc("imported", amount=len(rows))
+        out.imported += len(rows)
+        out.chunks += 1
+        rows.clear()
+        vitals_import.logger.info("vitals import user=%s format=%s rows=%d imported=%d failed=%d",
+                                  user_id, fmt, out.rows, out.imported, out.failed)
+
+    async for line, record, error in vitals_import.iter_records(request.stream(), fmt):
+        out.rows += 1
+        if record is not None:
+            try:
+                item = schemas.VitalBatchItemIn.model_validate(record)
+            except ValidationError as e:
+                error = vitals_import.validation_message(e)
+            else:
+                row, error = build_vital_row(item, user_id, now)
+                if row is not None:
+                    rows.append(row)
+                    if len(rows) >= chunk_size:
+                        await flush()
+                    continue
+        fail(line, error or "Invalid record")
+
+    if rows:
+        await flush()
+    vitals_import.import_rows.inc("failed", amount=out.failed)
+    return out
+
+
+# Fast list path: only the VitalOut columns, serialized straight to JSON
+VITAL_OUT_KEYS, VITAL_OUT_COLUMNS = schema_columns(VitalRecord, schemas.VitalOut, anomalies="anomaly_metrics")
+
+
+def _decode_anomalies(item: dict) -> None:
+    item["anomalies"] = vital_baselines.anomalies(item["anomalies"])
 
 
 @router.get("", response_model=list[schemas.VitalOut])
 def list_vitals(
+    response: Response,
+    page: PageParams = Depends(page_params(200)),
+    _etag: None = Depends(data_versions.conditional("vitals")),
+    flag: str | None = Query(None, description="Only readings with this flag, e.g. hypertension-stage2 or bp:normal"),
     db: Session = Depends(get_db),
     user: models.User = Depends(get_current_user)
 ):
-    rows = (
-        db.query(VitalRecord)
-        .filter(VitalRecord.user_id == user.id)
-        .order_by(VitalRecord.created_at.desc())
-        .limit(200)
-        .all()
+    query = db.query(*VITAL_OUT_COLUMNS).filter(VitalRecord.user_id == user.id)
+    if flag:
+        matches = vital_flags.resolve_filter(flag)
+        if matches is None:
+            raise HTTPException(status_code=400, detail=f"Unknown flag: {flag}")
+        # Each condition is served by an ix_vital_records_user_id_<metric>_flag_created_at index
+        query = query.filter(or_(*(getattr(VitalRecord, f"{m.name}_flag") == label for m, label in matches)))
+    rows = paginate(query, VitalRecord.created_at, VitalRecord.id, page, response)
+    return json_rows(VITAL_OUT_KEYS, rows, response, _decode_anomalies)
+
+
+@router.get("/series", response_model=schemas.VitalSeriesOut)
+def vitals_series(
+    metric: Literal["systolic", "diastolic", "heart_rate", "temperature_c", "glucose_mgdl", "weight_kg"],
+    from_: datetime | None = Query(None, alias="from", description="Inclusive; default VITALS_SERIES_DEFAULT_DAYS before to"),
+    to: datetime | None = Query(None, description="Exclusive; default now"),
+    bucket: Literal["hour", "day", "week"] | None = Query(None, description="min/avg/max per bucket (default day)"),
+    points: int | None = Query(None, ge=3, le=settings.VITALS_SERIES_MAX_POINTS,
+                               description="Downsample raw readings to at most N points (LTTB)"),
+    db: Session = Depends(get_db),
+    user: models.User = Depends(get_current_user)
+):
+    if bucket is not None and points is not None:
+        raise HTTPException(status_code=400, detail="Use either bucket or points, not both")
+    end = _naive_utc(to) if to else datetime.utcnow()
+    start = _naive_utc(from_) if from_ else end - timedelta(days=settings.VITALS_SERIES_DEFAULT_DAYS)
+    if start >= end:
+        raise HTTPException(status_code=400, detail="from must be before to")
+
+    if points is not None:
+        total, pts = vital_series.downsample(db, user.id, metric, start, end, points)
+        return schemas.VitalSeriesOut(
+            metric=metric, start=start, end=end, total=total,
+            points=[schemas.VitalSeriesPoint(t=vital_series.to_datetime(t), v=v) for t, v in pts],
+        )
+    bucket = bucket or "day"
+    stats = vital_series.bucket_stats(db, user.id, metric, bucket, start, end)
+    return schemas.VitalSeriesOut(
+        metric=metric, start=start, end=end, bucket=bucket, total=sum(s[1] for s in stats),
+        buckets=[schemas.VitalSeriesBucket(start=b, count=n, min=lo, avg=avg, max=hi)
+                 for b, n, lo, avg, hi in stats],
     )
-    out = []
-    for rec in rows:
-        out.append(schemas.VitalOut(
-            id=rec.id, user_id=rec.user_id, created_at=rec.created_at,
-            systolic=rec.systolic, diastolic=rec.diastolic,
-            heart_rate=rec.heart_rate, temperature_c=rec.temperature_c,
-            glucose_mgdl=rec.glucose_mgdl, weight_kg=rec.weight_kg,
-            bp_flag=flag_bp(rec.systolic, rec.diastolic),
-            hr_flag=flag_hr(rec.heart_rate),
-            temp_flag=flag_temp(rec.temperature_c),
-            glucose_flag=flag_glucose(rec.glucose_mgdl),
-        ))
-    return out
 
 
 @router.put("/{vital_id}", response_model=schemas.VitalOut)
@@ -140,18 +272,14 @@ def update_vital(
         val = getattr(payload, field)
         if val is not None:
             setattr(rec, field, val)
+    vital_flags.stamp_record(rec)
+    db.flush()
+    vital_rollups.refresh_days(db, user.id, [rec.created_at.date()])
+    data_versions.bump(db, user.id, "vitals")
     db.commit()
+    report_cache.invalidate(user.id)
     db.refresh(rec)
-    return schemas.VitalOut(
-        id=rec.id, user_id=rec.user_id, created_at=rec.created_at,
-        systolic=rec.systolic, diastolic=rec.diastolic,
-        heart_rate=rec.heart_rate, temperature_c=rec.temperature_c,
-        glucose_mgdl=rec.glucose_mgdl, weight_kg=rec.weight_kg,
-        bp_flag=flag_bp(rec.systolic, rec.diastolic),
-        hr_flag=flag_hr(rec.heart_rate),
-        temp_flag=flag_temp(rec.temperature_c),
-        glucose_flag=flag_glucose(rec.glucose_mgdl),
-    )
+    return vital_out(rec)
 
 
 @router.delete("/{vital_id}", status_code=204)
@@ -160,12 +288,16 @@ def delete_vital(
     db: Session = Depends(get_db),
     user: models.User = Depends(get_current_user)
 ):
-    deleted = (
-        db.query(VitalRecord)
+    created_at = (
+        db.query(VitalRecord.created_at)
         .filter(VitalRecord.id == vital_id, VitalRecord.user_id == user.id)
-        .delete(synchronize_session=False)
+        .scalar()
     )
-    if not deleted:
+    if created_at is None:
         raise HTTPException(status_code=404, detail="Vital not found")
+    db.query(VitalRecord).filter(VitalRecord.id == vital_id).delete(synchronize_session=False)
+    vital_rollups.refresh_days(db, user.id, [created_at.date()])
+    data_versions.bump(db, user.id, "vitals")
     db.commit()
+    report_cache.invalidate(user.id)
     return
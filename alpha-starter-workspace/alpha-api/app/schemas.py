@@ -2,6 +2,8 @@ from datetime import datetime
 from typing import Optional
 from pydantic import BaseModel, EmailStr, Field
 
+from .config import settings
+
 
 class VitalIn(BaseModel):
     systolic: float | None = None
@@ -21,6 +23,79 @@ class VitalOut(VitalIn):
     hr_flag: str | None = None
     temp_flag: str | None = None
     glucose_flag: str | None = None
+    # deviation from the user's own rolling baseline (None while it warms up)
+    anomaly_score: float | None = None
+    anomalies: list[str] = []
+
+
+# Bulk ingestion (wearables/devices)
+class VitalBatchItemIn(VitalIn):
+    # client-side measurement time; defaults to server receive time
+    measured_at: datetime | None = None
+
+
+class VitalBatchIn(BaseModel):
+    readings: list[VitalBatchItemIn] = Field(min_length=1, max_length=settings.VITALS_BATCH_MAX)
+
+
+class VitalBatchItemOut(BaseModel):
+    index: int
+    status: str  # created|error
+    id: str | None = None
+    error: str | None = None
+    bp_flag: str | None = None
+    hr_flag: str | None = None
+    temp_flag: str | None = None
+    glucose_flag: str | None = None
+    anomaly_score: float | None = None
+    anomalies: list[str] = []
+
+
+class VitalBatchOut(BaseModel):
+    created: int
+    failed: int
+    items: list[VitalBatchItemOut]
+
+
+# Streaming import (NDJSON/CSV history)
+class VitalImportError(BaseModel):
+    line: int
+    error: str
+
+
+class VitalImportOut(BaseModel):
+    format: str
+    rows: int
+    imported: int
+    failed: int
+    chunks: int
+    errors: list[VitalImportError]
+    errors_truncated: bool = False
+
+
+# Chart series (GET /vitals/series)
+class VitalSeriesBucket(BaseModel):
+    start: datetime
+    count: int
+    min: float
+    avg: float
+    max: float
+
+
+class VitalSeriesPoint(BaseModel):
+    t: datetime
+    v: float
+
+
+class VitalSeriesOut(BaseModel):
+    metric: str
+    start: datetime
+    end: datetime
+    bucket: str | None = None  # hour|day|week, or None when downsampled
+    total: int  # raw readings in range
+    buckets: list[VitalSeriesBucket] = []
+    points: list[VitalSeriesPoint] = []
+
 
 class SymptomIn(BaseModel):
     description: str = Field(min_length=1, max_length=2000)
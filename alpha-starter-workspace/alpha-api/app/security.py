@@ -11,6 +11,8 @@ from sqlalchemy.orm import Session
 from .config import settings
 from .db import get_db
 from . import models
+from .services.ttl_cache import TTLCache
+from .services.user_cache import user_cache
 
 
 def hash_password(plain: str) -> str:
@@ -53,25 +55,94 @@ def _get_token_from_header(request: Request) -> str:
     return auth.split(" ", 1)[1].strip()
 
 
-def get_current_user(request: Request, db: Session = Depends(get_db)) -> models.User:
-    token = _get_token_from_header(request)
+# Verified token -> claims. Entries never outlive the token's own exp.
+claims_cache = TTLCache(
+    max_size=settings.AUTH_CLAIMS_CACHE_MAX,
+    ttl=settings.AUTH_CLAIMS_CACHE_TTL_SEC,
+)
+
+
+def decode_token(token: str) -> Dict[str, Any]:
+    """Verify a JWT, reusing a recent verification of the same token."""
+    claims = claims_cache.get(token)
+    if claims is not None:
+        return claims
+    claims = jwt.decode(token, settings.JWT_SECRET,
+                        algorithms=[settings.JWT_ALG])
+    exp = claims.get("exp")
+    ttl = None if exp is None else exp - datetime.now(timezone.utc).timestamp()
+    claims_cache.set(token, claims, ttl=ttl)
+    return claims
+
+
+class AuthContext:
+    """Result of decoding the bearer token, resolved once per request."""
+
+    def __init__(self, token: Optional[str] = None, claims: Optional[Dict[str, Any]] = None,
+                 error: Optional[str] = None) -> None:
+        self.token = token
+        self.claims = claims
+        self.error = error  # None | "expired" | "invalid"
+
+    @property
+    def user_id(self) -> Optional[str]:
+        return (self.claims or {}).get("sub") or None
+
+
+def get_auth_context(request: Request) -> AuthContext:
+    """Decode the bearer token at most once and memoize it on request.state."""
+    ctx = getattr(request.state, "auth", None)
+    if ctx is not None:
+        return ctx
     try:
-        payload = jwt.decode(token, settings.JWT_SECRET,
-                             algorithms=[settings.JWT_ALG])
-        sub = payload.get("sub")
-        if not sub:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
-    except jwt.ExpiredSignatureError:
+        token: Optional[str] = _get_token_from_header(request)
+    except HTTPException:
+        token = None
+    if not token:
+        ctx = AuthContext()
+    else:
+        try:
+            ctx = AuthContext(token, claims=decode_token(token))
+        except jwt.ExpiredSignatureError:
+            ctx = AuthContext(token, error="expired")
+        except Exception:
+            ctx = AuthContext(token, error="invalid")
+    request.state.auth = ctx
+    return ctx
+
+
+def get_current_user(request: Request, db: Session = Depends(get_db)) -> models.User:
+    ctx = get_auth_context(request)
+    if ctx.token is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="Missing bearer token")
+    if ctx.error == "expired":
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Token expired")
-    except Exception:
+    sub = ctx.user_id
+    if ctx.error or not sub:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
 
+    snap = user_cache.get(sub)
+    if snap is not None:
+        return user_cache.attach(db, snap)
     # SQLAlchemy 2.0: use Session.get(Model, pk)
     user = db.get(models.User, sub)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+    user_cache.put(user)
+    return user
+
+
+def require_admin(user: models.User = Depends(get_current_user)) -> models.User:
+    """Current user, if their email is listed in ``ADMIN_EMAILS`` and verified (403 otherwise).
+
+    Without the verification check, whoever registers a listed address first
+    would be an admin.
+    """
+    admins = {e.lower() for e in settings.ADMIN_EMAILS}
+    if not user.email or user.email.lower() not in admins or not user.email_verified:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin only")
     return user
@@ -0,0 +1,186 @@
+"""Background audit writer.
+
+The HTTP middleware hands audit rows to an in-process bounded queue; a
+writer thread drains the queue and persists rows with one multi-row
+INSERT per batch instead of one session/commit per request.
+"""
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import insert
+
+from ..config import settings
+from ..db import SessionLocal
+from .. import models
+
+
+POLICIES = ("drop", "drop_oldest", "block")
+
+_STOP = object()
+
+
+class AuditSink:
+    def __init__(
+        self,
+        max_queue: int = 10000,
+        batch_size: int = 200,
+        flush_interval: float = 1.0,
+        policy: str = "drop",
+        block_timeout: float = 0.05,
+    ) -> None:
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown audit queue policy: {policy}")
+        self.batch_size = max(1, int(batch_size))
+        self.flush_interval = max(0.01, float(flush_interval))
+        self.policy = policy
+        self.block_timeout = max(0.0, float(block_timeout))
+        self._q: "queue.Queue[Any]" = queue.Queue(maxsize=max(1, int(max_queue)))
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.flushed = 0
+        self.dropped = 0
+        self.failed = 0
+        self.batches = 0
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._thread = threading.Thread(target=self._run, name="audit-sink", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Ask the writer to drain what is queued, then wait for it to exit."""
+        t = self._thread
+        if t is None:
+            return
+        # The stop marker must get in even when the queue is full
+        while True:
+            try:
+                self._q.put(_STOP, timeout=0.1)
+                break
+            except queue.Full:
+                if not t.is_alive():
+                    break
+        t.join(timeout)
+        self._thread = None
+
+    def submit(self, event: Dict[str, Any]) -> bool:
+        """Enqueue one audit row. Returns False when the row was dropped."""
+        event.setdefault("created_at", datetime.utcnow())
+        try:
+            if self.policy == "block":
+                self._q.put(event, timeout=self.block_timeout)
+            else:
+                self._q.put_nowait(event)
+        except queue.Full:
+            if self.policy == "drop_oldest":
+                try:
+                    old = self._q.get_nowait()
+                    if old is _STOP:
+                        # Never discard a pending shutdown request
+                        self._q.put_nowait(old)
+                        raise queue.Full
+                    self._count(dropped=1)
+                    self._q.put_nowait(event)
+                except (queue.Empty, queue.Full):
+                    self._count(dropped=1)
+                    return False
+            else:
+                self._count(dropped=1)
+                return False
+        self._count(queued=1)
+        return True
+
+    def write_batch(self, events: List[Dict[str, Any]]) -> None:
+        """Persist events with a single executemany/multi-row INSERT."""
+        if not events:
+            return
+        db = SessionLocal()
+        try:
+            db.execute(insert(models.AuditEvent), events)
+            db.commit()
+        finally:
+            db.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "policy": self.policy,
+            "queue_depth": self._q.qsize(),
+            "queue_max": self._q.maxsize,
+            "queued": self.queued,
+            "flushed": self.flushed,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "batches": self.batches,
+        }
+
+    def _count(self, queued: int = 0, flushed: int = 0, dropped: int = 0, failed: int = 0, batches: int = 0) -> None:
+        with self._lock:
+            self.queued += queued
+            self.flushed += flushed
+            self.dropped += dropped
+            self.failed += failed
+            self.batches += batches
+
+    def _flush(self, batch: List[Dict[str, Any]]) -> None:
+        if not batch:
+            return
+        try:
+            self.write_batch(batch)
+            self._count(flushed=len(batch), batches=1)
+        except Exception:
+            # Best-effort, like the synchronous path it replaces
+            self._count(failed=len(batch))
+
+    def _run(self) -> None:
+        batch: List[Dict[str, Any]] = []
+        deadline = None
+        stopping = False
+        while not stopping:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._q.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+            if item is _STOP:
+                stopping = True
+            elif item is not None:
+                if not batch:
+                    deadline = time.monotonic() + self.flush_interval
+                batch.append(item)
+            if stopping or len(batch) >= self.batch_size or (deadline is not None and time.monotonic() >= deadline):
+                self._flush(batch)
+                batch = []
+                deadline = None
+        # Drain anything that raced in behind the stop marker
+        while True:
+            try:
+                item = self._q.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _STOP:
+                batch.append(item)
+            if len(batch) >= self.batch_size:
+                self._flush(batch)
+                batch = []
+        self._flush(batch)
+
+
+audit_sink = AuditSink(
+    max_queue=settings.AUDIT_QUEUE_MAX,
+    batch_size=settings.AUDIT_BATCH_SIZE,
+    flush_interval=settings.AUDIT_FLUSH_INTERVAL_MS / 1000.0,
+    policy=settings.AUDIT_QUEUE_POLICY,
+    block_timeout=settings.AUDIT_BLOCK_TIMEOUT_MS / 1000.0,
+)
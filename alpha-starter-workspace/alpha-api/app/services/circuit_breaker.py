@@ -0,0 +1,96 @@
+"""Consecutive-failure circuit breaker for calls to a remote dependency.
+
+- ``closed``: calls go through; ``failure_threshold`` failures in a row open it.
+- ``open``: ``allow`` is False (callers fail fast to their fallback) until
+  ``reset_timeout`` seconds have passed.
+- ``half_open``: one trial call is let through; success closes the
+  breaker, failure opens it again for another ``reset_timeout``. A trial
+  that ends with neither (cancelled) must call ``release_trial`` so the
+  next call can try.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Callable, Dict
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self.opened = 0  # times the breaker tripped
+        self.rejected = 0  # calls refused while open
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+                return HALF_OPEN
+            return self._state
+
+    def fail_fast(self) -> bool:
+        """True while open and still cooling down (counted as a rejection).
+
+        Cheap pre-check before queueing for a call; it never claims the
+        half-open trial slot, ``allow`` does that.
+        """
+        with self._lock:
+            if self._state == OPEN and self._clock() - self._opened_at < self.reset_timeout:
+                self.rejected += 1
+                return True
+            return False
+
+    def allow(self) -> bool:
+        """Whether a call may proceed now (claims the trial slot when half-open)."""
+        with self._lock:
+            if self._state == CLOSED:
+                return True
+            if self._state == OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+                self._state = HALF_OPEN
+            if self._state == HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._state = CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != OPEN:
+                    self.opened += 1
+                self._state = OPEN
+                self._opened_at = self._clock()
+            self._trial_in_flight = False
+
+    def release_trial(self) -> None:
+        """Give back a half-open trial that ended without an outcome (e.g. cancelled)."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def stats(self) -> Dict[str, Any]:
+        state = self.state
+        with self._lock:
+            return {
+                "state": state,
+                "open": state != CLOSED,
+                "consecutive_failures": self._failures,
+                "opened": self.opened,
+                "rejected": self.rejected,
+            }
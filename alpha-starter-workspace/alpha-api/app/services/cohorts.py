@@ -0,0 +1,321 @@
+"""Population cohort analytics: vital flag distributions by profile attributes.
+
+A query (``CohortQuery``) picks one flag metric (``bp`` by default), the
+profile dimensions to group by (``age_band``, ``sex``, ``activity_level``)
+and an inclusive UTC date range. Users without a profile, or without the
+attribute, fall in the ``unknown`` group.
+
+Users are cut into id ranges of ``COHORT_CHUNK_USERS`` (keyset over
+``users.id``; one index probe per boundary). Each range is one SQL
+statement that joins the vitals with ``health_profiles`` and ``GROUP BY``s
+the cohort columns, so rows never reach Python and each partial is at most
+one row per cohort. Partials are ``CohortAggregate`` objects that merge by
+adding counts and sums, so ranges can run in any order. Up to
+``COHORT_WORKERS`` ranges run at once on their own connections (the work
+is in the database, so threads are enough) and at most twice that many
+are in flight, which bounds memory whatever the table size.
+
+Two sources give the same numbers:
+
+- ``rollups`` (default): ``vital_daily_rollups``, one row per user-day;
+- ``readings``: ``vital_records`` directly, for when rollups are suspect.
+
+Results are cached per query fingerprint for ``COHORT_CACHE_TTL_SEC``.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import and_, case, func, literal, select
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..db import SessionLocal
+from .. import models
+from ..models_vitals import VitalDailyRollup, VitalRecord, flag_count_column
+from . import metrics
+from .ttl_cache import TTLCache
+from .vital_flags import METRICS, Metric
+
+
+DIMENSIONS = ("age_band", "sex", "activity_level")
+SOURCES = ("rollups", "readings")
+UNKNOWN = "unknown"
+# (label, lower bound inclusive); a band ends where the next one starts
+AGE_BANDS = (("<18", 0), ("18-29", 18), ("30-44", 30), ("45-59", 45), ("60-74", 60), ("75+", 75))
+
+rollups = VitalDailyRollup.__table__
+profiles = models.HealthProfile.__table__
+users = models.User.__table__
+
+chunk_seconds = metrics.histogram(
+    "alpha_cohort_chunk_seconds", "Time to aggregate one user range of a cohort query.", ("source",),
+)
+
+Key = Tuple[str, ...]
+
+
+class CohortQuery(NamedTuple):
+    metric: str
+    by: Tuple[str, ...]
+    start: date
+    end: date  # inclusive
+    source: str = "rollups"
+
+    def fingerprint(self) -> str:
+        canon = json.dumps({"metric": self.metric, "by": list(self.by), "start": self.start.isoformat(),
+                            "end": self.end.isoformat(), "source": self.source}, sort_keys=True)
+        return hashlib.sha256(canon.encode("utf-8")).hexdigest()[:16]
+
+
+def metric_by_name(name: str) -> Optional[Metric]:
+    return next((m for m in METRICS if m.name == name), None)
+
+
+def make_query(metric: str = "bp", by: Optional[List[str]] = None, start: Optional[date] = None,
+               end: Optional[date] = None, source: str = "rollups") -> CohortQuery:
+    """Validated, normalized query (``ValueError`` on bad input)."""
+    if metric_by_name(metric) is None:
+        raise ValueError(f"unknown metric {metric!r} (use one of {', '.join(m.name for m in METRICS)})")
+    dims = []
+    for d in by if by is not None else list(DIMENSIONS):
+        d = d.strip()
+        if d not in DIMENSIONS:
+            raise ValueError(f"unknown dimension {d!r} (use {', '.join(DIMENSIONS)})")
+        if d not in dims:
+            dims.append(d)
+    if source not in SOURCES:
+        raise ValueError(f"unknown source {source!r} (use {', '.join(SOURCES)})")
+    end = end or datetime.utcnow().date()
+    start = start or end - timedelta(days=settings.COHORT_DEFAULT_DAYS - 1)
+    if start > end:
+        raise ValueError("from must not be after to")
+    # Canonical dimension order, so "sex,age_band" and "age_band,sex" share a cache entry
+    return CohortQuery(metric, tuple(d for d in DIMENSIONS if d in dims), start, end, source)
+
+
+# ---- mergeable partial aggregate ----
+
+class CohortAggregate:
+    """Per-cohort user/reading counts, flag counts and field n/sum/sumsq.
+
+    Everything is a sum, so ``merge`` of partials over disjoint user ranges
+    equals the aggregate over their union. ``users`` adds up because a user
+    belongs to exactly one cohort (one profile per user).
+    """
+
+    def __init__(self, metric: Metric) -> None:
+        self.metric = metric
+        self.groups: Dict[Key, List[float]] = {}
+
+    def add(self, key: Key, values: List[float]) -> None:
+        acc = self.groups.get(key)
+        if acc is None:
+            self.groups[key] = [float(v or 0) for v in values]
+        else:
+            for i, v in enumerate(values):
+                acc[i] += float(v or 0)
+
+    def merge(self, other: "CohortAggregate") -> "CohortAggregate":
+        for key, values in other.groups.items():
+            self.add(key, values)
+        return self
+
+    def cohorts(self, by: Tuple[str, ...]) -> List[Dict[str, Any]]:
+        labels, fields = self.metric.labels, self.metric.fields
+        out = []
+        for key in sorted(self.groups):
+            acc = self.groups[key]
+            n_users, readings = int(acc[0]), int(acc[1])
+            flags = {label: int(acc[2 + i]) for i, label in enumerate(labels)}
+            flagged = sum(flags.values())
+            stats: Dict[str, Dict[str, Optional[float]]] = {}
+            base = 2 + len(labels)
+            for i, f in enumerate(fields):
+                n, s, sq = acc[base + 3 * i: base + 3 * i + 3]
+                mean = s / n if n else None
+                var = (sq - s * s / n) / (n - 1) if n > 1 else None
+                stats[f] = {"n": int(n), "mean": mean, "stddev": max(var, 0.0) ** 0.5 if var is not None else None}
+            out.append({
+                **dict(zip(by, key, strict=True)),
+                "users": n_users,
+                "readings": readings,
+                "flags": flags,
+                "shares": {label: (c / flagged if flagged else 0.0) for label, c in flags.items()},
+                "fields": stats,
+            })
+        return out
+
+
+# ---- SQL ----
+
+def _dimension_exprs(by: Tuple[str, ...]) -> List[Any]:
+    exprs = {
+        "age_band": case(
+            (profiles.c.age.is_(None), UNKNOWN),
+            *((profiles.c.age >= lo, label) for label, lo in reversed(AGE_BANDS)),
+            else_=UNKNOWN,
+        ),
+        "sex": func.coalesce(func.lower(profiles.c.sex), UNKNOWN),
+        "activity_level": func.coalesce(func.lower(profiles.c.activity_level), UNKNOWN),
+    }
+    return [exprs[d].label(d) for d in by]
+
+
+def _user_range(col: Any, lo: Optional[str], hi: Optional[str]) -> List[Any]:
+    cond = []
+    if lo is not None:
+        cond.append(col > lo)
+    if hi is not None:
+        cond.append(col <= hi)
+    return cond
+
+
+def chunk_statement(q: CohortQuery, lo: Optional[str], hi: Optional[str]) -> Any:
+    """GROUP BY statement for users in ``(lo, hi]``; columns match ``CohortAggregate``."""
+    metric = metric_by_name(q.metric)
+    dims = _dimension_exprs(q.by)
+    if q.source == "rollups":
+        src = rollups
+        user_col = src.c.user_id
+        aggs = [func.count(func.distinct(user_col)), func.sum(src.c.readings)]
+        aggs += [func.sum(src.c[flag_count_column(metric.name, label)]) for label in metric.labels]
+        for f in metric.fields:
+            aggs += [func.sum(src.c[f"{f}_n"]), func.sum(src.c[f"{f}_sum"]), func.sum(src.c[f"{f}_sumsq"])]
+        where = [src.c.day >= q.start, src.c.day <= q.end]
+    else:
+        src = VitalRecord.__table__
+        user_col = src.c.user_id
+        flag_col = src.c[f"{metric.name}_flag"]
+        aggs = [func.count(func.distinct(user_col)), func.count()]
+        aggs += [func.sum(case((flag_col == label, 1), else_=0)) for label in metric.labels]
+        for f in metric.fields:
+            c = src.c[f]
+            aggs += [func.count(c), func.sum(c), func.sum(c * c)]
+        start = datetime(q.start.year, q.start.month, q.start.day)
+        where = [src.c.created_at >= start, src.c.created_at < start + timedelta(days=(q.end - q.start).days + 1)]
+    stmt = (
+        select(*(dims or [literal(UNKNOWN)]), *aggs)
+        .select_from(src.outerjoin(profiles, profiles.c.user_id == user_col))
+        .where(and_(*where, *_user_range(user_col, lo, hi)))
+    )
+    return stmt.group_by(*dims) if dims else stmt
+
+
+def user_ranges(db: Session, chunk: int) -> Iterator[Tuple[Optional[str], Optional[str]]]:
+    """``(lo, hi]`` user-id ranges of ``chunk`` users each; the last one is open-ended."""
+    lo: Optional[str] = None
+    while True:
+        query = select(users.c.id)
+        if lo is not None:
+            query = query.where(users.c.id > lo)
+        hi = db.execute(query.order_by(users.c.id).offset(chunk - 1).limit(1)).scalar()
+        yield lo, hi
+        if hi is None:
+            return
+        lo = hi
+
+
+def aggregate_range(q: CohortQuery, lo: Optional[str], hi: Optional[str],
+                    session_factory: Callable[[], Session] = SessionLocal) -> CohortAggregate:
+    """Partial aggregate for users in ``(lo, hi]`` (own session; safe to run in a thread)."""
+    t0 = time.perf_counter()
+    agg = CohortAggregate(metric_by_name(q.metric))
+    db = session_factory()
+    try:
+        for row in db.execute(chunk_statement(q, lo, hi)):
+            width = len(q.by) or 1
+            agg.add(tuple(row[:len(q.by)]), list(row[width:]))
+    finally:
+        db.close()
+    chunk_seconds.observe(time.perf_counter() - t0, q.source)
+    return agg
+
+
+# ---- driver + cache ----
+
+class CohortEngine:
+    def __init__(self, ttl: float = 900.0, max_size: int = 256) -> None:
+        self._cache = TTLCache(max_size=max_size, ttl=ttl)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.chunks = 0
+
+    def compute(self, q: CohortQuery, workers: Optional[int] = None, chunk: Optional[int] = None,
+                session_factory: Callable[[], Session] = SessionLocal) -> Dict[str, Any]:
+        """Aggregate ``q`` over all users (no cache)."""
+        workers = max(1, workers or settings.COHORT_WORKERS)
+        chunk = chunk or settings.COHORT_CHUNK_USERS
+        t0 = time.perf_counter()
+        total = CohortAggregate(metric_by_name(q.metric))
+        n_chunks = 0
+        db = session_factory()
+        try:
+            ranges = user_ranges(db, chunk)
+            if workers == 1:
+                for lo, hi in ranges:
+                    total.merge(aggregate_range(q, lo, hi, session_factory))
+                    n_chunks += 1
+            else:
+                with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="cohort") as pool:
+                    pending: set[Future] = set()
+                    for lo, hi in ranges:
+                        pending.add(pool.submit(aggregate_range, q, lo, hi, session_factory))
+                        if len(pending) >= 2 * workers:
+                            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                            for fut in done:
+                                total.merge(fut.result())
+                                n_chunks += 1
+                    for fut in pending:
+                        total.merge(fut.result())
+                        n_chunks += 1
+        finally:
+            db.close()
+        with self._lock:
+            self.chunks += n_chunks
+        return {
+            "fingerprint": q.fingerprint(),
+            "metric": q.metric,
+            "by": list(q.by),
+            "start": q.start.isoformat(),
+            "end": q.end.isoformat(),
+            "source": q.source,
+            "computed_at": datetime.utcnow().isoformat(),
+            "seconds": time.perf_counter() - t0,
+            "chunks": n_chunks,
+            "cohorts": total.cohorts(q.by),
+        }
+
+    def get(self, q: CohortQuery, refresh: bool = False, **kw: Any) -> Tuple[Dict[str, Any], bool]:
+        """Cached result for ``q`` (computing it on a miss); second item is True on a hit."""
+        key = q.fingerprint()
+        if not refresh:
+            cached = self._cache.get(key)
+            if cached is not None:
+                with self._lock:
+                    self.hits += 1
+                return cached, True
+        with self._lock:
+            self.misses += 1
+        result = self.compute(q, **kw)
+        self._cache.set(key, result)
+        return result, False
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            out = {"hits": self.hits, "misses": self.misses, "chunks": self.chunks}
+        out.update({k: v for k, v in self._cache.stats().items() if k in ("size", "max_size", "ttl_sec")})
+        return out
+
+
+cohort_engine = CohortEngine(ttl=settings.COHORT_CACHE_TTL_SEC, max_size=settings.COHORT_CACHE_MAX)
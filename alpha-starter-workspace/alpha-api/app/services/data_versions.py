@@ -0,0 +1,113 @@
+"""Per-user collection versions for conditional GETs (ETag / If-None-Match).
+
+Every write to a user's vitals, symptoms, goals, reminders or profile bumps
+``data_versions(user_id, collection)`` in the same transaction (``bump``).
+The list endpoints depend on ``conditional(collection)``, which reads that
+one row by primary key *before* the list query runs and:
+
+- answers ``304 Not Modified`` when the request's ``If-None-Match`` holds
+  the current ETag, skipping the query and serialization entirely;
+- otherwise sets ``ETag`` on the response.
+
+The ETag combines the version with a hash of the user and the query string,
+so each page/filter of a collection has its own tag. Reading the version
+first means a concurrent write can at worst cause one extra refetch, never
+a stale 304.
+"""
+from __future__ import annotations
+
+import hashlib
+from datetime import datetime
+from typing import Callable, Optional, Tuple
+
+from fastapi import Depends, HTTPException, Request, Response
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from ..db import get_db
+from .. import models
+from ..models_versions import DataVersion
+from ..security import get_current_user
+from . import metrics
+
+
+COLLECTIONS = ("vitals", "symptoms", "goals", "reminders", "profile")
+ETAG_HEADER = "ETag"
+
+versions = DataVersion.__table__
+
+conditional_requests = metrics.counter(
+    "alpha_conditional_get_total", "Conditional GETs on per-user collections by collection and result.",
+    ("collection", "result"),
+)
+
+
+def bump(db: Session, user_id: str, *collections: str) -> None:
+    """Increment the given collections' versions for ``user_id``. Does not commit."""
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as upsert_insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert as upsert_insert
+    now = datetime.utcnow()
+    stmt = upsert_insert(versions)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["user_id", "collection"],
+        set_={"version": versions.c.version + 1, "updated_at": stmt.excluded.updated_at},
+    )
+    db.execute(stmt, [{"user_id": user_id, "collection": c, "version": 1, "updated_at": now} for c in collections])
+
+
+def current(db: Session, user_id: str, collection: str) -> int:
+    v = db.execute(
+        select(versions.c.version).where(versions.c.user_id == user_id, versions.c.collection == collection)
+    ).scalar_one_or_none()
+    return v or 0
+
+
+def current_many(db: Session, user_id: str, *collections: str) -> Tuple[int, ...]:
+    """``current`` for several collections with one query, in argument order."""
+    found = dict(db.execute(
+        select(versions.c.collection, versions.c.version)
+        .where(versions.c.user_id == user_id, versions.c.collection.in_(collections))
+    ).all())
+    return tuple(found.get(c) or 0 for c in collections)
+
+
+def make_etag(user_id: str, collection: str, version: int, query: str) -> str:
+    scope = hashlib.blake2s(f"{user_id}?{query}".encode("utf-8"), digest_size=6).hexdigest()
+    return f'W/"{collection}.{version}.{scope}"'
+
+
+def matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of ``etag`` against an If-None-Match header value."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    bare = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == bare:
+            return True
+    return False
+
+
+def conditional(collection: str) -> Callable[..., None]:
+    """Dependency for a per-user collection GET (see module docstring)."""
+    def dependency(
+        request: Request,
+        response: Response,
+        db: Session = Depends(get_db),
+        user: models.User = Depends(get_current_user),
+    ) -> None:
+        etag = make_etag(user.id, collection, current(db, user.id, collection), request.url.query)
+        headers = {ETAG_HEADER: etag, "Cache-Control": "private, no-cache"}
+        if matches(request.headers.get("if-none-match"), etag):
+            conditional_requests.inc(collection, "not_modified")
+            # Starlette sends 304 exceptions without a body
+            raise HTTPException(status_code=304, headers=headers)
+        conditional_requests.inc(collection, "modified")
+        response.headers.update(headers)
+    return dependency
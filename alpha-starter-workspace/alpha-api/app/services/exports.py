@@ -0,0 +1,169 @@
+"""Streaming raw-data exports of a user's vitals and symptoms.
+
+``stream`` returns a generator of byte chunks for ``StreamingResponse``:
+rows come from one Core ``SELECT`` fetched ``STREAM_BATCH`` at a time
+(``yield_per``, oldest first) and each batch is encoded and yielded before
+the next one is read. Memory is bounded by one batch whatever the range:
+
+- ``csv``: header line, then ``csv.writer`` rows (ISO timestamps, empty
+  cells for NULL);
+- ``ndjson``: one JSON object per line (``responses.dumps_lines``);
+- ``parquet``: one row group per batch, zstd-compressed, written through a
+  sink that hands over the bytes produced so far. Needs ``pyarrow``
+  (``parquet_available``).
+
+The generator opens its own session, since it runs after the endpoint has
+returned.
+"""
+from __future__ import annotations
+
+import csv
+import io
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from ..db import SessionLocal
+from ..models_symptoms import SymptomRecord
+from ..models_vitals import VITAL_FIELDS, VitalRecord
+from ..responses import dumps_lines
+from .vital_flags import METRICS
+
+try:
+    import pyarrow as pa  # type: ignore
+    import pyarrow.parquet as pq  # type: ignore
+except Exception:
+    pa = None  # type: ignore
+    pq = None  # type: ignore
+
+
+STREAM_BATCH = 5000
+FORMATS = ("csv", "ndjson", "parquet")
+MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+# name -> (model column, arrow type name); exported in this order
+FLAG_COLUMNS = tuple(f"{m.name}_flag" for m in METRICS)
+DATASETS: Dict[str, List[Tuple[str, Any, str]]] = {
+    "vitals": [("id", VitalRecord.id, "string"), ("created_at", VitalRecord.created_at, "timestamp")]
+    + [(f, getattr(VitalRecord, f), "float64") for f in VITAL_FIELDS]
+    + [(f, getattr(VitalRecord, f), "string") for f in FLAG_COLUMNS]
+    + [("anomaly_score", VitalRecord.anomaly_score, "float64"),
+       ("anomalies", VitalRecord.anomaly_metrics, "string")],
+    "symptoms": [("id", SymptomRecord.id, "string"), ("created_at", SymptomRecord.created_at, "timestamp"),
+                 ("severity", SymptomRecord.severity, "string"),
+                 ("description", SymptomRecord.description, "string")],
+}
+_MODELS = {"vitals": VitalRecord, "symptoms": SymptomRecord}
+
+
+def parquet_available() -> bool:
+    return pq is not None
+
+
+def keys(dataset: str) -> List[str]:
+    return [name for name, _, _ in DATASETS[dataset]]
+
+
+def batches(db: Session, dataset: str, user_id: str, start: Optional[datetime] = None,
+            end: Optional[datetime] = None) -> Iterator[List[Tuple[Any, ...]]]:
+    """Rows of ``dataset`` in ``[start, end)`` oldest first, ``STREAM_BATCH`` at a time."""
+    model = _MODELS[dataset]
+    query = select(*[col for _, col, _ in DATASETS[dataset]]).where(model.user_id == user_id)
+    if start is not None:
+        query = query.where(model.created_at >= start)
+    if end is not None:
+        query = query.where(model.created_at < end)
+    result = db.connection().execute(
+        query.order_by(model.created_at, model.id).execution_options(yield_per=STREAM_BATCH)
+    )
+    for partition in result.partitions():
+        yield [tuple(r) for r in partition]
+
+
+# ---- encoders: (keys, batches) -> byte chunks ----
+
+def csv_chunks(names: Sequence[str], rows: Iterator[List[Tuple[Any, ...]]]) -> Iterator[bytes]:
+    buf = io.StringIO()
+    writer = csv.writer(buf, lineterminator="\n")
+    writer.writerow(names)
+    ts = names.index("created_at")
+    for batch in rows:
+        writer.writerows(row[:ts] + (row[ts].isoformat(),) + row[ts + 1:] for row in batch)
+        yield buf.getvalue().encode("utf-8")
+        buf.seek(0)
+        buf.truncate()
+    if buf.tell():
+        yield buf.getvalue().encode("utf-8")
+
+
+def ndjson_chunks(names: Sequence[str], rows: Iterator[List[Tuple[Any, ...]]]) -> Iterator[bytes]:
+    for batch in rows:
+        yield dumps_lines(dict(zip(names, row, strict=True)) for row in batch)
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that collects bytes until ``take`` hands them out."""
+
+    def __init__(self) -> None:
+        self._buf = bytearray()
+        self._pos = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b: Any) -> int:
+        self._buf += b
+        self._pos += len(b)
+        return len(b)
+
+    def tell(self) -> int:
+        return self._pos
+
+    def take(self) -> bytes:
+        out = bytes(self._buf)
+        self._buf.clear()
+        return out
+
+
+def _arrow_schema(dataset: str) -> Any:
+    types = {"string": pa.string(), "float64": pa.float64(), "timestamp": pa.timestamp("us")}
+    return pa.schema([(name, types[kind]) for name, _, kind in DATASETS[dataset]])
+
+
+def parquet_chunks(dataset: str, rows: Iterator[List[Tuple[Any, ...]]]) -> Iterator[bytes]:
+    schema = _arrow_schema(dataset)
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema, compression="zstd")
+    try:
+        for batch in rows:
+            columns = list(zip(*batch, strict=True))
+            writer.write_table(pa.Table.from_arrays(
+                [pa.array(col, type=field.type) for col, field in zip(columns, schema, strict=True)], schema=schema))
+            chunk = sink.take()
+            if chunk:
+                yield chunk
+    finally:
+        writer.close()
+    yield sink.take()
+
+
+def stream(dataset: str, fmt: str, user_id: str, start: Optional[datetime] = None,
+           end: Optional[datetime] = None, session_factory: Callable[[], Session] = SessionLocal) -> Iterator[bytes]:
+    """Encoded export of ``dataset`` for ``user_id`` as byte chunks."""
+    db = session_factory()
+    try:
+        rows = batches(db, dataset, user_id, start, end)
+        if fmt == "csv":
+            yield from csv_chunks(keys(dataset), rows)
+        elif fmt == "ndjson":
+            yield from ndjson_chunks(keys(dataset), rows)
+        else:
+            yield from parquet_chunks(dataset, rows)
+    finally:
+        db.close()
@@ -0,0 +1,261 @@
+"""Two-tier cache of LLM responses (symptom analysis, medication decoding).
+
+Keys are a SHA-256 of the request *kind*, the prompt version, the model
+and the normalized input (``normalize``: NFKC, case-folded, whitespace
+collapsed, trailing punctuation dropped), so "Ibuprofen " and "ibuprofen"
+share an entry and a prompt or model change never serves old answers. No
+user id is part of the key: a medication decode without ``user_context`` is
+shared by every user, and one with a context is only reused for the same
+context.
+
+- Tier 1: in-process LRU (``LLM_CACHE_MEMORY_MAX`` entries, per worker).
+- Tier 2 (``LLM_CACHE_BACKEND``): ``db`` stores entries in
+  ``llm_cache_entries`` (capped at ``LLM_CACHE_MAX_ROWS``, oldest pruned),
+  ``redis`` uses ``REDIS_URL`` (keys ``alpha:llm:{kind}:{key}``, cap with
+  Redis ``maxmemory``), ``memory`` keeps tier 1 only. A tier-2 hit is
+  copied into tier 1.
+
+Both tiers expire entries after ``LLM_CACHE_TTL_SEC``. Only real model
+answers are stored; heuristic fallbacks are not. Tier-2 errors are
+swallowed: the cache never fails a request. ``purge`` clears both tiers
+(``DELETE /admin/llm-cache``); other workers' tier 1 empties within the
+TTL or on restart.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+import threading
+import unicodedata
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Optional
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..db import SessionLocal
+from ..models_llm import LlmCacheEntry
+from .redis_store import RedisStore, redis_available
+from .ttl_cache import TTLCache
+
+
+PRUNE_EVERY = 256  # db-tier stores between prune passes
+
+entries = LlmCacheEntry.__table__
+
+_SPACE = re.compile(r"\s+")
+
+
+def normalize(text: Optional[str]) -> str:
+    text = unicodedata.normalize("NFKC", text or "").casefold()
+    return _SPACE.sub(" ", text).strip().rstrip(".!?;,").strip()
+
+
+def cache_key(kind: str, prompt_version: str, model: str, **inputs: Any) -> str:
+    canon = json.dumps({"kind": kind, "prompt": prompt_version, "model": model, "input": inputs},
+                       sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canon.encode("utf-8")).hexdigest()
+
+
+class _DbBackend:
+    def __init__(self, ttl: float, max_rows: int, session_factory: Callable[[], Session] = SessionLocal) -> None:
+        self.ttl = ttl
+        self.max_rows = max_rows
+        self.session_factory = session_factory
+        self._stores = 0
+        self.pruned = 0
+
+    def get(self, key: str, kind: str) -> Optional[Dict[str, Any]]:
+        db = self.session_factory()
+        try:
+            row = db.execute(select(entries.c.value, entries.c.expires_at).where(entries.c.key == key)).first()
+            if row is None or row.expires_at <= datetime.utcnow():
+                return None
+            db.execute(update(entries).where(entries.c.key == key).values(hits=entries.c.hits + 1))
+            db.commit()
+            return json.loads(row.value)
+        except Exception:
+            return None
+        finally:
+            db.close()
+
+    def set(self, key: str, kind: str, value: Dict[str, Any]) -> None:
+        db = self.session_factory()
+        try:
+            if db.get_bind().dialect.name == "postgresql":
+                from sqlalchemy.dialects.postgresql import insert as upsert_insert
+            else:
+                from sqlalchemy.dialects.sqlite import insert as upsert_insert
+            now = datetime.utcnow()
+            stmt = upsert_insert(entries).values(key=key, kind=kind, value=json.dumps(value), hits=0, created_at=now,
+                                                 expires_at=now + timedelta(seconds=self.ttl))
+            db.execute(stmt.on_conflict_do_update(
+                index_elements=["key"],
+                set_={c: stmt.excluded[c] for c in ("value", "created_at", "expires_at")},
+            ))
+            self._stores += 1
+            if self._stores % PRUNE_EVERY == 0:
+                self._prune(db, now)
+            db.commit()
+        except Exception:
+            db.rollback()
+        finally:
+            db.close()
+
+    def _prune(self, db: Session, now: datetime) -> None:
+        removed = db.execute(delete(entries).where(entries.c.expires_at <= now)).rowcount or 0
+        extra = db.execute(select(func.count()).select_from(entries)).scalar() - self.max_rows
+        if extra > 0:
+            oldest = select(entries.c.key).order_by(entries.c.created_at).limit(extra).scalar_subquery()
+            removed += db.execute(delete(entries).where(entries.c.key.in_(oldest))).rowcount or 0
+        self.pruned += removed
+
+    def purge(self, kind: Optional[str] = None) -> int:
+        db = self.session_factory()
+        try:
+            stmt = delete(entries)
+            if kind:
+                stmt = stmt.where(entries.c.kind == kind)
+            n = db.execute(stmt).rowcount or 0
+            db.commit()
+            return n
+        finally:
+            db.close()
+
+    def stats(self) -> Dict[str, Any]:
+        out: Dict[str, Any] = {"max_rows": self.max_rows, "pruned": self.pruned}
+        db = self.session_factory()
+        try:
+            out["rows"] = db.execute(select(func.count()).select_from(entries)).scalar()
+        except Exception:
+            pass
+        finally:
+            db.close()
+        return out
+
+
+class _RedisBackend(RedisStore):
+    """Keys are ``alpha:llm:{kind}:{key}``, so a purge can SCAN one kind."""
+
+    def __init__(self, url: str, ttl: float) -> None:
+        super().__init__(url, ttl, prefix="alpha:llm:")
+
+    def get(self, key: str, kind: str) -> Optional[Dict[str, Any]]:
+        return super().get(f"{kind}:{key}")
+
+    def set(self, key: str, kind: str, value: Dict[str, Any]) -> None:
+        super().set(f"{kind}:{key}", value)
+
+    def purge(self, kind: Optional[str] = None) -> int:
+        return super().purge(f"{kind}:*" if kind else "*")
+
+    def stats(self) -> Dict[str, Any]:
+        # LlmCache counts tier-2 hits and misses itself
+        return {}
+
+
+class LlmCache:
+    def __init__(self, enabled: bool = True, backend: str = "db", ttl: float = 604800.0,
+                 memory_max: int = 2048, max_rows: int = 100000, redis_url: Optional[str] = None) -> None:
+        self.enabled = enabled and ttl > 0
+        self.ttl = ttl
+        self._memory = TTLCache(max_size=memory_max, ttl=ttl)
+        self.backend = "memory"
+        self._store: Any = None
+        if backend == "db":
+            self.backend = "db"
+            self._store = _DbBackend(ttl, max_rows)
+        elif backend == "redis" and redis_available() and redis_url:
+            self.backend = "redis"
+            self._store = _RedisBackend(redis_url, ttl)
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.store_hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.purges = 0
+
+    def has_store(self) -> bool:
+        return self.enabled and self._store is not None
+
+    def get_memory(self, key: str) -> Optional[Dict[str, Any]]:
+        """Tier-1 lookup only; a miss is not counted (``get`` follows)."""
+        if not self.enabled:
+            return None
+        value = self._memory.get(key)
+        if value is None:
+            return None
+        with self._lock:
+            self.memory_hits += 1
+        return json.loads(value)
+
+    def get(self, key: str, kind: str) -> Optional[Dict[str, Any]]:
+        if not self.enabled:
+            return None
+        value = self._memory.get(key)
+        if value is not None:
+            with self._lock:
+                self.memory_hits += 1
+            return json.loads(value)
+        if self._store is not None:
+            found = self._store.get(key, kind)
+            if found is not None:
+                self._memory.set(key, json.dumps(found))
+                with self._lock:
+                    self.store_hits += 1
+                return found
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, key: str, kind: str, value: Dict[str, Any]) -> None:
+        if not self.enabled:
+            return
+        # Stored as JSON text so callers can never mutate a cached answer
+        self._memory.set(key, json.dumps(value))
+        if self._store is not None:
+            self._store.set(key, kind, value)
+        with self._lock:
+            self.stores += 1
+
+    def purge(self, kind: Optional[str] = None) -> Dict[str, int]:
+        """Drop cached responses (all, or one kind) from both tiers."""
+        memory = len(self._memory)
+        # Tier 1 keys are hashes, so a per-kind purge clears all of it
+        self._memory.clear()
+        stored = self._store.purge(kind) if self._store is not None else 0
+        with self._lock:
+            self.purges += 1
+        return {"memory": memory, "store": stored}
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.memory_hits + self.store_hits + self.misses
+            out: Dict[str, Any] = {
+                "enabled": self.enabled,
+                "backend": self.backend,
+                "memory_hits": self.memory_hits,
+                "store_hits": self.store_hits,
+                "misses": self.misses,
+                "hit_rate": ((self.memory_hits + self.store_hits) / lookups) if lookups else 0.0,
+                "stores": self.stores,
+                "purges": self.purges,
+            }
+        memory = self._memory.stats()
+        out.update(memory_size=memory["size"], memory_max=memory["max_size"], ttl_sec=memory["ttl_sec"],
+                   memory_evictions=memory["evictions"])
+        if self._store is not None:
+            out.update(self._store.stats())
+        return out
+
+
+llm_cache = LlmCache(
+    enabled=settings.LLM_CACHE_ENABLED,
+    backend=settings.LLM_CACHE_BACKEND,
+    ttl=settings.LLM_CACHE_TTL_SEC,
+    memory_max=settings.LLM_CACHE_MEMORY_MAX,
+    max_rows=settings.LLM_CACHE_MAX_ROWS,
+    redis_url=settings.REDIS_URL,
+)
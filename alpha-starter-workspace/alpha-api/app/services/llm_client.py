@@ -1,126 +1,312 @@
+"""Async client for the chat-completions LLM behind /symptoms/analyze and /meds/decoder.
+
+Requests go to ``{LLM_BASE_URL}/chat/completions`` (OpenAI-compatible)
+through one ``httpx.AsyncClient`` per event loop, i.e. one per worker
+process under uvicorn, created at startup and closed at shutdown, so
+connections are pooled and kept alive (``LLM_MAX_CONNECTIONS``). Each call:
+
+- fails fast while the circuit breaker is open (``LLM_BREAKER_FAILURES``
+  errors in a row open it for ``LLM_BREAKER_RESET_SEC``);
+- waits at most ``LLM_QUEUE_TIMEOUT_SEC`` for one of ``LLM_MAX_CONCURRENCY``
+  slots, so a slow upstream cannot pile up unbounded work;
+- has a total deadline of ``LLM_TIMEOUT_SEC`` (connect ``LLM_CONNECT_TIMEOUT_SEC``).
+
+Any of those, or an upstream error, returns the heuristic fallback answer
+instead. Outcomes are counted in ``alpha_llm_calls_total{kind,result}``.
+Answers are cached by ``services.llm_cache``.
+
+Cache misses are single-flight (``LLM_SINGLE_FLIGHT``): while a call for a
+cache key is in flight, identical requests (same normalized input) await
+that call instead of issuing their own, and each gets a copy of its answer.
+Waiters hold no concurrency slot, and the call is shielded, so a caller
+that disconnects does not cancel it for the others. Misses are counted in
+``alpha_llm_flights_total{kind,role}`` as ``issued`` or ``coalesced``.
+"""
+import asyncio
+import copy
+import json
 import os
-from typing import Any, Dict, List, Optional
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import httpx
+from fastapi.concurrency import run_in_threadpool
+
+from ..config import settings
+from . import metrics
+from .circuit_breaker import CircuitBreaker
+from .llm_cache import cache_key, llm_cache, normalize
+
+
+# Bump when a prompt changes so cached answers from the old one are not served
+MEDS_PROMPT_VERSION = "meds-1"
+SYMPTOMS_PROMPT_VERSION = "symptoms-1"
+
+llm_calls = metrics.counter(
+    "alpha_llm_calls_total", "LLM calls by kind and result (ok|error|timeout|circuit_open|busy|bad_json).",
+    ("kind", "result"),
+)
+llm_seconds = metrics.histogram("alpha_llm_call_seconds", "Upstream LLM call time (calls that were sent).", ("kind",))
+llm_flights = metrics.counter(
+    "alpha_llm_flights_total", "LLM cache misses by kind, issuing a call or joining one in flight (issued|coalesced).",
+    ("kind", "role"),
+)
+
+MEDS_DISCLAIMER = (
+    "This is general, non-clinical information for awareness only. "
+    "No diagnosis or personalized medical advice. Avoid dosage guidance beyond "
+    "official labeling. Consult a qualified healthcare professional for any decisions."
+)
+SYMPTOMS_DISCLAIMER = (
+    "General, non-clinical guidance only. Not a diagnosis. "
+    "If in doubt or symptoms are severe, consult a qualified professional."
+)
 
-try:
-    import openai  # type: ignore
-except Exception:
-    openai = None  # type: ignore
+
+def _meds_fallback(name: str) -> Dict[str, Any]:
+    return {
+        "purpose": f"General information about {name} in a non-clinical tone.",
+        "common_side_effects": ["nausea", "headache", "drowsiness"],
+        "interactions": ["may interact with alcohol", "check other prescriptions"],
+        "usage": "Follow the product label and pharmacist guidance. Do not exceed labeled instructions.",
+        "disclaimer": MEDS_DISCLAIMER,
+    }
+
+
+def _symptoms_fallback(description: str, severity: Optional[str]) -> Dict[str, Any]:
+    tips: List[str] = []
+    causes: List[str] = []
+    implications: List[str] = []
+    d = description.lower()
+    if "fever" in d:
+        tips.append("Hydrate and rest; monitor temperature.")
+        causes.append("Possible viral or bacterial infection")
+        implications.append("Watch for dehydration and prolonged high temperature")
+    if "headache" in d:
+        tips.append("Consider rest, hydration, and a calm environment.")
+        causes.append("Tension or migraine; dehydration")
+        implications.append("If sudden severe headache, seek care")
+    if "chest pain" in d or "shortness of breath" in d:
+        implications.append("Could be urgent; consider immediate care if severe or new")
+        causes.append("Muscle strain, respiratory issues; cardiac cause cannot be excluded")
+    if (severity or "").lower() == "severe":
+        tips.append("If symptoms worsen or persist, seek medical care.")
+    return {"advice": tips or ["Monitor symptoms and seek care if they worsen."], "risk_flags": [], "causes": causes, "implications": implications, "disclaimer": SYMPTOMS_DISCLAIMER}
+
+
+class _Upstream:
+    """Pooled HTTP client, concurrency slots and in-flight calls, bound to one event loop."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, transport: Optional[httpx.AsyncBaseTransport]) -> None:
+        self.loop = loop
+        self.http = httpx.AsyncClient(
+            base_url=settings.LLM_BASE_URL,
+            limits=httpx.Limits(max_connections=settings.LLM_MAX_CONNECTIONS,
+                                max_keepalive_connections=settings.LLM_MAX_CONNECTIONS),
+            timeout=httpx.Timeout(settings.LLM_TIMEOUT_SEC, connect=settings.LLM_CONNECT_TIMEOUT_SEC),
+            transport=transport,
+        )
+        self.slots = asyncio.Semaphore(settings.LLM_MAX_CONCURRENCY)
+        self.flights: Dict[str, "asyncio.Task[Optional[Dict[str, Any]]]"] = {}
 
 
 class LlmClient:
     def __init__(self) -> None:
         self.api_key = os.getenv("OPENAI_API_KEY")
+        self.breaker = CircuitBreaker(settings.LLM_BREAKER_FAILURES, settings.LLM_BREAKER_RESET_SEC)
+        self.transport: Optional[httpx.AsyncBaseTransport] = None  # tests inject e.g. httpx.MockTransport
+        self._upstream: Optional[_Upstream] = None
+        self.in_flight = 0
+        self.issued = 0
+        self.coalesced = 0
 
     def is_configured(self) -> bool:
         return bool(self.api_key)
 
-    def _ensure_client(self):
-        if not (self.api_key and openai):
+    def _get_upstream(self) -> _Upstream:
+        loop = asyncio.get_running_loop()
+        up = self._upstream
+        if up is None or up.loop is not loop:
+            # A new loop (tests run one per request) cannot reuse the old loop's connections
+            up = self._upstream = _Upstream(loop, self.transport)
+        return up
+
+    def start(self) -> None:
+        """Create the pooled client on the running loop (app startup)."""
+        self._get_upstream()
+
+    async def aclose(self) -> None:
+        up, self._upstream = self._upstream, None
+        if up is not None and up.loop is asyncio.get_running_loop():
+            await up.http.aclose()
+
+    async def _complete(self, kind: str, system: str, user: str) -> Optional[Dict[str, Any]]:
+        """Parsed JSON answer from the model, or None (caller falls back)."""
+        if self.breaker.fail_fast():
+            llm_calls.inc(kind, "circuit_open")
             return None
+        up = self._get_upstream()
         try:
-            client = openai.OpenAI(api_key=self.api_key)
-            return client
-        except Exception:
+            await asyncio.wait_for(up.slots.acquire(), settings.LLM_QUEUE_TIMEOUT_SEC)
+        except asyncio.TimeoutError:
+            llm_calls.inc(kind, "busy")
             return None
+        try:
+            if not self.breaker.allow():
+                llm_calls.inc(kind, "circuit_open")
+                return None
+            self.in_flight += 1
+            t0 = time.perf_counter()
+            try:
+                resp = await asyncio.wait_for(up.http.post(
+                    "/chat/completions",
+                    headers={"Authorization": f"Bearer {self.api_key}"},
+                    json={
+                        "model": settings.LLM_MODEL,
+                        "messages": [{"role": "system", "content": system}, {"role": "user", "content": user}],
+                        "response_format": {"type": "json_object"},
+                        "temperature": 0.2,
+                    },
+                ), settings.LLM_TIMEOUT_SEC)
+                resp.raise_for_status()
+                body = resp.json()
+            except (asyncio.TimeoutError, httpx.TimeoutException):
+                self.breaker.record_failure()
+                llm_calls.inc(kind, "timeout")
+                return None
+            except Exception:
+                self.breaker.record_failure()
+                llm_calls.inc(kind, "error")
+                return None
+            except BaseException:
+                # Cancelled (client went away): no verdict on the upstream,
+                # but a half-open trial slot must not stay claimed forever
+                self.breaker.release_trial()
+                raise
+            finally:
+                self.in_flight -= 1
+                llm_seconds.observe(time.perf_counter() - t0, kind)
+            # The upstream answered; malformed content is not an outage
+            self.breaker.record_success()
+            try:
+                data = json.loads(body["choices"][0]["message"]["content"] or "{}")
+            except Exception:
+                llm_calls.inc(kind, "bad_json")
+                return None
+            if not isinstance(data, dict):
+                llm_calls.inc(kind, "bad_json")
+                return None
+            llm_calls.inc(kind, "ok")
+            return data
+        finally:
+            up.slots.release()
+
+    async def _single_flight(self, kind: str, key: str,
+                             fetch: Callable[[], Awaitable[Optional[Dict[str, Any]]]]) -> Optional[Dict[str, Any]]:
+        """Run ``fetch`` once per key at a time; concurrent callers share its result."""
+        if not settings.LLM_SINGLE_FLIGHT:
+            self.issued += 1
+            llm_flights.inc(kind, "issued")
+            return await fetch()
+        up = self._get_upstream()
+        flight = up.flights.get(key)
+        if flight is None:
+            flight = up.flights[key] = asyncio.ensure_future(fetch())
+
+            def done(task: asyncio.Task, key: str = key) -> None:
+                if up.flights.get(key) is task:
+                    del up.flights[key]
+
+            flight.add_done_callback(done)
+            self.issued += 1
+            llm_flights.inc(kind, "issued")
+        else:
+            self.coalesced += 1
+            llm_flights.inc(kind, "coalesced")
+        data = await asyncio.shield(flight)
+        # Callers may edit their answer; the shared one must stay intact
+        return copy.deepcopy(data) if data is not None else None
 
-    def decodeMedication(self, name: str, user_context: Dict[str, Any] | None = None) -> Dict[str, Any]:
+    # The persistent cache tier does blocking I/O; keep it off the event loop
+    async def _cached(self, key: str, kind: str) -> Optional[Dict[str, Any]]:
+        cached = llm_cache.get_memory(key)
+        if cached is not None:
+            return cached
+        if llm_cache.has_store():
+            return await run_in_threadpool(llm_cache.get, key, kind)
+        return llm_cache.get(key, kind)
+
+    async def _store(self, key: str, kind: str, data: Dict[str, Any]) -> None:
+        if llm_cache.has_store():
+            await run_in_threadpool(llm_cache.set, key, kind, data)
+        else:
+            llm_cache.set(key, kind, data)
+
+    async def decodeMedication(self, name: str, user_context: Dict[str, Any] | None = None) -> Dict[str, Any]:
         # Always return non-clinical, non-diagnostic guidance
-        client = self._ensure_client()
-        disclaimer = (
-            "This is general, non-clinical information for awareness only. "
-            "No diagnosis or personalized medical advice. Avoid dosage guidance beyond "
-            "official labeling. Consult a qualified healthcare professional for any decisions."
-        )
-        if not client:
-            return {
-                "purpose": f"General information about {name} in a non-clinical tone.",
-                "common_side_effects": ["nausea", "headache", "drowsiness"],
-                "interactions": ["may interact with alcohol", "check other prescriptions"],
-                "usage": "Follow the product label and pharmacist guidance. Do not exceed labeled instructions.",
-                "disclaimer": disclaimer,
-            }
+        # No user_context: one entry per medication, shared by all users
+        key = cache_key("meds", MEDS_PROMPT_VERSION, settings.LLM_MODEL, name=normalize(name),
+                        context=json.dumps(user_context, sort_keys=True, default=str) if user_context else None)
+        cached = await self._cached(key, "meds")
+        if cached is not None:
+            return cached
+        if not self.api_key:
+            return _meds_fallback(name)
+        data = await self._single_flight("meds", key, lambda: self._fetch_meds(key, name, user_context))
+        return data if data is not None else _meds_fallback(name)
 
+    async def _fetch_meds(self, key: str, name: str, user_context: Dict[str, Any] | None) -> Optional[Dict[str, Any]]:
         prompt = (
             "You are a health information assistant. Provide non-clinical, plain-language info about the medication. "
             "Do NOT give dosing advice beyond the official label; avoid diagnosis. Return JSON with keys: purpose, "
             "common_side_effects (array), interactions (array), usage, disclaimer."
         )
-        try:
-            resp = client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": prompt},
-                    {"role": "user", "content": f"Medication: {name}. Context: {user_context or {}}"},
-                ],
-                response_format={"type": "json_object"},
-                temperature=0.2,
-            )
-            text = resp.choices[0].message.content or "{}"
-            import json as _json
-            data = _json.loads(text)
-            data.setdefault("disclaimer", disclaimer)
-            return data
-        except Exception:
-            return {
-                "purpose": f"General information about {name} in a non-clinical tone.",
-                "common_side_effects": ["nausea", "headache", "drowsiness"],
-                "interactions": ["may interact with alcohol", "check other prescriptions"],
-                "usage": "Follow the product label and pharmacist guidance. Do not exceed labeled instructions.",
-                "disclaimer": disclaimer,
-            }
-
-    def analyzeSymptoms(self, description: str, severity: Optional[str] = None) -> Dict[str, Any]:
-        client = self._ensure_client()
-        disclaimer = (
-            "General, non-clinical guidance only. Not a diagnosis. "
-            "If in doubt or symptoms are severe, consult a qualified professional."
-        )
-        if not client:
-            tips: List[str] = []
-            causes: List[str] = []
-            implications: List[str] = []
-            d = description.lower()
-            if "fever" in d:
-                tips.append("Hydrate and rest; monitor temperature.")
-                causes.append("Possible viral or bacterial infection")
-                implications.append("Watch for dehydration and prolonged high temperature")
-            if "headache" in d:
-                tips.append("Consider rest, hydration, and a calm environment.")
-                causes.append("Tension or migraine; dehydration")
-                implications.append("If sudden severe headache, seek care")
-            if "chest pain" in d or "shortness of breath" in d:
-                implications.append("Could be urgent; consider immediate care if severe or new")
-                causes.append("Muscle strain, respiratory issues; cardiac cause cannot be excluded")
-            if (severity or "").lower() == "severe":
-                tips.append("If symptoms worsen or persist, seek medical care.")
-            return {"advice": tips or ["Monitor symptoms and seek care if they worsen."], "risk_flags": [], "causes": causes, "implications": implications, "disclaimer": disclaimer}
-        try:
-            resp = client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": (
-                        "You are a non-clinical symptom assistant. Provide general wellness advice, potential causes and implications, and risk flags. "
-                        "DO NOT diagnose. Avoid clinical instructions. Return JSON with keys: advice (array), causes (array), implications (array), risk_flags (array), disclaimer."
-                    )},
-                    {"role": "user", "content": f"Description: {description}. Severity: {severity or ''}"},
-                ],
-                response_format={"type": "json_object"},
-                temperature=0.2,
-            )
-            text = resp.choices[0].message.content or "{}"
-            import json as _json
-            data = _json.loads(text)
-            data.setdefault("disclaimer", disclaimer)
-            # Normalize shapes
-            data["advice"] = list(data.get("advice") or [])
-            data["risk_flags"] = list(data.get("risk_flags") or [])
-            data["causes"] = list(data.get("causes") or [])
-            data["implications"] = list(data.get("implications") or [])
-            return data
-        except Exception:
-            return {"advice": ["Monitor symptoms and seek care if they worsen."], "risk_flags": [], "causes": [], "implications": [], "disclaimer": disclaimer}
+        data = await self._complete("meds", prompt, f"Medication: {name}. Context: {user_context or {}}")
+        if data is None:
+            return None
+        data.setdefault("disclaimer", MEDS_DISCLAIMER)
+        await self._store(key, "meds", data)
+        return data
 
+    async def analyzeSymptoms(self, description: str, severity: Optional[str] = None) -> Dict[str, Any]:
+        key = cache_key("symptoms", SYMPTOMS_PROMPT_VERSION, settings.LLM_MODEL,
+                        description=normalize(description), severity=normalize(severity))
+        cached = await self._cached(key, "symptoms")
+        if cached is not None:
+            return cached
+        if not self.api_key:
+            return _symptoms_fallback(description, severity)
+        data = await self._single_flight("symptoms", key, lambda: self._fetch_symptoms(key, description, severity))
+        return data if data is not None else _symptoms_fallback(description, severity)
 
-llm_client = LlmClient()
+    async def _fetch_symptoms(self, key: str, description: str, severity: Optional[str]) -> Optional[Dict[str, Any]]:
+        data = await self._complete(
+            "symptoms",
+            "You are a non-clinical symptom assistant. Provide general wellness advice, potential causes and implications, and risk flags. "
+            "DO NOT diagnose. Avoid clinical instructions. Return JSON with keys: advice (array), causes (array), implications (array), risk_flags (array), disclaimer.",
+            f"Description: {description}. Severity: {severity or ''}",
+        )
+        if data is None:
+            return None
+        data.setdefault("disclaimer", SYMPTOMS_DISCLAIMER)
+        # Normalize shapes
+        data["advice"] = list(data.get("advice") or [])
+        data["risk_flags"] = list(data.get("risk_flags") or [])
+        data["causes"] = list(data.get("causes") or [])
+        data["implications"] = list(data.get("implications") or [])
+        await self._store(key, "symptoms", data)
+        return data
 
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "configured": self.is_configured(),
+            "in_flight": self.in_flight,
+            "max_concurrency": settings.LLM_MAX_CONCURRENCY,
+            "flights": len(self._upstream.flights) if self._upstream is not None else 0,
+            "issued": self.issued,
+            "coalesced": self.coalesced,
+            **{f"breaker_{k}": v for k, v in self.breaker.stats().items()},
+        }
 
+
+llm_client = LlmClient()
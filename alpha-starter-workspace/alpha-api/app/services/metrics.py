@@ -0,0 +1,272 @@
+"""Minimal in-process metrics rendered in the Prometheus text exposition format.
+
+No client library or external service is needed: metrics live in module-level
+objects registered on ``registry`` and ``GET /metrics`` renders them.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _fmt(v: float) -> str:
+    if v == float("inf"):
+        return "+Inf"
+    if float(v).is_integer():
+        return str(int(v))
+    return repr(float(v))
+
+
+def _escape(v: Any) -> str:
+    return str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[Any], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values, strict=True)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+    def render(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, help, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, *labels: Any, amount: float = 1.0) -> None:
+        key = tuple(str(v) for v in labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, *labels: Any) -> float:
+        return self._values.get(tuple(str(v) for v in labels), 0.0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_labels(self.labelnames, k)} {_fmt(v)}" for k, v in items]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, *labels: Any, value: float) -> None:
+        key = tuple(str(v) for v in labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def dec(self, *labels: Any, amount: float = 1.0) -> None:
+        self.inc(*labels, amount=-amount)
+
+
+class CallbackGauge(_Metric):
+    """Gauge whose samples are read from ``fn`` at scrape time.
+
+    ``fn`` returns either a number or an iterable of (label values, number).
+    """
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, fn: Callable[[], Any], labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, help, labelnames)
+        self.fn = fn
+
+    def render(self) -> List[str]:
+        try:
+            res = self.fn()
+        except Exception:
+            return []
+        if isinstance(res, (int, float)):
+            return [f"{self.name} {_fmt(res)}"]
+        return [f"{self.name}{_labels(self.labelnames, k)} {_fmt(v)}" for k, v in res]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (),
+                 buckets: Iterable[float] = DEFAULT_BUCKETS) -> None:
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts..., +Inf count, sum]
+        self._values: Dict[LabelValues, List[float]] = {}
+
+    def observe(self, value: float, *labels: Any) -> None:
+        key = tuple(str(v) for v in labels)
+        idx = bisect_left(self.buckets, value)
+        with self._lock:
+            row = self._values.get(key)
+            if row is None:
+                row = self._values[key] = [0.0] * (len(self.buckets) + 2)
+            row[idx] += 1
+            row[-1] += value
+
+    def count(self, *labels: Any) -> int:
+        row = self._values.get(tuple(str(v) for v in labels))
+        return int(sum(row[:-1])) if row else 0
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = [(k, list(v)) for k, v in self._values.items()]
+        out: List[str] = []
+        for key, row in items:
+            cum = 0.0
+            for i, le in enumerate(self.buckets + (float("inf"),)):
+                cum += row[i]
+                le_label = 'le="%s"' % _fmt(le)
+                out.append(f"{self.name}_bucket{_labels(self.labelnames, key, le_label)} {_fmt(cum)}")
+            out.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_fmt(row[-1])}")
+            out.append(f"{self.name}_count{_labels(self.labelnames, key)} {_fmt(cum)}")
+        return out
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> Any:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def get(self, name: str) -> Optional[_Metric]:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for m in self._metrics.values():
+            lines.extend(m.header())
+            lines.extend(m.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+
+def counter(name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+    return registry.register(Counter(name, help, labelnames))
+
+
+def gauge(name: str, help: str, labelnames: Sequence[str] = ()) -> Gauge:
+    return registry.register(Gauge(name, help, labelnames))
+
+
+def histogram(name: str, help: str, labelnames: Sequence[str] = (),
+              buckets: Iterable[float] = DEFAULT_BUCKETS) -> Histogram:
+    return registry.register(Histogram(name, help, labelnames, buckets))
+
+
+def callback_gauge(name: str, help: str, fn: Callable[[], Any], labelnames: Sequence[str] = ()) -> CallbackGauge:
+    return registry.register(CallbackGauge(name, help, fn, labelnames))
+
+
+def stats_gauges(prefix: str, help: str, fn: Callable[[], Dict[str, Any]]) -> CallbackGauge:
+    """Expose the numeric fields of a ``stats()`` dict as one labelled gauge."""
+    def collect():
+        # bools count as numbers here (running=1/0)
+        return [((k,), float(v)) for k, v in fn().items() if isinstance(v, (int, float))]
+    return callback_gauge(prefix, help, collect, labelnames=("field",))
+
+
+def route_template(scope: Dict[str, Any]) -> str:
+    """Return the matched route template (e.g. ``/vitals/{vital_id}``) for labels.
+
+    Depending on the FastAPI version the matched route carries either the
+    full path or the path relative to its router prefix; in the latter case
+    the prefix is recovered from the concrete request path.
+    """
+    route = scope.get("route")
+    tmpl = getattr(route, "path", None)
+    if tmpl is None:
+        return "unmatched"
+    regex = getattr(route, "path_regex", None)
+    path = scope.get("path", "")
+    if regex is None or regex.match(path):
+        return tmpl or "/"
+    cuts = [i for i, ch in enumerate(path) if ch == "/"] + [len(path)]
+    for i in cuts:
+        if i and regex.match(path[i:]):
+            return path[:i] + tmpl
+    return "unmatched"
+
+
+# ---- HTTP ----
+http_requests = counter(
+    "alpha_http_requests_total", "HTTP requests by route, method and status code.",
+    ("route", "method", "status"))
+http_latency = histogram(
+    "alpha_http_request_duration_seconds", "HTTP request latency by route and method.",
+    ("route", "method"))
+http_in_flight = gauge("alpha_http_requests_in_flight", "HTTP requests currently being served.")
+
+# ---- Reminder dispatcher ----
+dispatcher_loop = histogram(
+    "alpha_reminder_dispatch_loop_seconds", "Duration of one reminder dispatcher pass.")
+dispatcher_lag = histogram(
+    "alpha_reminder_dispatch_lag_seconds", "Delay between a reminder's scheduled_at and its dispatch.",
+    buckets=(1, 5, 15, 30, 60, 120, 300, 900, 3600))
+dispatcher_reminders = counter(
+    "alpha_reminder_dispatched_total", "Reminders processed by the dispatcher by outcome.", ("outcome",))
+dispatcher_last_run = gauge(
+    "alpha_reminder_dispatch_last_run_timestamp_seconds", "Unix time of the last completed dispatcher pass.")
+
+# ---- DB pool ----
+db_checkouts = counter("alpha_db_pool_checkouts_total", "Connections checked out of the pool.")
+db_connects = counter("alpha_db_pool_connects_total", "New DBAPI connections opened by the pool.")
+db_hold = histogram(
+    "alpha_db_connection_hold_seconds", "Time a connection stayed checked out of the pool.")
+
+
+def instrument_engine(engine) -> None:
+    """Attach pool event hooks and scrape-time pool gauges to ``engine``."""
+    from sqlalchemy import event
+
+    pool = engine.pool
+
+    @event.listens_for(pool, "connect")
+    def _on_connect(dbapi_conn, record):
+        db_connects.inc()
+
+    @event.listens_for(pool, "checkout")
+    def _on_checkout(dbapi_conn, record, proxy):
+        db_checkouts.inc()
+        record.info["alpha_checkout_at"] = time.perf_counter()
+
+    @event.listens_for(pool, "checkin")
+    def _on_checkin(dbapi_conn, record):
+        t0 = record.info.pop("alpha_checkout_at", None)
+        if t0 is not None:
+            db_hold.observe(time.perf_counter() - t0)
+
+    def _pool_status():
+        out = []
+        for field in ("size", "checkedin", "checkedout", "overflow"):
+            fn = getattr(pool, field, None)
+            if callable(fn):
+                out.append(((field,), float(fn())))
+        return out
+
+    callback_gauge("alpha_db_pool", "SQLAlchemy pool status by field.", _pool_status, ("field",))
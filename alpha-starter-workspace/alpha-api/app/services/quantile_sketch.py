@@ -0,0 +1,189 @@
+"""Mergeable streaming summaries: moments and KLL quantile sketches.
+
+``Moments`` keeps count/mean/M2/min/max and merges with Chan's parallel
+update, so mean and standard deviation are exact in one pass.
+
+``KLLSketch`` (Karnin, Lang, Liberty 2016) keeps a stack of compactors:
+level ``h`` holds items of weight ``2**h``. When the sketch outgrows its
+capacity, the lowest full level is sorted and every other item (random
+offset) moves up a level. Capacities shrink geometrically (factor 2/3) below
+the top level, which holds ``k`` items, so the size is ``O(k)`` no matter
+how many values are fed. The rank error of a quantile is about ``1.7 / k``
+of the count (~1% at k=200). Two sketches merge by concatenating levels and
+compacting, so per-day sketches can be combined into any range later.
+``to_dict``/``from_dict`` give a JSON-able form.
+"""
+from __future__ import annotations
+
+import math
+import random
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+try:
+    import numpy as np  # type: ignore
+except Exception:
+    np = None  # type: ignore
+
+
+_SHRINK = 2.0 / 3.0
+
+
+def _values(values: Any) -> List[float]:
+    if np is not None and isinstance(values, np.ndarray):
+        return values.tolist()
+    return [float(v) for v in values]
+
+
+class Moments:
+    __slots__ = ("n", "mean", "m2", "min", "max")
+
+    def __init__(self) -> None:
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    def update_many(self, values: Any) -> None:
+        if np is not None:
+            x = np.asarray(values, dtype=np.float64)
+            if not len(x):
+                return
+            mean = float(x.mean())
+            other = Moments()
+            other.n, other.mean = len(x), mean
+            other.m2 = float(((x - mean) ** 2).sum())
+            other.min, other.max = float(x.min()), float(x.max())
+            self.merge(other)
+            return
+        for v in values:
+            v = float(v)
+            self.n += 1
+            d = v - self.mean
+            self.mean += d / self.n
+            self.m2 += d * (v - self.mean)
+            self.min = v if self.min is None else min(self.min, v)
+            self.max = v if self.max is None else max(self.max, v)
+
+    def merge(self, other: "Moments") -> None:
+        if not other.n:
+            return
+        if not self.n:
+            self.n, self.mean, self.m2, self.min, self.max = other.n, other.mean, other.m2, other.min, other.max
+            return
+        n = self.n + other.n
+        d = other.mean - self.mean
+        self.mean += d * other.n / n
+        self.m2 += other.m2 + d * d * self.n * other.n / n
+        self.n = n
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    @property
+    def stddev(self) -> Optional[float]:
+        """Sample standard deviation (n - 1); ``None`` below two values."""
+        if self.n < 2:
+            return None
+        return math.sqrt(max(self.m2, 0.0) / (self.n - 1))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"n": self.n, "mean": self.mean, "m2": self.m2, "min": self.min, "max": self.max}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Moments":
+        out = cls()
+        out.n, out.mean, out.m2, out.min, out.max = data["n"], data["mean"], data["m2"], data["min"], data["max"]
+        return out
+
+
+class KLLSketch:
+    def __init__(self, k: int = 200, seed: Optional[int] = None) -> None:
+        self.k = max(8, int(k))
+        self.n = 0
+        self.levels: List[List[float]] = [[]]
+        self._rng = random.Random(seed)
+
+    def _capacity(self, h: int) -> int:
+        depth = len(self.levels) - 1 - h
+        return max(2, int(math.ceil(self.k * _SHRINK ** depth)))
+
+    def _compress(self) -> None:
+        while sum(len(lvl) for lvl in self.levels) >= sum(self._capacity(h) for h in range(len(self.levels))):
+            for h, lvl in enumerate(self.levels):
+                if len(lvl) >= self._capacity(h):
+                    break
+            if h + 1 == len(self.levels):
+                self.levels.append([])
+            lvl.sort()
+            keep = [lvl.pop()] if len(lvl) % 2 else []
+            self.levels[h + 1].extend(lvl[self._rng.getrandbits(1)::2])
+            self.levels[h] = keep
+
+    def update(self, value: float) -> None:
+        self.levels[0].append(float(value))
+        self.n += 1
+        if len(self.levels[0]) >= self._capacity(0):
+            self._compress()
+
+    def update_many(self, values: Any) -> None:
+        """Add a batch. Compacting once per batch rather than per value is
+        cheaper and no less accurate (each compaction costs <= its weight)."""
+        batch = _values(values)
+        self.levels[0].extend(batch)
+        self.n += len(batch)
+        self._compress()
+
+    def merge(self, other: "KLLSketch") -> None:
+        while len(self.levels) < len(other.levels):
+            self.levels.append([])
+        for h, lvl in enumerate(other.levels):
+            self.levels[h].extend(lvl)
+        self.n += other.n
+        self._compress()
+
+    def quantiles(self, qs: Sequence[float]) -> List[Optional[float]]:
+        """Estimated values at the given quantiles (0..1), one sort for all."""
+        if not self.n:
+            return [None for _ in qs]
+        items = sorted((v, 1 << h) for h, lvl in enumerate(self.levels) for v in lvl)
+        total = sum(w for _, w in items)
+        out: List[Optional[float]] = []
+        for q in qs:
+            target = min(max(q, 0.0), 1.0) * total
+            cum = 0
+            value = items[-1][0]
+            for v, w in items:
+                cum += w
+                if cum >= target:
+                    value = v
+                    break
+            out.append(value)
+        return out
+
+    def quantile(self, q: float) -> Optional[float]:
+        return self.quantiles([q])[0]
+
+    def rank(self, value: float) -> int:
+        """Estimated number of values <= ``value``."""
+        return sum((1 << h) for h, lvl in enumerate(self.levels) for v in lvl if v <= value)
+
+    def __len__(self) -> int:
+        return sum(len(lvl) for lvl in self.levels)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"k": self.k, "n": self.n, "levels": [list(lvl) for lvl in self.levels]}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], seed: Optional[int] = None) -> "KLLSketch":
+        out = cls(k=data["k"], seed=seed)
+        out.n = data["n"]
+        out.levels = [list(lvl) for lvl in data["levels"]] or [[]]
+        return out
+
+
+def merged(sketches: Iterable[KLLSketch], k: int = 200, seed: Optional[int] = None) -> KLLSketch:
+    """One sketch summarizing all of ``sketches``."""
+    out = KLLSketch(k=k, seed=seed)
+    for s in sketches:
+        out.merge(s)
+    return out
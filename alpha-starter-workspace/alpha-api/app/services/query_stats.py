@@ -0,0 +1,118 @@
+"""SQL instrumentation: per-request query counts, N+1 hints and a slow-query log.
+
+``instrument_engine`` hooks the engine's cursor events. Each request gets a
+``QueryStats`` object in a context variable (set by the HTTP middleware);
+sync handlers run in a threadpool with a copy of the context, so they report
+into the same object.
+"""
+from __future__ import annotations
+
+import contextvars
+import logging
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+
+from ..config import settings
+from . import metrics
+
+
+logger = logging.getLogger("alpha.sql")
+
+db_queries = metrics.counter("alpha_db_queries_total", "SQL statements executed.")
+db_query_time = metrics.histogram(
+    "alpha_db_query_duration_seconds", "SQL statement execution time.",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5))
+db_queries_per_request = metrics.histogram(
+    "alpha_db_queries_per_request", "SQL statements issued per HTTP request.",
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100))
+db_slow_queries = metrics.counter("alpha_db_slow_queries_total", "SQL statements above the slow-query threshold.")
+db_budget_exceeded = metrics.counter(
+    "alpha_db_query_budget_exceeded_total", "Requests that issued more statements than the budget.", ("route",))
+
+
+class QueryStats:
+    def __init__(self) -> None:
+        self.count = 0
+        self.total_time = 0.0
+        self.statements: Counter = Counter()
+
+    def record(self, statement: str, elapsed: float) -> None:
+        self.count += 1
+        self.total_time += elapsed
+        self.statements[statement] += 1
+
+    def repeated(self, threshold: int) -> List[Tuple[str, int]]:
+        """Statements issued at least ``threshold`` times (N+1 candidates)."""
+        return [(s, n) for s, n in self.statements.most_common() if n >= threshold]
+
+
+_current: contextvars.ContextVar[Optional[QueryStats]] = contextvars.ContextVar("alpha_query_stats", default=None)
+
+
+def begin() -> Tuple[QueryStats, contextvars.Token]:
+    stats = QueryStats()
+    return stats, _current.set(stats)
+
+
+def end(token: contextvars.Token) -> None:
+    _current.reset(token)
+
+
+def current() -> Optional[QueryStats]:
+    return _current.get()
+
+
+def params_shape(parameters: Any) -> str:
+    """Describe bound parameters without logging their (possibly personal) values."""
+    if parameters is None:
+        return "none"
+    if isinstance(parameters, dict):
+        return "{" + ", ".join(f"{k}:{type(v).__name__}" for k, v in parameters.items()) + "}"
+    if isinstance(parameters, (list, tuple)):
+        if parameters and isinstance(parameters[0], (dict, list, tuple)):
+            return f"{len(parameters)} x {params_shape(parameters[0])}"
+        return "(" + ", ".join(type(v).__name__ for v in parameters) + ")"
+    return type(parameters).__name__
+
+
+def report(stats: QueryStats, method: str, route: str) -> Dict[str, str]:
+    """Log budget / N+1 findings for a finished request; return debug headers."""
+    db_queries_per_request.observe(stats.count)
+    if stats.count > settings.SQL_QUERY_BUDGET:
+        db_budget_exceeded.inc(route)
+        logger.warning("%s %s issued %d SQL statements (budget %d, %.1f ms in DB)",
+                       method, route, stats.count, settings.SQL_QUERY_BUDGET, stats.total_time * 1000)
+    for statement, n in stats.repeated(settings.SQL_N_PLUS_ONE_THRESHOLD):
+        logger.warning("Possible N+1 in %s %s: statement repeated %d times: %s",
+                       method, route, n, " ".join(statement.split())[:300])
+    if not settings.DEBUG:
+        return {}
+    return {
+        "X-DB-Query-Count": str(stats.count),
+        "X-DB-Time-Ms": f"{stats.total_time * 1000:.2f}",
+    }
+
+
+def instrument_engine(engine) -> None:
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("alpha_query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get("alpha_query_start")
+        if not starts:
+            return
+        elapsed = time.perf_counter() - starts.pop()
+        db_queries.inc()
+        db_query_time.observe(elapsed)
+        stats = _current.get()
+        if stats is not None:
+            stats.record(statement, elapsed)
+        if settings.SQL_SLOW_QUERY_MS > 0 and elapsed * 1000 >= settings.SQL_SLOW_QUERY_MS:
+            db_slow_queries.inc()
+            logger.warning("Slow SQL (%.1f ms) params=%s: %s", elapsed * 1000,
+                           params_shape(parameters), " ".join(statement.split())[:1000])
@@ -0,0 +1,89 @@
+"""JSON values in Redis with a TTL, shared by the caches' Redis backends.
+
+``RedisStore`` keeps one JSON document per key under ``prefix`` and expires
+it after ``ttl`` seconds. A cache supplies ``encode`` / ``decode`` to turn
+its entries into JSON-able values and back. Errors are swallowed: a failed
+or undecodable read is a miss and a failed write is dropped, so a cache
+never fails a request.
+"""
+from __future__ import annotations
+
+import json
+from typing import Any, Callable, Dict, List
+
+try:
+    import redis  # type: ignore
+except Exception:
+    redis = None  # type: ignore
+
+
+PURGE_BATCH = 500  # keys per SCAN page / UNLINK
+
+
+def redis_available() -> bool:
+    return redis is not None
+
+
+def _identity(value: Any) -> Any:
+    return value
+
+
+class RedisStore:
+    def __init__(self, url: str, ttl: float, prefix: str, encode: Callable[[Any], Any] = _identity,
+                 decode: Callable[[Any], Any] = _identity) -> None:
+        self._r = redis.Redis.from_url(url)
+        self.ttl = max(1, int(ttl))
+        self.prefix = prefix
+        self.encode = encode
+        self.decode = decode
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Any:
+        try:
+            raw = self._r.get(self.prefix + key)
+            value = self.decode(json.loads(raw)) if raw is not None else None
+        except Exception:
+            value = None
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        try:
+            self._r.set(self.prefix + key, json.dumps(self.encode(value)), ex=self.ttl)
+        except Exception:
+            pass
+
+    def delete(self, key: str) -> None:
+        try:
+            self._r.delete(self.prefix + key)
+        except Exception:
+            pass
+
+    def purge(self, pattern: str = "*") -> int:
+        """UNLINK the keys under the prefix matching ``pattern`` (SCAN, never KEYS)."""
+        n = 0
+        batch: List[Any] = []
+        try:
+            for k in self._r.scan_iter(match=self.prefix + pattern, count=PURGE_BATCH):
+                batch.append(k)
+                if len(batch) >= PURGE_BATCH:
+                    n += self._r.unlink(*batch)
+                    batch = []
+            if batch:
+                n += self._r.unlink(*batch)
+        except Exception:
+            pass
+        return n
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / lookups) if lookups else 0.0,
+            "ttl_sec": self.ttl,
+        }
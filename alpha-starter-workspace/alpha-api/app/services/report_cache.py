@@ -0,0 +1,144 @@
+"""Cache of ``/reports/summary`` results per (user, period, day).
+
+An entry is stored together with the user's ``vitals`` and ``symptoms``
+data versions (``data_versions``) read *before* it was computed. A lookup
+re-reads those two counters (one primary-key query) and treats an entry
+with different versions as stale, so a write committed by any worker is
+never hidden by a cached summary. The vitals and symptoms routers also
+call ``invalidate`` after their writes to drop the entries eagerly.
+
+Entries expire after ``REPORT_CACHE_TTL_SEC``: the report window ends at
+"now", so readings ageing out of it are only picked up on recompute.
+
+The default backend is an in-process LRU (per worker). Set
+``REPORT_CACHE_BACKEND=redis`` and ``REDIS_URL`` to share entries between
+workers.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from pydantic import BaseModel
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from . import data_versions, metrics
+from .redis_store import RedisStore, redis_available
+from .ttl_cache import TTLCache
+
+
+PERIODS = ("week", "month")
+SOURCES = ("vitals", "symptoms")  # collections a summary is computed from
+
+Versions = Tuple[int, ...]
+
+compute_seconds = metrics.histogram(
+    "alpha_report_summary_compute_seconds", "Time to produce a report summary on a cache miss (snapshot or compute).", ("period",),
+)
+
+
+def _encode_entry(entry: Tuple[Versions, BaseModel]) -> Dict[str, Any]:
+    versions, value = entry
+    return {"versions": list(versions), "value": value.model_dump()}
+
+
+def _decode_entry(item: Dict[str, Any]) -> Tuple[Versions, Dict[str, Any]]:
+    return tuple(item["versions"]), item["value"]
+
+
+class ReportCache:
+    def __init__(self, enabled: bool = True, backend: str = "memory", ttl: float = 300.0,
+                 max_size: int = 5000, redis_url: Optional[str] = None) -> None:
+        self.enabled = enabled and ttl > 0
+        self.backend = "memory"
+        self._store: Any = TTLCache(max_size=max_size, ttl=ttl)
+        if backend == "redis" and redis_available() and redis_url:
+            self.backend = "redis"
+            self._store = RedisStore(redis_url, ttl, "alpha:report:", _encode_entry, _decode_entry)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.invalidations = 0
+        self.computes = 0
+        self.compute_seconds = 0.0
+
+    @staticmethod
+    def key(user_id: str, period: str, day: datetime) -> str:
+        return f"{user_id}:{period}:{day:%Y-%m-%d}"
+
+    def get_or_compute(self, db: Session, user_id: str, period: str, compute: Callable[[Versions], BaseModel],
+                       decode: Callable[[Dict[str, Any]], BaseModel]) -> BaseModel:
+        """Cached summary for ``user_id``/``period``, computing and storing it
+        on a miss. ``compute`` gets the data versions read for the lookup;
+        ``decode`` rebuilds the model from a Redis entry."""
+        versions = data_versions.current_many(db, user_id, *SOURCES)
+        if not self.enabled:
+            return self._compute(period, lambda: compute(versions))
+        key = self.key(user_id, period, datetime.utcnow())
+        entry = self._store.get(key)
+        if entry is not None and tuple(entry[0]) == versions:
+            with self._lock:
+                self.hits += 1
+            value = entry[1]
+            return decode(value) if isinstance(value, dict) else value
+        with self._lock:
+            self.misses += 1
+            self.stale += entry is not None
+        value = self._compute(period, lambda: compute(versions))
+        self._store.set(key, (versions, value))
+        return value
+
+    def _compute(self, period: str, compute: Callable[[], BaseModel]) -> BaseModel:
+        t0 = time.perf_counter()
+        value = compute()
+        elapsed = time.perf_counter() - t0
+        compute_seconds.observe(elapsed, period)
+        with self._lock:
+            self.computes += 1
+            self.compute_seconds += elapsed
+        return value
+
+    def invalidate(self, user_id: str) -> None:
+        """Drop today's entries for ``user_id`` (call after a vitals/symptoms write)."""
+        with self._lock:
+            self.invalidations += 1
+        day = datetime.utcnow()
+        for period in PERIODS:
+            self._store.delete(self.key(user_id, period, day))
+
+    def clear(self) -> None:
+        if self.backend == "memory":
+            self._store.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            out = {
+                "enabled": self.enabled,
+                "backend": self.backend,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / lookups) if lookups else 0.0,
+                "stale": self.stale,
+                "invalidations": self.invalidations,
+                "computes": self.computes,
+                "compute_ms_avg": (self.compute_seconds / self.computes * 1000) if self.computes else 0.0,
+            }
+        store = self._store.stats()
+        for k in ("size", "max_size", "ttl_sec", "evictions", "expirations"):
+            if k in store:
+                out[k] = store[k]
+        return out
+
+
+report_cache = ReportCache(
+    enabled=settings.REPORT_CACHE_ENABLED,
+    backend=settings.REPORT_CACHE_BACKEND,
+    ttl=settings.REPORT_CACHE_TTL_SEC,
+    max_size=settings.REPORT_CACHE_MAX,
+    redis_url=settings.REDIS_URL,
+)
@@ -0,0 +1,194 @@
+"""Batch precompute of weekly/monthly report summaries for all active users.
+
+Active users (vitals rollups or symptoms within ``REPORT_ACTIVE_DAYS``) are
+walked in user-id order, ``REPORT_PRECOMPUTE_CHUNK`` at a time (keyset on
+``users.id`` with indexed ``EXISTS`` probes, so no user list is held). Each
+chunk goes to a ``ProcessPoolExecutor`` worker that computes the summaries
+with its own connection and upserts them into ``report_snapshots``
+(``report_summary.save_snapshots``) in one commit.
+
+Progress is kept in ``report_jobs``. Chunks can finish out of order, so the
+``cursor`` only advances over the completed *prefix* of chunks. An
+interrupted run restarts after the cursor and redoes at most the chunks that
+were in flight (upserts make that harmless). ``users_done``/``snapshots``
+count the prefix too, and ``seconds`` accumulates wall time over all runs,
+so ``users_done / seconds`` is the job's throughput.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import exists, select
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..db import SessionLocal, engine
+from .. import models
+from ..models_reports import ReportJob
+from ..models_symptoms import SymptomRecord
+from ..models_vitals import VitalDailyRollup
+from . import data_versions
+from .report_cache import SOURCES
+from .report_summary import compute_summary, save_snapshots
+
+
+logger = logging.getLogger("alpha.reports.precompute")
+
+PERIODS = ("week", "month")
+
+ChunkResult = Tuple[int, int]  # (users, snapshots)
+
+
+def active_users(db: Session, since: datetime, after: Optional[str], limit: int) -> List[str]:
+    """Next ``limit`` user ids after ``after`` with vitals or symptoms since ``since``."""
+    users = models.User.__table__
+    recent = (
+        exists().where(VitalDailyRollup.user_id == users.c.id, VitalDailyRollup.day >= since.date())
+        | exists().where(SymptomRecord.user_id == users.c.id, SymptomRecord.created_at >= since)
+    )
+    query = select(users.c.id).where(recent)
+    if after is not None:
+        query = query.where(users.c.id > after)
+    return list(db.execute(query.order_by(users.c.id).limit(limit)).scalars())
+
+
+def _init_worker() -> None:
+    # Forked children must not reuse the parent's pooled connections
+    engine.dispose(close=False)
+
+
+def process_chunk(user_ids: Sequence[str], periods: Sequence[str]) -> ChunkResult:
+    """Compute and store snapshots for ``user_ids`` (runs in a worker process)."""
+    db = SessionLocal()
+    try:
+        items = []
+        for uid in user_ids:
+            # Versions first: a write racing the computation leaves a stale snapshot, never a wrong fresh one
+            versions = data_versions.current_many(db, uid, *SOURCES)
+            for period in periods:
+                items.append((uid, period, versions, compute_summary(db, uid, period)))
+        stored = save_snapshots(db, items)
+        db.commit()
+        return len(user_ids), stored
+    finally:
+        db.close()
+
+
+def _load_job(db: Session, job_id: str, periods: Sequence[str], restart: bool) -> ReportJob:
+    job = db.get(ReportJob, job_id)
+    now = datetime.utcnow()
+    if job is None:
+        job = ReportJob(job_id=job_id, periods=",".join(periods), started_at=now, updated_at=now)
+        db.add(job)
+    elif restart:
+        job.cursor, job.users_done, job.snapshots, job.seconds = None, 0, 0, 0.0
+        job.started_at, job.finished_at, job.periods = now, None, ",".join(periods)
+    db.commit()
+    return job
+
+
+def run(job_id: str, periods: Sequence[str] = PERIODS, workers: Optional[int] = None,
+        chunk: Optional[int] = None, restart: bool = False, max_chunks: Optional[int] = None,
+        progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+    """Run (or resume) precompute job ``job_id``.
+
+    ``workers`` <= 1 computes in this process. ``max_chunks`` stops after
+    that many chunks, leaving the job resumable. ``progress`` is called with
+    the stats dict after every completed chunk.
+    """
+    workers = workers if workers is not None else (settings.REPORT_PRECOMPUTE_WORKERS or os.cpu_count() or 1)
+    chunk = chunk or settings.REPORT_PRECOMPUTE_CHUNK
+    since = datetime.utcnow() - timedelta(days=settings.REPORT_ACTIVE_DAYS)
+    db = SessionLocal()
+    executor: Optional[ProcessPoolExecutor] = None
+    t0 = time.perf_counter()
+    try:
+        job = _load_job(db, job_id, periods, restart)
+        stats: Dict[str, Any] = {"job_id": job_id, "resumed_from": job.cursor, "users": 0, "snapshots": 0,
+                                 "chunks": 0, "seconds": 0.0, "users_per_sec": 0.0,
+                                 "finished": job.finished_at is not None, "skipped": job.finished_at is not None}
+        if stats["skipped"]:
+            return stats
+        periods = tuple(job.periods.split(","))
+        if workers > 1:
+            executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker)
+
+        pending: Dict[Future, int] = {}
+        chunk_ends: List[str] = []              # last user id of chunk i
+        results: Dict[int, ChunkResult] = {}    # finished chunks beyond the cursor
+        next_commit = 0                         # first chunk not yet in the committed prefix
+        after, exhausted = job.cursor, False
+
+        def submit() -> None:
+            nonlocal after, exhausted
+            ids = active_users(db, since, after, chunk)
+            if not ids or (max_chunks is not None and len(chunk_ends) >= max_chunks):
+                exhausted = True
+                return
+            after = ids[-1]
+            chunk_ends.append(after)
+            if executor is None:
+                results[len(chunk_ends) - 1] = process_chunk(ids, periods)
+            else:
+                pending[executor.submit(process_chunk, ids, periods)] = len(chunk_ends) - 1
+
+        def commit_prefix() -> None:
+            nonlocal next_commit
+            while next_commit in results:
+                users, stored = results.pop(next_commit)
+                job.cursor = chunk_ends[next_commit]
+                job.users_done += users
+                job.snapshots += stored
+                stats["users"] += users
+                stats["snapshots"] += stored
+                stats["chunks"] += 1
+                next_commit += 1
+            elapsed = time.perf_counter() - t0
+            job.updated_at = datetime.utcnow()
+            db.commit()
+            stats["seconds"] = elapsed
+            stats["users_per_sec"] = stats["users"] / elapsed if elapsed else 0.0
+            if progress is not None:
+                progress(dict(stats))
+
+        if executor is None:
+            while True:
+                submit()
+                if exhausted:
+                    break
+                commit_prefix()
+        else:
+            while True:
+                while not exhausted and len(pending) < 2 * workers:
+                    submit()
+                if not pending:
+                    break
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    results[pending.pop(fut)] = fut.result()
+                commit_prefix()
+
+        elapsed = time.perf_counter() - t0
+        job.seconds += elapsed
+        if max_chunks is None or stats["chunks"] < max_chunks:
+            job.finished_at = datetime.utcnow()
+        db.commit()
+        stats.update(seconds=elapsed, users_per_sec=stats["users"] / elapsed if elapsed else 0.0,
+                     finished=job.finished_at is not None)
+        logger.info("report precompute %s: %d users, %d snapshots in %.1fs (%.0f users/s)%s", job_id,
+                    stats["users"], stats["snapshots"], elapsed, stats["users_per_sec"],
+                    "" if stats["finished"] else " (stopped early, resumable)")
+        return stats
+    except BaseException:
+        # The committed prefix stays; in-flight chunks are redone on resume
+        db.rollback()
+        raise
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+        db.close()
@@ -0,0 +1,189 @@
+"""Weekly/monthly report summaries and their precomputed snapshots.
+
+``compute_summary`` builds a ``ReportSummaryOut`` from the daily rollups
+and the symptom table. ``services.report_precompute`` runs it ahead of time
+for every active user and stores the result in ``report_snapshots`` together
+with the user's ``vitals``/``symptoms`` data versions. ``summary`` (used by
+``GET /reports/summary`` behind ``report_cache``) serves a snapshot when
+
+- its versions equal the current ones (no write since it was computed), and
+- it is younger than ``REPORT_SNAPSHOT_MAX_AGE_SEC`` (the report window ends
+  at "now", so old snapshots drift as readings leave the window),
+
+and computes the summary otherwise.
+"""
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Literal, Optional, Tuple
+
+from pydantic import BaseModel
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..models_reports import ReportSnapshot
+from ..models_symptoms import SymptomRecord
+from . import metrics, vital_flags, vital_rollups
+
+
+snapshots = ReportSnapshot.__table__
+
+Versions = Tuple[int, ...]  # (vitals, symptoms), as in report_cache.SOURCES
+
+snapshot_lookups = metrics.counter(
+    "alpha_report_snapshot_total", "Report summary snapshot lookups by result.", ("result",),
+)
+
+
+class VitalsSummary(BaseModel):
+    total: int
+    bp: Dict[str, int]
+    hr: Dict[str, int]
+    temp: Dict[str, int]
+    glucose: Dict[str, int]
+
+
+class SymptomSummary(BaseModel):
+    total: int
+    by_severity: Dict[str, int]
+
+
+class ReportSummaryOut(BaseModel):
+    period: Literal["week", "month"]
+    vitals_summary: VitalsSummary
+    symptom_summary: SymptomSummary
+    markdown: str
+
+
+def compute_summary(db: Session, user_id: str, period: str) -> ReportSummaryOut:
+    """Build the summary from the database (no cache, no snapshot)."""
+    now = datetime.utcnow()
+    start = now - timedelta(days=7 if period == "week" else 30)
+
+    # Vitals aggregation: whole days from vital_daily_rollups (<= ~31 rows),
+    # only the partial first day from raw rows
+    total, period_counts = vital_rollups.period_flag_counts(db, user_id, start)
+    flag_counts: Dict[str, Dict[str, int]] = {}
+    for m in vital_flags.METRICS:
+        flag_counts[m.name] = {label: period_counts[m.name].get(label, 0) for label in m.labels}
+    bp_counts, hr_counts = flag_counts["bp"], flag_counts["hr"]
+    temp_counts, glucose_counts = flag_counts["temp"], flag_counts["glucose"]
+
+    vitals_summary = VitalsSummary(
+        total=total,
+        bp=bp_counts,
+        hr=hr_counts,
+        temp=temp_counts,
+        glucose=glucose_counts,
+    )
+
+    # Symptoms aggregation: group on the raw value and normalise here so the
+    # keys (and their most-recent-first order) match the per-row version
+    sev_groups = (
+        db.query(SymptomRecord.severity, func.count())
+        .filter(SymptomRecord.user_id == user_id)
+        .filter(SymptomRecord.created_at >= start)
+        .group_by(SymptomRecord.severity)
+        .order_by(func.max(SymptomRecord.created_at).desc())
+        .all()
+    )
+    by_severity: Dict[str, int] = {}
+    for severity, n in sev_groups:
+        sev = (severity or "unspecified").strip().lower()
+        by_severity[sev] = by_severity.get(sev, 0) + n
+
+    symptom_summary = SymptomSummary(total=sum(by_severity.values()), by_severity=by_severity)
+
+    # Markdown summary
+    lines: List[str] = []
+    lines.append(f"# ALPHA Summary ({period})")
+    lines.append("")
+    lines.append("## Vitals")
+    lines.append(f"Total entries: {vitals_summary.total}")
+    lines.append(
+        f"BP flags: normal {bp_counts['normal']}, elevated {bp_counts['elevated']}, "
+        f"stage1 {bp_counts['hypertension-stage1']}, stage2 {bp_counts['hypertension-stage2']}, "
+        f"crisis {bp_counts['hypertensive-crisis']}"
+    )
+    lines.append(
+        f"HR flags: normal {hr_counts['normal']}, brady {hr_counts['bradycardia']}/{hr_counts['bradycardia-severe']}, "
+        f"tachy {hr_counts['tachycardia']}/{hr_counts['tachycardia-severe']}"
+    )
+    lines.append(
+        f"Temp flags: normal {temp_counts['normal']}, fever {temp_counts['fever']}, "
+        f"fever-high {temp_counts['fever-high']}, hypothermia {temp_counts['hypothermia']}"
+    )
+    lines.append(
+        f"Glucose flags: normal {glucose_counts['normal']}, hypo {glucose_counts['hypoglycemia']}, "
+        f"hyper {glucose_counts['hyperglycemia']}"
+    )
+    lines.append("")
+    lines.append("## Symptoms")
+    lines.append(f"Total reports: {symptom_summary.total}")
+    if by_severity:
+        sev_str = ", ".join(f"{k}: {v}" for k, v in by_severity.items())
+        lines.append(f"By severity: {sev_str}")
+    else:
+        lines.append("By severity: none")
+    lines.append("")
+    lines.append(
+        "Note: This summary is informational and non-clinical. For medical concerns, consult a professional."
+    )
+
+    markdown = "\n".join(lines)
+
+    return ReportSummaryOut(
+        period=period,
+        vitals_summary=vitals_summary,
+        symptom_summary=symptom_summary,
+        markdown=markdown,
+    )
+
+
+# ---- snapshots ----
+
+def load_snapshot(db: Session, user_id: str, period: str, versions: Versions) -> Optional[ReportSummaryOut]:
+    """The stored summary if it is still valid for ``versions``, else ``None``."""
+    row = db.execute(
+        select(snapshots.c.vitals_version, snapshots.c.symptoms_version, snapshots.c.computed_at,
+               snapshots.c.payload)
+        .where(snapshots.c.user_id == user_id, snapshots.c.period == period)
+    ).first()
+    if row is None:
+        snapshot_lookups.inc("missing")
+        return None
+    if (row.vitals_version, row.symptoms_version) != tuple(versions):
+        snapshot_lookups.inc("stale")
+        return None
+    if row.computed_at < datetime.utcnow() - timedelta(seconds=settings.REPORT_SNAPSHOT_MAX_AGE_SEC):
+        snapshot_lookups.inc("expired")
+        return None
+    snapshot_lookups.inc("fresh")
+    return ReportSummaryOut.model_validate_json(row.payload)
+
+
+def save_snapshots(db: Session, items: Iterable[Tuple[str, str, Versions, ReportSummaryOut]]) -> int:
+    """Upsert ``(user_id, period, versions, summary)`` snapshots. Does not commit."""
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as upsert_insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert as upsert_insert
+    now = datetime.utcnow()
+    values = [
+        {"user_id": uid, "period": period, "vitals_version": versions[0], "symptoms_version": versions[1],
+         "payload": summary.model_dump_json(), "computed_at": now}
+        for uid, period, versions, summary in items
+    ]
+    if not values:
+        return 0
+    stmt = upsert_insert(snapshots)
+    keep = ("vitals_version", "symptoms_version", "payload", "computed_at")
+    db.execute(stmt.on_conflict_do_update(index_elements=["user_id", "period"],
+                                          set_={c: stmt.excluded[c] for c in keep}), values)
+    return len(values)
+
+
+def summary(db: Session, user_id: str, period: str, versions: Versions) -> ReportSummaryOut:
+    """Fresh snapshot if there is one, otherwise ``compute_summary``."""
+    return load_snapshot(db, user_id, period, versions) or compute_summary(db, user_id, period)
@@ -0,0 +1,81 @@
+"""Cache of lightweight user snapshots used by security.get_current_user.
+
+Snapshots hold the scalar columns needed to rebuild a session-attached
+``models.User`` without a SELECT. ``password_hash`` is deliberately left
+out; it lazy-loads on the few endpoints that read it.
+
+The default backend is in-process (per worker). Set ``USER_CACHE_BACKEND=redis``
+and ``REDIS_URL`` to share snapshots and invalidations between workers.
+"""
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from ..config import settings
+from .. import models
+from .redis_store import RedisStore, redis_available
+from .ttl_cache import TTLCache
+
+
+SNAPSHOT_FIELDS = ("id", "email", "phone", "email_verified", "created_at", "updated_at")
+_DATETIME_FIELDS = ("created_at", "updated_at")
+
+
+def _encode_snapshot(snap: Dict[str, Any]) -> Dict[str, Any]:
+    return {k: (v.isoformat() if isinstance(v, datetime) else v) for k, v in snap.items()}
+
+
+def _decode_snapshot(snap: Dict[str, Any]) -> Dict[str, Any]:
+    for f in _DATETIME_FIELDS:
+        if snap.get(f):
+            snap[f] = datetime.fromisoformat(snap[f])
+    return snap
+
+
+class UserCache:
+    def __init__(self, enabled: bool = True, backend: str = "memory", ttl: float = 30.0,
+                 max_size: int = 10000, redis_url: Optional[str] = None) -> None:
+        self.enabled = enabled and ttl > 0
+        self.backend = "memory"
+        self._store: Any = TTLCache(max_size=max_size, ttl=ttl)
+        if backend == "redis" and redis_available() and redis_url:
+            self.backend = "redis"
+            self._store = RedisStore(redis_url, ttl, "alpha:user:", _encode_snapshot, _decode_snapshot)
+        self.invalidations = 0
+
+    def get(self, user_id: str) -> Optional[Dict[str, Any]]:
+        if not self.enabled:
+            return None
+        return self._store.get(user_id)
+
+    def put(self, user: models.User) -> None:
+        if not self.enabled:
+            return
+        self._store.set(user.id, {f: getattr(user, f) for f in SNAPSHOT_FIELDS})
+
+    def invalidate(self, user_id: str) -> None:
+        self.invalidations += 1
+        self._store.delete(user_id)
+
+    def attach(self, db: Session, snap: Dict[str, Any]) -> models.User:
+        """Rebuild a persistent User in ``db`` from a snapshot without a SELECT."""
+        obj = models.User(**snap)
+        make_transient_to_detached(obj)
+        return db.merge(obj, load=False)
+
+    def stats(self) -> Dict[str, Any]:
+        out = {"enabled": self.enabled, "backend": self.backend, "invalidations": self.invalidations}
+        out.update(self._store.stats())
+        return out
+
+
+user_cache = UserCache(
+    enabled=settings.USER_CACHE_ENABLED,
+    backend=settings.USER_CACHE_BACKEND,
+    ttl=settings.USER_CACHE_TTL_SEC,
+    max_size=settings.USER_CACHE_MAX,
+    redis_url=settings.REDIS_URL,
+)
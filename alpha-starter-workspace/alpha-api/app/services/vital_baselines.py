@@ -0,0 +1,256 @@
+"""Per-user rolling baselines and anomaly scores for incoming vitals.
+
+Each (user, field) keeps an exponentially weighted mean and variance
+(``vital_baselines``: n, mean, var). A new reading is scored against the
+baseline *before* it is folded in::
+
+    d = x - mean
+    z = d / max(sqrt(var), MIN_STD[field])    # once n >= VITALS_BASELINE_MIN_READINGS
+    mean += alpha * d
+    var = (1 - alpha) * (var + alpha * d * d)
+
+so every update is O(1) and history is never rescanned. The reading stores
+its largest |z| (``anomaly_score``) and the fields with
+|z| >= ``VITALS_ANOMALY_Z`` (``anomaly_metrics``).
+
+Writes fold readings in arrival order (a batch is sorted by time first).
+Edits, deletes and back-dated imports are not unwound; ``replay`` rebuilds
+baselines from history in time order, solving the EWMA recurrences as
+vectorized NumPy scans, and can restamp every reading's score.
+"""
+from __future__ import annotations
+
+import math
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import bindparam, delete, insert, select, update
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..models_vitals import VITAL_FIELDS, VitalBaseline, VitalRecord
+from . import data_versions
+
+try:
+    import numpy as np  # type: ignore
+except Exception:
+    np = None  # type: ignore
+
+
+# Standard-deviation floor per field: a very steady baseline would otherwise
+# turn measurement noise into huge z-scores
+MIN_STD: Dict[str, float] = {
+    "systolic": 4.0, "diastolic": 3.0, "heart_rate": 3.0,
+    "temperature_c": 0.15, "glucose_mgdl": 8.0, "weight_kg": 0.3,
+}
+
+State = Tuple[int, float, float]  # (n, mean, var)
+
+baselines = VitalBaseline.__table__
+
+
+def step(state: Optional[State], x: float, alpha: float, min_std: float) -> Tuple[State, Optional[float]]:
+    """Fold one value into ``state``. Returns the new state and the value's
+    z-score against the old one (``None`` while the baseline is warming up)."""
+    if state is None or state[0] == 0:
+        return (1, x, 0.0), None
+    n, mean, var = state
+    d = x - mean
+    z = d / max(math.sqrt(var), min_std) if n >= settings.VITALS_BASELINE_MIN_READINGS else None
+    return (n + 1, mean + alpha * d, (1.0 - alpha) * (var + alpha * d * d)), z
+
+
+def summarize(zs: Dict[str, float]) -> Tuple[Optional[float], Optional[str]]:
+    """``(anomaly_score, anomaly_metrics)`` column values from per-field z-scores."""
+    if not zs:
+        return None, None
+    score = max(abs(z) for z in zs.values())
+    flagged = [f for f in VITAL_FIELDS if f in zs and abs(zs[f]) >= settings.VITALS_ANOMALY_Z]
+    return round(score, 3), ",".join(flagged) or None
+
+
+def anomalies(value: Optional[str]) -> List[str]:
+    """Field names stored in ``anomaly_metrics``."""
+    return value.split(",") if value else []
+
+
+# ---- incremental scoring on write ----
+
+def _load(db: Session, user_id: str) -> Dict[str, State]:
+    query = select(baselines.c.field, baselines.c.n, baselines.c.mean, baselines.c.var) \
+        .where(baselines.c.user_id == user_id)
+    if db.get_bind().dialect.name == "postgresql":
+        # Serialize concurrent writers of one user's baselines (read-modify-write)
+        query = query.with_for_update()
+    return {f: (n, mean, var) for f, n, mean, var in db.execute(query)}
+
+
+def _save(db: Session, user_id: str, states: Dict[str, State], last_at: Dict[str, datetime]) -> None:
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as upsert_insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert as upsert_insert
+    now = datetime.utcnow()
+    values = [
+        {"user_id": user_id, "field": f, "n": n, "mean": mean, "var": var, "last_at": last_at[f], "updated_at": now}
+        for f, (n, mean, var) in states.items() if f in last_at
+    ]
+    if not values:
+        return
+    stmt = upsert_insert(baselines)
+    keep = ("n", "mean", "var", "last_at", "updated_at")
+    db.execute(stmt.on_conflict_do_update(index_elements=["user_id", "field"],
+                                          set_={c: stmt.excluded[c] for c in keep}), values)
+
+
+def score_rows(db: Session, rows: List[Dict[str, Any]]) -> None:
+    """Set ``anomaly_score``/``anomaly_metrics`` on insert row dicts and fold them
+    into their users' baselines (oldest first). Does not commit."""
+    alpha = settings.VITALS_BASELINE_ALPHA
+    by_user: Dict[str, List[Dict[str, Any]]] = {}
+    for row in rows:
+        by_user.setdefault(row["user_id"], []).append(row)
+    for user_id, user_rows in by_user.items():
+        states = _load(db, user_id)
+        last_at: Dict[str, datetime] = {}
+        for row in sorted(user_rows, key=lambda r: r["created_at"]):
+            zs: Dict[str, float] = {}
+            for f in VITAL_FIELDS:
+                x = row.get(f)
+                if x is None:
+                    continue
+                states[f], z = step(states.get(f), float(x), alpha, MIN_STD[f])
+                last_at[f] = row["created_at"]
+                if z is not None:
+                    zs[f] = z
+            row["anomaly_score"], row["anomaly_metrics"] = summarize(zs)
+        _save(db, user_id, states, last_at)
+
+
+def score_record(db: Session, rec: VitalRecord) -> None:
+    """``score_rows`` for one ORM record (before it is added)."""
+    row = {c: getattr(rec, c) for c in ("user_id",) + VITAL_FIELDS}
+    row["created_at"] = rec.created_at or datetime.utcnow()
+    rec.created_at = row["created_at"]
+    score_rows(db, [row])
+    rec.anomaly_score, rec.anomaly_metrics = row["anomaly_score"], row["anomaly_metrics"]
+
+
+# ---- replay from history ----
+
+def _block(alpha: float) -> int:
+    # Longest block for which (1 - alpha)**-k stays below 1e12 (keeps the scan well conditioned)
+    return max(1, min(4096, int(12 * math.log(10) / -math.log1p(-alpha))))
+
+
+def _recurrence(c: float, u: Any, y0: float, block: int) -> Any:
+    """y[t] = c * y[t-1] + u[t] with y[-1] = y0, blockwise via cumulative sums:
+    y[t] = c**(t+1) * (y0 + sum_{j<=t} c**-(j+1) * u[j])."""
+    out = np.empty_like(u)
+    y = y0
+    for s in range(0, len(u), block):
+        blk = u[s:s + block]
+        p = c ** np.arange(1, len(blk) + 1, dtype=np.float64)
+        out[s:s + len(blk)] = p * (y + np.cumsum(blk / p))
+        y = float(out[s + len(blk) - 1])
+    return out
+
+
+def scan(x: Any, alpha: float, min_std: float) -> Tuple[Optional[State], Any]:
+    """Run ``step`` over a whole time-ordered series at once.
+
+    Returns the final state and the z-score of every value (NaN while
+    warming up). Uses the closed form of the mean/variance recurrences
+    instead of a Python loop.
+    """
+    n = len(x)
+    if n == 0:
+        return None, np.empty(0)
+    c = 1.0 - alpha
+    block = _block(alpha)
+    z = np.full(n, np.nan)
+    if n == 1:
+        return (1, float(x[0]), 0.0), z
+    mean = _recurrence(c, alpha * x[1:], float(x[0]), block)   # mean after value t (t >= 1)
+    prior_mean = np.concatenate(([x[0]], mean[:-1]))
+    d = x[1:] - prior_mean
+    var = _recurrence(c, c * alpha * d * d, 0.0, block)        # var after value t (t >= 1)
+    prior_var = np.concatenate(([0.0], var[:-1]))
+    warm = np.arange(1, n) >= settings.VITALS_BASELINE_MIN_READINGS
+    z[1:] = np.where(warm, d / np.maximum(np.sqrt(prior_var), min_std), np.nan)
+    return (n, float(mean[-1]), float(var[-1])), z
+
+
+def _scan_loop(x: List[float], alpha: float, min_std: float) -> Tuple[Optional[State], List[float]]:
+    state: Optional[State] = None
+    zs = []
+    for v in x:
+        state, z = step(state, v, alpha, min_std)
+        zs.append(math.nan if z is None else z)
+    return state, zs
+
+
+def replay_user(db: Session, user_id: str, stamp: bool = False) -> int:
+    """Recompute one user's baselines from all their readings (time order).
+
+    With ``stamp`` the per-reading anomaly columns are rewritten too. Does
+    not commit. Returns the number of readings replayed.
+    """
+    alpha = settings.VITALS_BASELINE_ALPHA
+    cols = [getattr(VitalRecord, f) for f in VITAL_FIELDS]
+    rows = db.execute(
+        select(VitalRecord.id, VitalRecord.created_at, *cols)
+        .where(VitalRecord.user_id == user_id)
+        .order_by(VitalRecord.created_at, VitalRecord.id)
+    ).all()
+    db.execute(delete(baselines).where(baselines.c.user_id == user_id))
+    if not rows:
+        return 0
+    now = datetime.utcnow()
+    z_by_field: Dict[str, Any] = {}
+    values = []
+    for i, f in enumerate(VITAL_FIELDS, start=2):
+        present = [(j, r[i]) for j, r in enumerate(rows) if r[i] is not None]
+        if not present:
+            continue
+        series = [float(v) for _, v in present]
+        if np is not None:
+            state, z = scan(np.asarray(series, dtype=np.float64), alpha, MIN_STD[f])
+        else:
+            state, z = _scan_loop(series, alpha, MIN_STD[f])
+        z_by_field[f] = (present, z)
+        n, mean, var = state
+        values.append({"user_id": user_id, "field": f, "n": n, "mean": mean, "var": var,
+                       "last_at": rows[present[-1][0]][1], "updated_at": now})
+    db.execute(insert(baselines), values)
+    if stamp:
+        per_row: List[Dict[str, float]] = [{} for _ in rows]
+        for f, (present, z) in z_by_field.items():
+            for (j, _v), zf in zip(present, z, strict=True):
+                if zf == zf:  # not NaN
+                    per_row[j][f] = float(zf)
+        params = []
+        for r, zs in zip(rows, per_row, strict=True):
+            score, flagged = summarize(zs)
+            params.append({"rid": r[0], "score": score, "flagged": flagged})
+        db.execute(
+            update(VitalRecord.__table__)
+            .where(VitalRecord.__table__.c.id == bindparam("rid"))
+            .values(anomaly_score=bindparam("score"), anomaly_metrics=bindparam("flagged")),
+            params,
+        )
+        data_versions.bump(db, user_id, "vitals")
+    return len(rows)
+
+
+def replay(db: Session, user_ids: Optional[Iterable[str]] = None, stamp: bool = False) -> Tuple[int, int]:
+    """``replay_user`` for the given users (default: everyone with readings),
+    committing after each. Returns ``(users, readings)``."""
+    if user_ids is None:
+        user_ids = db.execute(select(VitalRecord.user_id).distinct()).scalars().all()
+    users = readings = 0
+    for uid in user_ids:
+        readings += replay_user(db, uid, stamp=stamp)
+        db.commit()
+        users += 1
+    return users, readings
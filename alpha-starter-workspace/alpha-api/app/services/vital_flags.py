@@ -0,0 +1,200 @@
+"""Vital-sign flag classification shared by the vitals endpoints and reports.
+
+Each metric has one ordered rule table (first match wins, otherwise
+``"normal"``). The rule predicates only use comparisons combined with ``|``
+and ``&``, so the same table classifies:
+
+- a single reading (``flag_bp`` & co., used when one record is returned),
+- whole columns at once with NumPy (``codes`` / ``labels`` / ``counts``),
+- rows inside the database (``sql_case``, used by the flag backfill).
+
+Flags are stored on ``vital_records`` when a reading is written
+(``stamp_record`` / ``stamp_rows``) so reads, filters and exports
+(``services.exports``, which lists the ``<metric>_flag`` columns from
+``METRICS``) need no recompute.
+
+Vectorized results are small integer codes indexing the metric's ``labels``
+tuple, with ``-1`` for a missing reading. Missing means ``None``/NULL; NaN is
+treated as missing as well.
+"""
+from __future__ import annotations
+
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from sqlalchemy import case, or_
+
+try:
+    import numpy as np  # type: ignore
+except Exception:
+    np = None  # type: ignore
+
+
+MISSING = -1
+
+
+class Metric(NamedTuple):
+    name: str
+    fields: Tuple[str, ...]
+    labels: Tuple[str, ...]  # index 0 is "normal"
+    rules: Tuple[Tuple[str, Callable[..., Any]], ...]
+
+
+BP = Metric(
+    "bp", ("systolic", "diastolic"),
+    ("normal", "elevated", "hypertension-stage1", "hypertension-stage2", "hypertensive-crisis"),
+    (
+        ("hypertensive-crisis", lambda s, d: (s >= 180) | (d >= 120)),
+        ("hypertension-stage2", lambda s, d: (s >= 140) | (d >= 90)),
+        ("hypertension-stage1", lambda s, d: (s >= 130) | (d >= 80)),
+        ("elevated", lambda s, d: (s >= 120) & (d < 80)),
+    ),
+)
+HR = Metric(
+    "hr", ("heart_rate",),
+    ("normal", "bradycardia", "bradycardia-severe", "tachycardia", "tachycardia-severe"),
+    (
+        ("bradycardia-severe", lambda hr: hr < 40),
+        ("bradycardia", lambda hr: hr < 60),
+        ("tachycardia-severe", lambda hr: hr > 120),
+        ("tachycardia", lambda hr: hr > 100),
+    ),
+)
+TEMP = Metric(
+    "temp", ("temperature_c",),
+    ("normal", "fever", "fever-high", "hypothermia"),
+    (
+        ("fever-high", lambda t: t >= 39.0),
+        ("fever", lambda t: t >= 38.0),
+        ("hypothermia", lambda t: t < 35.0),
+    ),
+)
+GLUCOSE = Metric(
+    "glucose", ("glucose_mgdl",),
+    ("normal", "hypoglycemia", "hyperglycemia"),
+    (
+        ("hyperglycemia", lambda g: g >= 240),
+        ("hypoglycemia", lambda g: g < 70),
+    ),
+)
+
+METRICS = (BP, HR, TEMP, GLUCOSE)
+
+
+# ---- single reading ----
+
+def classify(metric: Metric, *values: Optional[float]) -> Optional[str]:
+    for v in values:
+        if v is None or v != v:
+            return None
+    for label, rule in metric.rules:
+        if rule(*values):
+            return label
+    return "normal"
+
+
+def flag_bp(sys: Optional[float], dia: Optional[float]) -> Optional[str]:
+    return classify(BP, sys, dia)
+
+
+def flag_hr(hr: Optional[float]) -> Optional[str]:
+    return classify(HR, hr)
+
+
+def flag_temp(t: Optional[float]) -> Optional[str]:
+    return classify(TEMP, t)
+
+
+def flag_glucose(g: Optional[float]) -> Optional[str]:
+    return classify(GLUCOSE, g)
+
+
+# ---- columns ----
+
+def codes(metric: Metric, *columns: Sequence[Optional[float]]) -> Any:
+    """Classify equally long columns in one pass; returns an int8 array of codes.
+
+    Columns may be lists containing ``None`` or float arrays using NaN for
+    missing values. Without NumPy a list of codes is returned instead.
+    """
+    if np is None:
+        index = {label: i for i, label in enumerate(metric.labels)}
+        return [MISSING if (f := classify(metric, *vals)) is None else index[f] for vals in zip(*columns, strict=True)]
+    arrays = [np.asarray(c, dtype=np.float64) for c in columns]
+    missing = np.isnan(arrays[0])
+    for a in arrays[1:]:
+        missing |= np.isnan(a)
+    out = np.zeros(arrays[0].shape, dtype=np.int8)
+    # Apply rules last-to-first so earlier (higher-priority) rules win
+    # (putmask is markedly cheaper than boolean-index assignment)
+    for label, rule in reversed(metric.rules):
+        np.putmask(out, rule(*arrays), metric.labels.index(label))
+    np.putmask(out, missing, MISSING)
+    return out
+
+
+def labels(metric: Metric, flag_codes: Any) -> List[Optional[str]]:
+    """Map codes back to flag strings (``None`` for missing)."""
+    if np is None:
+        return [None if c == MISSING else metric.labels[c] for c in flag_codes]
+    # code -1 picks the trailing None
+    lookup = np.array(metric.labels + (None,), dtype=object)
+    return lookup[np.asarray(flag_codes, dtype=np.intp)].tolist()
+
+
+def counts(metric: Metric, flag_codes: Any) -> Dict[str, int]:
+    """Tally codes per label (every label present, zero if unseen)."""
+    if np is None:
+        out = {label: 0 for label in metric.labels}
+        for c in flag_codes:
+            if c != MISSING:
+                out[metric.labels[c]] += 1
+        return out
+    c = np.asarray(flag_codes)
+    tally = np.bincount(c[c != MISSING].astype(np.intp), minlength=len(metric.labels))
+    return {label: int(n) for label, n in zip(metric.labels, tally, strict=True)}
+
+
+def flag_rows(rows: Sequence[Any]) -> Dict[str, List[Optional[str]]]:
+    """Flags for a list of vital records or row dicts, keyed ``bp_flag``, ``hr_flag``..."""
+    def column(field: str) -> List[Optional[float]]:
+        if rows and isinstance(rows[0], dict):
+            return [r.get(field) for r in rows]
+        return [getattr(r, field) for r in rows]
+
+    out: Dict[str, List[Optional[str]]] = {}
+    for metric in METRICS:
+        out[f"{metric.name}_flag"] = labels(metric, codes(metric, *(column(f) for f in metric.fields)))
+    return out
+
+
+def stamp_record(rec: Any) -> None:
+    """Set the stored ``*_flag`` columns of one vital record."""
+    for metric in METRICS:
+        setattr(rec, f"{metric.name}_flag", classify(metric, *(getattr(rec, f) for f in metric.fields)))
+
+
+def stamp_rows(rows: List[Dict[str, Any]]) -> None:
+    """Add ``*_flag`` keys to insert row dicts in place (one vectorized pass)."""
+    for key, values in flag_rows(rows).items():
+        for row, value in zip(rows, values, strict=True):
+            row[key] = value
+
+
+def resolve_filter(value: str) -> Optional[List[Tuple[Metric, str]]]:
+    """Parse a ``?flag=`` value: a label (``tachycardia``) or ``metric:label``
+    (``bp:normal``). A bare label matches every metric using it. ``None`` if unknown.
+    """
+    name, _, label = value.strip().lower().rpartition(":")
+    out = [(m, label) for m in METRICS if label in m.labels and name in ("", m.name)]
+    return out or None
+
+
+# ---- SQL ----
+
+def sql_case(metric: Metric, *columns: Any) -> Any:
+    """CASE expression evaluating ``metric`` in the database (NULL when missing)."""
+    return case(
+        (or_(*(c.is_(None) for c in columns)), None),
+        *((rule(*columns), label) for label, rule in metric.rules),
+        else_="normal",
+    )
@@ -0,0 +1,211 @@
+"""Per-user daily vitals rollups (``vital_daily_rollups``).
+
+Writes keep the rollups current in the same transaction as the raw rows:
+
+- inserts (single, batch, import) are aggregated per (user, day) in Python
+  and merged with one ``INSERT .. ON CONFLICT DO UPDATE`` that adds counts
+  and sums and widens min/max, so concurrent writers never lose updates;
+- updates and deletes recompute the affected day from ``vital_records``
+  (min/max cannot be "subtracted"), an indexed scan of one day's rows.
+
+``rebuild`` recomputes everything (or one user / a date range) with a single
+``INSERT .. SELECT .. GROUP BY`` for backfill and drift repair, and
+``period_flag_counts`` answers report periods from at most ~31 rollup rows
+plus the partial first day read from raw rows.
+"""
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import Date, case, cast, delete, func, insert, literal, select
+from sqlalchemy.orm import Session
+
+from ..models_vitals import (
+    ROLLUP_FIELDS, VitalDailyRollup, VitalRecord, flag_count_column,
+)
+from .vital_flags import METRICS
+
+
+rollups = VitalDailyRollup.__table__
+
+FLAG_COLUMNS: List[Tuple[str, str, str]] = [
+    (m.name, label, flag_count_column(m.name, label)) for m in METRICS for label in m.labels
+]
+ADDITIVE_COLUMNS = ["readings"] + [f"{f}_{s}" for f in ROLLUP_FIELDS for s in ("n", "sum", "sumsq")] \
+    + [c for _, _, c in FLAG_COLUMNS]
+
+
+def _day_start(day: date) -> datetime:
+    return datetime(day.year, day.month, day.day)
+
+
+def _day_expr(dialect: str, col: Any) -> Any:
+    if dialect == "sqlite":
+        # CAST(.. AS DATE) is numeric in SQLite; date() yields the ISO string Date expects
+        return func.date(col)
+    return cast(col, Date)
+
+
+def _flag_aggregates() -> List[Any]:
+    out = []
+    for metric, label, name in FLAG_COLUMNS:
+        flag_col = getattr(VitalRecord, f"{metric}_flag")
+        out.append(func.coalesce(func.sum(case((flag_col == label, 1), else_=0)), 0).label(name))
+    return out
+
+
+def _aggregate_columns() -> List[Any]:
+    """Aggregates of vital_records matching the rollup columns (minus keys)."""
+    cols: List[Any] = [func.count().label("readings")]
+    for f in ROLLUP_FIELDS:
+        c = getattr(VitalRecord, f)
+        cols += [
+            func.count(c).label(f"{f}_n"),
+            func.coalesce(func.sum(c), 0.0).label(f"{f}_sum"),
+            func.coalesce(func.sum(c * c), 0.0).label(f"{f}_sumsq"),
+            func.min(c).label(f"{f}_min"),
+            func.max(c).label(f"{f}_max"),
+        ]
+    return cols + _flag_aggregates()
+
+
+# ---- incremental maintenance ----
+
+def _empty(user_id: str, day: date, now: datetime) -> Dict[str, Any]:
+    out: Dict[str, Any] = {c: 0 for c in ADDITIVE_COLUMNS}
+    for f in ROLLUP_FIELDS:
+        out[f"{f}_min"] = out[f"{f}_max"] = None
+    out.update(user_id=user_id, day=day, updated_at=now)
+    return out
+
+
+def _upsert(db: Session, values: List[Dict[str, Any]]) -> None:
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as upsert_insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert as upsert_insert
+    stmt = upsert_insert(rollups)
+    new = stmt.excluded
+    set_: Dict[str, Any] = {c: rollups.c[c] + new[c] for c in ADDITIVE_COLUMNS}
+    for f in ROLLUP_FIELDS:
+        lo, hi = f"{f}_min", f"{f}_max"
+        # NULL-safe min/max: a NULL comparison falls through to the old value
+        set_[lo] = case((rollups.c[lo].is_(None), new[lo]), (new[lo] < rollups.c[lo], new[lo]), else_=rollups.c[lo])
+        set_[hi] = case((rollups.c[hi].is_(None), new[hi]), (new[hi] > rollups.c[hi], new[hi]), else_=rollups.c[hi])
+    set_["updated_at"] = new.updated_at
+    db.execute(stmt.on_conflict_do_update(index_elements=["user_id", "day"], set_=set_), values)
+
+
+def apply_inserted(db: Session, rows: Iterable[Dict[str, Any]]) -> None:
+    """Fold freshly inserted vital rows (dicts with flags stamped) into the rollups.
+
+    Does not commit; call inside the transaction that inserted ``rows``.
+    """
+    now = datetime.utcnow()
+    acc: Dict[Tuple[str, date], Dict[str, Any]] = {}
+    for row in rows:
+        key = (row["user_id"], row["created_at"].date())
+        agg = acc.get(key)
+        if agg is None:
+            agg = acc[key] = _empty(key[0], key[1], now)
+        agg["readings"] += 1
+        for f in ROLLUP_FIELDS:
+            v = row.get(f)
+            if v is None:
+                continue
+            agg[f"{f}_n"] += 1
+            agg[f"{f}_sum"] += v
+            agg[f"{f}_sumsq"] += v * v
+            lo, hi = f"{f}_min", f"{f}_max"
+            if agg[lo] is None or v < agg[lo]:
+                agg[lo] = v
+            if agg[hi] is None or v > agg[hi]:
+                agg[hi] = v
+        for metric, label, name in FLAG_COLUMNS:
+            if row.get(f"{metric}_flag") == label:
+                agg[name] += 1
+    if acc:
+        _upsert(db, list(acc.values()))
+
+
+def apply_record(db: Session, rec: VitalRecord) -> None:
+    """``apply_inserted`` for one flushed ORM record."""
+    row = {c: getattr(rec, c) for c in ("user_id", "created_at") + ROLLUP_FIELDS}
+    row.update({f"{m.name}_flag": getattr(rec, f"{m.name}_flag") for m in METRICS})
+    apply_inserted(db, [row])
+
+
+def recompute_statements(dialect: str, user_id: Optional[str] = None, since: Optional[date] = None,
+                         until: Optional[date] = None, now: Optional[datetime] = None) -> Tuple[Any, Any]:
+    """DELETE + INSERT .. SELECT replacing rollups in [since, until), optionally for one user."""
+    day = _day_expr(dialect, VitalRecord.created_at)
+    raw_filter, rollup_filter = [], []
+    if user_id is not None:
+        raw_filter.append(VitalRecord.user_id == user_id)
+        rollup_filter.append(rollups.c.user_id == user_id)
+    if since is not None:
+        raw_filter.append(VitalRecord.created_at >= _day_start(since))
+        rollup_filter.append(rollups.c.day >= since)
+    if until is not None:
+        raw_filter.append(VitalRecord.created_at < _day_start(until))
+        rollup_filter.append(rollups.c.day < until)
+    agg = _aggregate_columns()
+    sel = (
+        select(VitalRecord.user_id, day.label("day"), *agg,
+               literal(now or datetime.utcnow(), rollups.c.updated_at.type).label("updated_at"))
+        .where(*raw_filter)
+        .group_by(VitalRecord.user_id, day)
+    )
+    names = ["user_id", "day"] + [c.name for c in agg] + ["updated_at"]
+    return delete(rollups).where(*rollup_filter), insert(rollups).from_select(names, sel)
+
+
+def _recompute(db: Session, user_id: Optional[str], since: Optional[date], until: Optional[date],
+               now: datetime) -> int:
+    remove, fill = recompute_statements(db.get_bind().dialect.name, user_id, since, until, now)
+    db.execute(remove)
+    return db.execute(fill).rowcount
+
+
+def refresh_days(db: Session, user_id: str, days: Iterable[date]) -> None:
+    """Recompute the given days for one user (after an update or delete). No commit."""
+    now = datetime.utcnow()
+    for d in sorted(set(days)):
+        _recompute(db, user_id, d, d + timedelta(days=1), now)
+
+
+def rebuild(db: Session, user_id: Optional[str] = None, since: Optional[date] = None) -> int:
+    """Recompute rollups from raw rows (all users, or one; from ``since`` on). Commits.
+
+    Returns the number of rollup rows written (-1 if the driver does not report it).
+    """
+    n = _recompute(db, user_id, since, None, datetime.utcnow())
+    db.commit()
+    return n
+
+
+# ---- reads ----
+
+def period_flag_counts(db: Session, user_id: str, start: datetime) -> Tuple[int, Dict[str, Dict[str, int]]]:
+    """Reading total and per-metric flag counts for ``created_at >= start``.
+
+    Whole days come from the rollups; the partial first day is aggregated
+    from raw rows so the result matches a scan of ``vital_records``.
+    """
+    first_full = start.date() + timedelta(days=1)
+    flag_cols = [rollups.c[name] for _, _, name in FLAG_COLUMNS]
+    rolled = db.execute(
+        select(func.coalesce(func.sum(rollups.c.readings), 0), *(func.coalesce(func.sum(c), 0) for c in flag_cols))
+        .where(rollups.c.user_id == user_id, rollups.c.day >= first_full)
+    ).one()
+    edge = db.execute(
+        select(func.count(), *_flag_aggregates())
+        .where(VitalRecord.user_id == user_id, VitalRecord.created_at >= start,
+               VitalRecord.created_at < _day_start(first_full))
+    ).one()
+    total = int(rolled[0]) + int(edge[0])
+    counts: Dict[str, Dict[str, int]] = {m.name: {} for m in METRICS}
+    for i, (metric, label, _name) in enumerate(FLAG_COLUMNS, start=1):
+        counts[metric][label] = int(rolled[i]) + int(edge[i])
+    return total, counts
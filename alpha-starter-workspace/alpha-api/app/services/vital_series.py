@@ -0,0 +1,177 @@
+"""Chart series for one vital field: time buckets or LTTB-downsampled points.
+
+- ``bucket_stats`` aggregates count/min/avg/max per hour, day or ISO week
+  inside the database (``GROUP BY`` on a truncated ``created_at``), so only
+  one row per bucket leaves it.
+- ``downsample`` streams the raw readings ordered by time (``yield_per``)
+  through Largest-Triangle-Three-Buckets. It holds at most two LTTB buckets
+  in memory and picks each bucket's point with one vectorized area
+  computation, so a year of minute-level data reduces to a few hundred
+  points without being loaded at once.
+"""
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from itertools import islice
+from typing import Any, Iterable, Iterator, List, Sequence, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from ..models_vitals import VitalRecord
+
+try:
+    import numpy as np  # type: ignore
+except Exception:
+    np = None  # type: ignore
+
+
+STREAM_BATCH = 5000
+EPOCH = datetime(1970, 1, 1)
+
+Point = Tuple[float, float]  # (seconds since epoch, value)
+
+
+def _bucket_expr(dialect: str, bucket: str) -> Any:
+    col = VitalRecord.created_at
+    if dialect == "sqlite":
+        if bucket == "hour":
+            return func.strftime("%Y-%m-%d %H:00:00", col)
+        if bucket == "day":
+            return func.date(col)
+        # Monday of the week: jump to the coming Sunday (or stay), then back 6 days
+        return func.date(col, "weekday 0", "-6 days")
+    return func.date_trunc(bucket, col)
+
+
+def _range_filter(field: str, user_id: str, start: datetime, end: datetime) -> List[Any]:
+    col = getattr(VitalRecord, field)
+    return [VitalRecord.user_id == user_id, VitalRecord.created_at >= start,
+            VitalRecord.created_at < end, col.is_not(None)]
+
+
+def bucket_stats(db: Session, user_id: str, field: str, bucket: str,
+                 start: datetime, end: datetime) -> List[Tuple[datetime, int, float, float, float]]:
+    """``(bucket_start, count, min, avg, max)`` for each non-empty bucket in [start, end)."""
+    col = getattr(VitalRecord, field)
+    key = _bucket_expr(db.get_bind().dialect.name, bucket).label("bucket")
+    rows = db.execute(
+        select(key, func.count(), func.min(col), func.avg(col), func.max(col))
+        .where(*_range_filter(field, user_id, start, end))
+        .group_by(key)
+        .order_by(key)
+    ).all()
+    out = []
+    for b, n, lo, avg, hi in rows:
+        if isinstance(b, str):  # SQLite returns the truncated timestamp as text
+            b = datetime.fromisoformat(b)
+        out.append((b, int(n), float(lo), float(avg), float(hi)))
+    return out
+
+
+def count_points(db: Session, user_id: str, field: str, start: datetime, end: datetime) -> int:
+    return db.execute(
+        select(func.count()).select_from(VitalRecord).where(*_range_filter(field, user_id, start, end))
+    ).scalar_one()
+
+
+def _epoch_expr(dialect: str) -> Any:
+    col = VitalRecord.created_at
+    if dialect == "sqlite":
+        return (func.julianday(col) - 2440587.5) * 86400.0
+    return func.extract("epoch", col)
+
+
+def stream_points(db: Session, user_id: str, field: str, start: datetime, end: datetime) -> Iterator[Point]:
+    """Readings in [start, end) oldest first, fetched ``STREAM_BATCH`` rows at a time.
+
+    Timestamps arrive as epoch seconds computed by the database and rows go
+    through Core (not ORM loading), which keeps per-row Python work minimal.
+    """
+    col = getattr(VitalRecord, field)
+    result = db.connection().execute(
+        select(_epoch_expr(db.get_bind().dialect.name), col)
+        .where(*_range_filter(field, user_id, start, end))
+        .order_by(VitalRecord.created_at, VitalRecord.id)
+        .execution_options(yield_per=STREAM_BATCH)
+    )
+    for partition in result.partitions():
+        yield from map(tuple, partition)
+
+
+def to_datetime(t: float) -> datetime:
+    # julianday() arithmetic carries ~10 us of float noise; readings are not that precise
+    return EPOCH + timedelta(milliseconds=round(t * 1000))
+
+
+def _pick(bucket: Sequence[Point], a: Point, c: Point) -> Point:
+    """The point of ``bucket`` forming the largest triangle with ``a`` and ``c``."""
+    (ax, ay), (cx, cy) = a, c
+    if np is None:
+        return max(bucket, key=lambda b: abs((ax - cx) * (b[1] - ay) - (ax - b[0]) * (cy - ay)))
+    pts = np.asarray(bucket, dtype=np.float64)
+    area = np.abs((ax - cx) * (pts[:, 1] - ay) - (ax - pts[:, 0]) * (cy - ay))
+    return bucket[int(area.argmax())]
+
+
+def _mean(bucket: Sequence[Point]) -> Point:
+    if np is None:
+        return sum(p[0] for p in bucket) / len(bucket), sum(p[1] for p in bucket) / len(bucket)
+    mx, my = np.asarray(bucket, dtype=np.float64).mean(axis=0)
+    return float(mx), float(my)
+
+
+def lttb(points: Iterable[Point], n: int, threshold: int) -> List[Point]:
+    """Largest-Triangle-Three-Buckets over ``n`` time-ordered points, keeping ``threshold``.
+
+    ``points`` is consumed once; only the current and the next bucket are
+    held. The first and last points are always kept. If ``n`` turns out
+    stale (rows written meanwhile) the output is still well formed, the last
+    bucket absorbing or lacking the difference.
+    """
+    it = iter(points)
+    if threshold >= n or threshold < 3:
+        return list(it)
+    first = next(it, None)
+    if first is None:
+        return []
+    inner = threshold - 2
+
+    def read(i: int) -> List[Point]:
+        # Bucket i spans middle points [i*(n-2)//inner, (i+1)*(n-2)//inner); integer math avoids float drift
+        return list(islice(it, (i + 1) * (n - 2) // inner - i * (n - 2) // inner))
+
+    out = [first]
+    current = read(0)
+    for i in range(inner):
+        if i + 1 < inner:
+            following = read(i + 1)
+            c = _mean(following) if following else None
+        else:
+            rest = list(it)
+            current += rest[:-1]
+            following = rest[-1:]
+            c = following[0] if following else None
+        if not current:
+            break
+        if c is None:
+            # Ran out of rows early: the last one read becomes the final point
+            current, c = current[:-1], current[-1]
+            if current:
+                out.append(_pick(current, out[-1], c))
+            out.append(c)
+            return out
+        out.append(_pick(current, out[-1], c))
+        current = following
+    if current:
+        out.append(current[-1])
+    return out
+
+
+def downsample(db: Session, user_id: str, field: str, start: datetime, end: datetime,
+               threshold: int) -> Tuple[int, List[Point]]:
+    """``(readings_in_range, points)`` with at most ``threshold`` points."""
+    n = count_points(db, user_id, field, start, end)
+    if n == 0:
+        return 0, []
+    return n, lttb(stream_points(db, user_id, field, start, end), n, threshold)
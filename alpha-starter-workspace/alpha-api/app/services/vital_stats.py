@@ -0,0 +1,88 @@
+"""Per-field statistics of a user's readings over an arbitrary time range.
+
+``range_stats`` makes one streaming pass over ``[start, end)`` (Core
+``yield_per``, no ordering) and feeds every field's values into a
+``Moments`` (exact count/mean/stddev/min/max) and a ``KLLSketch``
+(p50/p90/p99 within about 1% of rank). Memory is bounded by the batch size
+plus the sketches, however many readings the range holds. Both summaries
+are mergeable, so per-day results could be stored and combined later
+instead of rescanning.
+"""
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..models_vitals import VITAL_FIELDS, VitalRecord
+from .quantile_sketch import KLLSketch, Moments
+
+try:
+    import numpy as np  # type: ignore
+except Exception:
+    np = None  # type: ignore
+
+
+STREAM_BATCH = 5000
+QUANTILES = (0.5, 0.9, 0.99)
+
+
+class FieldStats:
+    __slots__ = ("moments", "sketch")
+
+    def __init__(self, k: int, seed: Optional[int] = 0) -> None:
+        self.moments = Moments()
+        # Fixed seed: the same readings always give the same report
+        self.sketch = KLLSketch(k=k, seed=seed)
+
+    def update_many(self, values: Any) -> None:
+        self.moments.update_many(values)
+        self.sketch.update_many(values)
+
+    def merge(self, other: "FieldStats") -> None:
+        self.moments.merge(other.moments)
+        self.sketch.merge(other.sketch)
+
+    def summary(self, qs: Sequence[float] = QUANTILES) -> Dict[str, Any]:
+        m = self.moments
+        out: Dict[str, Any] = {"count": m.n, "mean": m.mean if m.n else None, "stddev": m.stddev,
+                               "min": m.min, "max": m.max}
+        for q, v in zip(qs, self.sketch.quantiles(qs), strict=True):
+            out[f"p{round(q * 100):d}"] = v
+        return out
+
+
+def _feed(stats: Dict[str, FieldStats], rows: Sequence[Tuple[Any, ...]]) -> None:
+    if np is not None:
+        # None -> NaN with a float dtype
+        block = np.array(rows, dtype=np.float64)
+        for i, f in enumerate(VITAL_FIELDS):
+            col = block[:, i]
+            col = col[~np.isnan(col)]
+            if len(col):
+                stats[f].update_many(col)
+        return
+    for i, f in enumerate(VITAL_FIELDS):
+        col = [r[i] for r in rows if r[i] is not None]
+        if col:
+            stats[f].update_many(col)
+
+
+def range_stats(db: Session, user_id: str, start: datetime, end: datetime,
+                k: Optional[int] = None) -> Tuple[int, Dict[str, FieldStats]]:
+    """``(readings, {field: FieldStats})`` for readings in ``[start, end)``."""
+    k = k or settings.REPORT_SKETCH_K
+    stats = {f: FieldStats(k) for f in VITAL_FIELDS}
+    result = db.connection().execute(
+        select(*[getattr(VitalRecord, f) for f in VITAL_FIELDS])
+        .where(VitalRecord.user_id == user_id, VitalRecord.created_at >= start, VitalRecord.created_at < end)
+        .execution_options(yield_per=STREAM_BATCH)
+    )
+    readings = 0
+    for partition in result.partitions():
+        readings += len(partition)
+        _feed(stats, [tuple(r) for r in partition])
+    return readings, stats
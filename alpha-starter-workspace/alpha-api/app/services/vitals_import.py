@@ -0,0 +1,120 @@
+"""Incremental parsing of bulk vitals uploads (NDJSON or CSV).
+
+The request body is consumed chunk by chunk and records are yielded one line
+at a time, so memory use is bounded by the longest accepted line rather than
+by the size of the upload.
+"""
+from __future__ import annotations
+
+import csv
+import json
+import logging
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from pydantic import ValidationError
+
+from ..config import settings
+from . import metrics
+
+
+logger = logging.getLogger("alpha.vitals_import")
+
+import_rows = metrics.counter(
+    "alpha_vitals_import_rows_total", "Rows processed by streaming vitals imports by outcome.", ("outcome",))
+import_chunks = metrics.histogram(
+    "alpha_vitals_import_chunk_seconds", "Time to insert and commit one import chunk.")
+
+
+FORMATS = ("ndjson", "csv")
+
+# (1-based line number, record or None, error message or None)
+ParsedLine = Tuple[int, Optional[Dict[str, Any]], Optional[str]]
+
+
+def validation_message(exc: ValidationError) -> str:
+    err = exc.errors()[0]
+    loc = ".".join(str(p) for p in err.get("loc", ())) or "record"
+    return f"{loc}: {err.get('msg', 'invalid value')}"
+
+
+def detect_format(explicit: Optional[str], content_type: Optional[str]) -> Optional[str]:
+    """Pick the upload format from ``?format=`` or the Content-Type header."""
+    if explicit:
+        fmt = explicit.strip().lower()
+        return fmt if fmt in FORMATS else None
+    ctype = (content_type or "").split(";")[0].strip().lower()
+    if ctype in ("text/csv", "application/csv"):
+        return "csv"
+    return "ndjson"
+
+
+def _decode(line: bytes) -> str:
+    return line.rstrip(b"\r").decode("utf-8", errors="replace")
+
+
+async def iter_lines(chunks: AsyncIterator[bytes], max_line_bytes: int) -> AsyncIterator[Tuple[int, Optional[str]]]:
+    """Split a byte stream into decoded lines.
+
+    Lines longer than ``max_line_bytes`` (UTF-8 bytes, line ending excluded)
+    are reported as ``(line_no, None)``; a partial one is dropped as soon as
+    it is over the limit instead of being buffered. Splitting happens on raw
+    bytes, which is safe because ``\n`` never occurs inside a UTF-8 sequence.
+    """
+    buf = b""
+    line_no = 0
+    skipping = False
+    async for chunk in chunks:
+        buf += chunk
+        start = 0
+        while True:
+            nl = buf.find(b"\n", start)
+            if nl < 0:
+                break
+            line_no += 1
+            line = buf[start:nl].rstrip(b"\r")
+            if skipping or len(line) > max_line_bytes:
+                skipping = False
+                yield line_no, None
+            else:
+                yield line_no, _decode(line)
+            start = nl + 1
+        buf = buf[start:]
+        # + 1: the partial line may end in the "\r" of a "\r\n"
+        if len(buf) > max_line_bytes + 1:
+            skipping = True
+            buf = b""
+    if skipping or buf.strip():
+        line_no += 1
+        line = buf.rstrip(b"\r")
+        yield line_no, (None if skipping or len(line) > max_line_bytes else _decode(line))
+
+
+async def iter_records(chunks: AsyncIterator[bytes], fmt: str) -> AsyncIterator[ParsedLine]:
+    """Yield one raw record (a dict of strings/numbers) per non-blank data line."""
+    header: Optional[List[str]] = None
+    async for line_no, line in iter_lines(chunks, settings.VITALS_IMPORT_MAX_LINE_BYTES):
+        if line is None:
+            yield line_no, None, "Line too long"
+            continue
+        if not line.strip():
+            continue
+        if fmt == "csv":
+            cells = next(csv.reader([line]))
+            if header is None:
+                header = [c.strip().lower() for c in cells]
+                continue
+            if len(cells) != len(header):
+                yield line_no, None, f"Expected {len(header)} columns, got {len(cells)}"
+                continue
+            # empty cells mean "not measured"
+            yield line_no, {k: v.strip() for k, v in zip(header, cells, strict=True) if k and v.strip()}, None
+            continue
+        try:
+            obj = json.loads(line)
+        except ValueError:
+            yield line_no, None, "Invalid JSON"
+            continue
+        if not isinstance(obj, dict):
+            yield line_no, None, "Expected a JSON object"
+            continue
+        yield line_no, obj, None
@@ -0,0 +1,17 @@
+"""Environment defaults for benchmarks; import before anything from ``app``.
+
+``app.config`` reads settings at import time, so each benchmark imports this
+module first. Values already in the environment win, e.g. a scratch Postgres
+via ``DATABASE_URL=postgresql://... python -m benchmarks.bench_indexes``.
+Without a ``DATABASE_URL`` each run gets a fresh SQLite file in a temp
+directory (``/tmp/alpha-bench-*``).
+"""
+import os
+import tempfile
+
+if "DATABASE_URL" not in os.environ:
+    os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp(prefix='alpha-bench-')}/bench.db"
+os.environ.setdefault("JWT_SECRET", "bench-secret-bench-secret-bench-secret")
+os.environ.setdefault("JWT_ALG", "HS256")
+os.environ.setdefault("JWT_EXPIRE_MINUTES", "60")
+os.environ.setdefault("CORS_ORIGINS", "[]")
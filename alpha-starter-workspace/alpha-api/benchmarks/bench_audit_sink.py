@@ -0,0 +1,54 @@
+"""Request throughput with and without the background audit sink.
+
+Usage (from alpha-api/):  python -m benchmarks.bench_audit_sink [requests]
+"""
+import sys
+import time
+
+from . import _env  # noqa: F401  (environment defaults, before any app import)
+
+from fastapi.testclient import TestClient  # type: ignore
+
+from app.main import app  # type: ignore
+from app.db import SessionLocal  # type: ignore
+from app import models  # type: ignore
+from app.services.audit_sink import audit_sink  # type: ignore
+
+
+def run_once(client: TestClient, headers, n: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(n):
+        client.get("/auth/me", headers=headers)
+    return n / (time.perf_counter() - t0)
+
+
+def audit_rows() -> int:
+    db = SessionLocal()
+    try:
+        return db.query(models.AuditEvent).count()
+    finally:
+        db.close()
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    client = TestClient(app)
+    r = client.post("/auth/register", json={"email": "bench@example.com", "password": "bench1234"})
+    headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+    run_once(client, headers, 50)  # warm-up
+
+    before = audit_rows()
+    sync_rps = run_once(client, headers, n)
+    print(f"sync audit writes : {sync_rps:8.1f} req/s  ({audit_rows() - before} rows)")
+
+    audit_sink.start()
+    before = audit_rows()
+    sink_rps = run_once(client, headers, n)
+    audit_sink.stop()
+    print(f"background sink   : {sink_rps:8.1f} req/s  ({audit_rows() - before} rows)")
+    print(f"speed-up          : {sink_rps / sync_rps:8.2f}x")
+    print(f"sink counters     : {audit_sink.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Per-request auth overhead: legacy double JWT verification vs the shared,
+cached auth context.
+
+Usage (from alpha-api/):  python -m benchmarks.bench_auth_overhead [iterations]
+"""
+import os
+import sys
+import time
+
+# In-memory database (set before _env, which would pick a temp file)
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+from . import _env  # noqa: F401  (environment defaults, before any app import)
+os.environ.setdefault("ALPHA_DISABLE_CREATE_ALL", "1")
+
+import jwt  # type: ignore
+from starlette.requests import Request  # type: ignore
+
+from app.config import settings  # type: ignore
+from app import security  # type: ignore
+
+
+def make_request(token: str) -> Request:
+    return Request({
+        "type": "http",
+        "method": "GET",
+        "path": "/vitals",
+        "headers": [(b"authorization", f"Bearer {token}".encode())],
+    })
+
+
+def legacy(token: str) -> None:
+    # audit_middleware + get_current_user each verified the token
+    for _ in range(2):
+        jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.JWT_ALG])
+
+
+def shared(token: str) -> None:
+    req = make_request(token)
+    security.get_auth_context(req)  # middleware
+    security.get_auth_context(req)  # get_current_user
+
+
+def bench(fn, token: str, n: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(n):
+        fn(token)
+    return (time.perf_counter() - t0) / n * 1e6
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    token = security.create_access_token("bench-user")
+    legacy_us = bench(legacy, token, n)
+    shared_us = bench(shared, token, n)
+    print(f"legacy (2x jwt.decode)      : {legacy_us:7.2f} us/request")
+    print(f"shared context + claims TTL : {shared_us:7.2f} us/request")
+    print(f"speed-up                    : {legacy_us / shared_us:7.2f}x")
+    print(f"claims cache                : {security.claims_cache.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""Cohort analytics: time and memory over a large population.
+
+Seeds U users with random profiles (age, sex, activity level; 5% without a
+profile) and R readings in total, spread over the last 90 days, then builds
+the daily rollups. It runs the BP cohort query grouped by all three
+dimensions:
+
+- from the raw readings and from the rollups, with 1 and with W concurrent
+  chunk statements;
+- once more from the cache.
+
+It checks that both sources agree. Memory is the process RSS growth during
+each query. It stays flat because only one GROUP BY result per chunk is
+alive at a time.
+
+Usage (from alpha-api/):  python -m benchmarks.bench_cohorts [users] [readings] [workers]
+"""
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from . import _env  # noqa: F401  (environment defaults, before any app import)
+
+from sqlalchemy import insert  # noqa: E402
+
+from app import models, models_goals  # noqa: E402,F401  (register tables)
+from app.db import Base, SessionLocal, engine  # noqa: E402
+from app.models_vitals import VitalRecord  # noqa: E402
+from app.services import cohorts, vital_flags, vital_rollups  # noqa: E402
+from app.services.cohorts import cohort_engine  # noqa: E402
+
+
+def rss_mib() -> float:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def seed(db, n_users: int, n_readings: int) -> None:
+    rnd = random.Random(3)
+    ids = sorted(str(uuid.uuid4()) for _ in range(n_users))
+    db.execute(insert(models.User.__table__),
+               [{"id": uid, "email": f"c{i}@example.com", "password_hash": "x"} for i, uid in enumerate(ids)])
+    now = datetime.utcnow()
+    db.execute(insert(models.HealthProfile.__table__), [
+        {"id": str(uuid.uuid4()), "user_id": uid, "age": rnd.randint(16, 90),
+         "sex": rnd.choice(("male", "female", None)), "activity_level": rnd.choice(("sedentary", "light", "moderate", "active")),
+         "created_at": now, "updated_at": now}
+        for uid in ids if rnd.random() > 0.05
+    ])
+    db.commit()
+    start = now - timedelta(days=90)
+    rows = []
+    for i in range(n_readings):
+        uid = ids[i % n_users]
+        rows.append({"id": str(uuid.uuid4()), "user_id": uid,
+                     "created_at": start + timedelta(seconds=rnd.randint(0, 90 * 86400 - 1)),
+                     "systolic": rnd.gauss(120, 18), "diastolic": rnd.gauss(78, 11),
+                     "heart_rate": rnd.gauss(72, 12), "temperature_c": None, "glucose_mgdl": None, "weight_kg": None})
+        if len(rows) == 50000:
+            vital_flags.stamp_rows(rows)
+            db.execute(insert(VitalRecord.__table__), rows)
+            db.commit()
+            rows.clear()
+    if rows:
+        vital_flags.stamp_rows(rows)
+        db.execute(insert(VitalRecord.__table__), rows)
+        db.commit()
+    vital_rollups.rebuild(db)
+
+
+def timed(q, workers: int) -> dict:
+    base = rss_mib()
+    t0 = time.perf_counter()
+    result = cohort_engine.compute(q, workers=workers)
+    return {"s": time.perf_counter() - t0, "rss": rss_mib() - base, "result": result}
+
+
+def main():
+    n_users = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    n_readings = int(sys.argv[2]) if len(sys.argv) > 2 else 2_000_000
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else 4
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    t0 = time.perf_counter()
+    seed(db, n_users, n_readings)
+    db.close()
+    print(f"seeded {n_users} users, {n_readings} readings (+ rollups) in {time.perf_counter() - t0:.0f} s "
+          f"({os.cpu_count()} CPUs)")
+
+    out = {}
+    for source in cohorts.SOURCES:
+        q = cohorts.make_query("bp", None, (datetime.utcnow() - timedelta(days=91)).date(), None, source)
+        for w in (1, workers):
+            r = timed(q, w)
+            out[source] = r["result"]
+            readings = sum(c["readings"] for c in r["result"]["cohorts"])
+            print(f"{source:8s} workers={w}: {r['s']:6.2f} s  {readings / r['s'] / 1e6:6.2f}M readings/s  "
+                  f"{len(r['result']['cohorts'])} cohorts in {r['result']['chunks']} chunks  RSS growth {r['rss']:5.1f} MiB")
+    a, b = out["rollups"]["cohorts"], out["readings"]["cohorts"]
+    assert [(c["users"], c["readings"], c["flags"]) for c in a] == [(c["users"], c["readings"], c["flags"]) for c in b]
+    assert sum(c["readings"] for c in a) == n_readings
+
+    q = cohorts.make_query("bp", None, (datetime.utcnow() - timedelta(days=91)).date(), None, "rollups")
+    cohort_engine.get(q)
+    t0 = time.perf_counter()
+    _, cached = cohort_engine.get(q)
+    print(f"cached   : {(time.perf_counter() - t0) * 1000:.3f} ms (hit={cached})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Polling simulation: unconditional GETs vs ETag / If-None-Match revalidation.
+
+U users each poll /vitals, /symptoms, /goals, /reminders and /profiles/me
+for R rounds. Before each round a user writes a new vital with probability
+W. The same schedule is replayed twice, once by clients that ignore ETags
+and once by clients that revalidate with If-None-Match. Reports DB statements
+and DB time per poll (from the DEBUG ``X-DB-*`` headers), wall time and
+bytes sent.
+
+Usage (from alpha-api/):  python -m benchmarks.bench_conditional_get [users] [rounds] [write_prob]
+"""
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+from . import _env  # noqa: F401  (environment defaults, before any app import)
+os.environ.setdefault("DEBUG", "1")
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.main import app  # noqa: E402
+
+PATHS = ("/vitals", "/symptoms", "/goals", "/reminders", "/profiles/me")
+
+
+def setup_users(client, n_users: int):
+    tokens = []
+    for u in range(n_users):
+        r = client.post("/auth/register", json={"email": f"poll{u}@example.com", "password": "pass1234"})
+        h = {"Authorization": f"Bearer {r.json()['access_token']}"}
+        start = datetime.utcnow() - timedelta(days=30)
+        r = client.post("/vitals/batch", headers=h, json={"readings": [
+            {"heart_rate": 60 + i % 30, "systolic": 110 + i % 25, "measured_at": (start + timedelta(hours=i)).isoformat()}
+            for i in range(200)
+        ]})
+        statuses = [r.status_code]
+        for i in range(30):
+            r = client.post("/symptoms", headers=h, json={"description": f"headache {i}", "severity": "mild"})
+            statuses.append(r.status_code)
+        for i in range(10):
+            r = client.post("/goals", headers=h, json={"category": "fitness", "target_value": f"{8000 + i} steps",
+                                                       "cadence": "daily"})
+            statuses.append(r.status_code)
+            r = client.post("/reminders", headers=h, json={"message": f"meds {i}",
+                                                           "scheduled_at": (datetime.utcnow() + timedelta(days=i + 1)).isoformat()})
+            statuses.append(r.status_code)
+        statuses.append(client.put("/profiles/me", headers=h, json={"age": 30 + u}).status_code)
+        assert all(s in (200, 201) for s in statuses), statuses
+        tokens.append(h)
+    return tokens
+
+
+def simulate(client, tokens, rounds: int, write_prob: float, conditional: bool) -> dict:
+    rnd = random.Random(11)
+    etags = {}
+    out = {"polls": 0, "not_modified": 0, "statements": 0, "db_ms": 0.0, "bytes": 0}
+    t0 = time.perf_counter()
+    for _ in range(rounds):
+        for u, h in enumerate(tokens):
+            if rnd.random() < write_prob:
+                client.post("/vitals", headers=h, json={"heart_rate": rnd.randint(55, 95)})
+            for path in PATHS:
+                headers = dict(h)
+                if conditional and (u, path) in etags:
+                    headers["If-None-Match"] = etags[(u, path)]
+                r = client.get(path, headers=headers)
+                assert r.status_code in (200, 304), r.text
+                etags[(u, path)] = r.headers["ETag"]
+                out["polls"] += 1
+                out["not_modified"] += r.status_code == 304
+                out["statements"] += int(r.headers.get("X-DB-Query-Count", 0))
+                out["db_ms"] += float(r.headers.get("X-DB-Time-Ms", 0))
+                out["bytes"] += len(r.content)
+    out["wall_s"] = time.perf_counter() - t0
+    return out
+
+
+def main():
+    n_users = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 30
+    write_prob = float(sys.argv[3]) if len(sys.argv) > 3 else 0.05
+    with TestClient(app) as client:
+        tokens = setup_users(client, n_users)
+        results = {}
+        for mode, conditional in (("unconditional", False), ("if-none-match", True)):
+            results[mode] = simulate(client, tokens, rounds, write_prob, conditional)
+    print(f"{n_users} users x {rounds} rounds x {len(PATHS)} endpoints, write probability {write_prob}")
+    for mode, r in results.items():
+        p = r["polls"]
+        print(f"{mode:14s}: {r['statements'] / p:5.2f} stmts/poll  {r['db_ms'] / p:6.3f} ms DB/poll  "
+              f"{r['wall_s'] / p * 1000:6.2f} ms/poll  {r['bytes'] / p / 1024:7.2f} KiB/poll  "
+              f"304s {r['not_modified'] / p:6.1%}")
+    a, b = results["unconditional"], results["if-none-match"]
+    print(f"DB time reduction: {1 - b['db_ms'] / a['db_ms']:.1%}, statements: {1 - b['statements'] / a['statements']:.1%}")
+
+
+if __name__ == "__main__":
+    main()
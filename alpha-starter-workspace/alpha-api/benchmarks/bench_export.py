@@ -0,0 +1,101 @@
+"""Streaming exports: time and memory for a multi-million-row vitals export.
+
+Seeds one user with N minute-level readings (default 5,000,000, ~9.5 years),
+then drains ``exports.stream`` for each format exactly as ``StreamingResponse``
+would, counting bytes. Memory is the process RSS sampled after every chunk,
+reported as growth over the RSS before the export started. It stays flat
+because only one ``yield_per`` batch is alive at a time. For contrast, the
+old shape (load every row, then encode once) is measured on the first
+``baseline_rows`` rows.
+
+Usage (from alpha-api/):  python -m benchmarks.bench_export [rows] [baseline_rows]
+"""
+import os
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from . import _env  # noqa: F401  (environment defaults, before any app import)
+
+from sqlalchemy import insert, select  # noqa: E402
+
+from app import models, models_goals  # noqa: E402,F401  (register tables)
+from app.db import Base, SessionLocal, engine  # noqa: E402
+from app.models_vitals import VitalRecord  # noqa: E402
+from app.responses import dumps  # noqa: E402
+from app.services import exports, vital_flags  # noqa: E402
+
+
+def rss_mib() -> float:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def seed(db, user_id: str, n: int) -> None:
+    start = datetime.utcnow() - timedelta(minutes=n)
+    for lo in range(0, n, 50000):
+        rows = [{"id": str(uuid.uuid4()), "user_id": user_id, "created_at": start + timedelta(minutes=i),
+                 "systolic": 110.0 + i % 50, "diastolic": 70.0 + i % 30, "heart_rate": 55.0 + i % 70,
+                 "temperature_c": 36.0 + (i % 30) / 10, "glucose_mgdl": None if i % 4 else 80.0 + i % 120,
+                 "weight_kg": None if i % 1440 else 80.0}
+                for i in range(lo, min(n, lo + 50000))]
+        vital_flags.stamp_rows(rows)
+        db.execute(insert(VitalRecord.__table__), rows)
+        db.commit()
+
+
+def drain(chunks) -> dict:
+    base = rss_mib()
+    peak = base
+    size = n_chunks = 0
+    t0 = time.perf_counter()
+    for chunk in chunks:
+        size += len(chunk)
+        n_chunks += 1
+        if n_chunks % 20 == 0:
+            peak = max(peak, rss_mib())
+    return {"s": time.perf_counter() - t0, "bytes": size, "chunks": n_chunks, "rss_growth": max(peak, rss_mib()) - base}
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000_000
+    baseline_rows = int(sys.argv[2]) if len(sys.argv) > 2 else 500_000
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    user = models.User(id=str(uuid.uuid4()), email="export@example.com", password_hash="x")
+    db.add(user)
+    db.commit()
+    t0 = time.perf_counter()
+    seed(db, user.id, n)
+    print(f"seeded {n} readings in {time.perf_counter() - t0:.0f} s")
+
+    formats = [f for f in exports.FORMATS if f != "parquet" or exports.parquet_available()]
+    if "parquet" not in formats:
+        print("parquet: skipped (pyarrow not installed)")
+    for fmt in formats:
+        r = drain(exports.stream("vitals", fmt, user.id))
+        print(f"stream {fmt:8s}: {r['s']:7.1f} s  {n / r['s'] / 1000:6.0f}k rows/s  "
+              f"{r['bytes'] / 2**20:8.1f} MiB in {r['chunks']} chunks  RSS growth {r['rss_growth']:6.1f} MiB")
+
+    # Load-everything baseline (ndjson), on a prefix so it fits in memory
+    cols = [col for _, col, _ in exports.DATASETS["vitals"]]
+    base = rss_mib()
+    t0 = time.perf_counter()
+    rows = [tuple(r) for r in db.execute(
+        select(*cols).where(VitalRecord.user_id == user.id).order_by(VitalRecord.created_at).limit(baseline_rows))]
+    keys = exports.keys("vitals")
+    body = b"".join(dumps(dict(zip(keys, r, strict=True))) + b"\n" for r in rows)
+    dt = time.perf_counter() - t0
+    growth = rss_mib() - base
+    print(f"buffered ndjson ({len(rows)} rows): {dt:6.1f} s  {len(body) / 2**20:7.1f} MiB body  "
+          f"RSS growth {growth:6.1f} MiB  (~{growth * n / len(rows) / 1024:.1f} GiB at {n} rows)")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
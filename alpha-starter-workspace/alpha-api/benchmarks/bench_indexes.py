@@ -0,0 +1,176 @@
+"""Seed a large dataset and compare plans/latency of the hot per-user queries
+with and without the composite / partial indexes from migration 0008.
+
+Usage (from alpha-api/):
+    python -m benchmarks.bench_indexes [vital_rows] [users]
+
+Uses DATABASE_URL if set (e.g. a scratch Postgres), otherwise a temp SQLite file.
+"""
+import random
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from . import _env  # noqa: F401  (environment defaults, before any app import)
+
+from sqlalchemy import insert, select, text  # type: ignore
+
+from app.db import Base, engine  # type: ignore
+from app import models  # type: ignore
+from app.models_vitals import VitalRecord  # type: ignore
+from app.models_symptoms import SymptomRecord  # type: ignore
+from app.models_goals import Goal, GoalProgress  # type: ignore
+from app.models_reminders import Reminder  # type: ignore
+
+
+NEW_INDEXES = [
+    ("ix_vital_records_user_id_created_at", VitalRecord.__table__),
+    ("ix_symptom_reports_user_id_created_at", SymptomRecord.__table__),
+    ("ix_audit_events_user_id_created_at", models.AuditEvent.__table__),
+    ("ix_goals_user_id_created_at", Goal.__table__),
+    ("ix_goal_progress_user_id_goal_id_created_at", GoalProgress.__table__),
+    ("ix_reminders_user_id_scheduled_at", Reminder.__table__),
+    ("ix_reminders_pending_scheduled_at", Reminder.__table__),
+]
+CHUNK = 50000
+
+
+def _index(name, table):
+    return next(i for i in table.indexes if i.name == name)
+
+
+def _bulk(conn, table, rows):
+    buf = []
+    for row in rows:
+        buf.append(row)
+        if len(buf) >= CHUNK:
+            conn.execute(insert(table), buf)
+            buf = []
+    if buf:
+        conn.execute(insert(table), buf)
+
+
+def seed(n_vitals: int, n_users: int):
+    rnd = random.Random(42)
+    now = datetime.utcnow()
+    span = 365 * 24 * 3600
+    users = [str(uuid.uuid4()) for _ in range(n_users)]
+    goals = {u: [str(uuid.uuid4()) for _ in range(5)] for u in users}
+
+    def ts():
+        return now - timedelta(seconds=rnd.randrange(span))
+
+    with engine.begin() as conn:
+        conn.execute(insert(models.User.__table__), [
+            {"id": u, "email": f"{u}@bench.local", "password_hash": "x", "email_verified": False,
+             "created_at": now, "updated_at": now} for u in users])
+        _bulk(conn, VitalRecord.__table__, (
+            {"id": str(uuid.uuid4()), "user_id": rnd.choice(users), "systolic": rnd.uniform(95, 185),
+             "diastolic": rnd.uniform(55, 125), "heart_rate": rnd.uniform(35, 140), "created_at": ts()}
+            for _ in range(n_vitals)))
+        _bulk(conn, SymptomRecord.__table__, (
+            {"id": str(uuid.uuid4()), "user_id": rnd.choice(users), "description": "headache",
+             "severity": rnd.choice(["mild", "moderate", "severe"]), "created_at": ts()}
+            for _ in range(n_vitals // 4)))
+        _bulk(conn, models.AuditEvent.__table__, (
+            {"id": str(uuid.uuid4()), "user_id": rnd.choice(users), "action": "get", "resource": "vitals",
+             "success": True, "created_at": ts()}
+            for _ in range(n_vitals // 2)))
+        _bulk(conn, Goal.__table__, (
+            {"id": g, "user_id": u, "category": "fitness", "target_value": "8k", "cadence": "daily",
+             "created_at": ts()} for u, gs in goals.items() for g in gs))
+        _bulk(conn, GoalProgress.__table__, (
+            {"id": str(uuid.uuid4()), "user_id": u, "goal_id": rnd.choice(goals[u]), "value": "1",
+             "created_at": ts()} for u in (rnd.choice(users) for _ in range(n_vitals // 10))))
+        # Mostly already-sent reminders, a small pending tail
+        _bulk(conn, Reminder.__table__, (
+            {"id": str(uuid.uuid4()), "user_id": rnd.choice(users), "message": "take meds",
+             "scheduled_at": ts(), "sent_at": (None if rnd.random() < 0.01 else now), "created_at": now}
+            for _ in range(n_vitals // 10)))
+    return users, goals
+
+
+def queries(user_id: str, goal_id: str):
+    now = datetime.utcnow()
+    return {
+        "list_vitals": select(VitalRecord).where(VitalRecord.user_id == user_id)
+        .order_by(VitalRecord.created_at.desc()).limit(200),
+        "get_summary (30d vitals)": select(VitalRecord).where(VitalRecord.user_id == user_id)
+        .where(VitalRecord.created_at >= now - timedelta(days=30)).order_by(VitalRecord.created_at.desc()),
+        "list_symptoms": select(SymptomRecord).where(SymptomRecord.user_id == user_id)
+        .order_by(SymptomRecord.created_at.desc()).limit(50),
+        "list_audit": select(models.AuditEvent).where(models.AuditEvent.user_id == user_id)
+        .order_by(models.AuditEvent.created_at.desc()).limit(100),
+        "list_goals": select(Goal).where(Goal.user_id == user_id).order_by(Goal.created_at.desc()).limit(200),
+        "list_progress": select(GoalProgress).where(GoalProgress.goal_id == goal_id, GoalProgress.user_id == user_id)
+        .order_by(GoalProgress.created_at.desc()).limit(100),
+        "list_reminders": select(Reminder).where(Reminder.user_id == user_id)
+        .order_by(Reminder.scheduled_at.desc()).limit(200),
+        "dispatcher pending scan": select(Reminder).where(Reminder.sent_at.is_(None))
+        .where(Reminder.scheduled_at <= now).limit(20),
+    }
+
+
+def explain(conn, stmt) -> str:
+    compiled = stmt.compile(dialect=engine.dialect)
+    prefix = "EXPLAIN QUERY PLAN " if engine.dialect.name == "sqlite" else "EXPLAIN "
+    params = compiled.params
+    if compiled.positional:
+        params = tuple(params[k] for k in compiled.positiontup)
+    rows = conn.exec_driver_sql(prefix + str(compiled), params).fetchall()
+    if engine.dialect.name == "sqlite":
+        return "; ".join(str(r[-1]) for r in rows)
+    return "; ".join(str(r[0]).strip() for r in rows[:3])
+
+
+def measure(users, goals, reps: int):
+    rnd = random.Random(7)
+    picks = [(u, goals[u][0]) for u in (rnd.choice(users) for _ in range(reps))]
+    out = {}
+    with engine.connect() as conn:
+        for name in queries(*picks[0]):
+            times = []
+            for u, g in picks:
+                stmt = queries(u, g)[name]
+                t0 = time.perf_counter()
+                conn.execute(stmt).fetchall()
+                times.append((time.perf_counter() - t0) * 1000)
+            out[name] = (statistics.median(times), explain(conn, queries(*picks[0])[name]))
+    return out
+
+
+def main():
+    n_vitals = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    n_users = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        for name, table in NEW_INDEXES:
+            _index(name, table).drop(conn, checkfirst=True)
+
+    t0 = time.perf_counter()
+    users, goals = seed(n_vitals, n_users)
+    print(f"seeded {n_vitals} vitals for {n_users} users in {time.perf_counter() - t0:.1f}s "
+          f"({engine.dialect.name})")
+
+    before = measure(users, goals, reps=20)
+    t0 = time.perf_counter()
+    with engine.begin() as conn:
+        for name, table in NEW_INDEXES:
+            _index(name, table).create(conn)
+        if engine.dialect.name == "sqlite":
+            conn.execute(text("ANALYZE"))
+    print(f"built indexes in {time.perf_counter() - t0:.1f}s")
+    after = measure(users, goals, reps=20)
+
+    for name in before:
+        b_ms, b_plan = before[name]
+        a_ms, a_plan = after[name]
+        print(f"\n{name}: {b_ms:8.2f} ms -> {a_ms:8.2f} ms  ({b_ms / max(a_ms, 1e-6):.1f}x)")
+        print(f"  before: {b_plan}")
+        print(f"  after : {a_plan}")
+
+
+if __name__ == "__main__":
+    main()
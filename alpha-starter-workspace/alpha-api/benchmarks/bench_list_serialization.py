@@ -0,0 +1,138 @@
+"""List endpoints: ORM + Pydantic response_model vs column selects + orjson.
+
+Seeds one user with 20,000 vitals, symptoms, goals and reminders, then for
+200 / 2,000 / 20,000 rows measures the CPU time (``process_time``: query,
+row building and JSON encoding) of
+
+- legacy: ORM entities -> one Pydantic model per row -> response_model
+  validation + ``dump_json`` (what FastAPI does for a returned list), and
+- fast: the endpoint function as shipped (``json_rows``).
+
+Both paths must produce identical bytes. The HTTP ``limit`` cap (500) is
+bypassed by calling the endpoint functions with a hand-built ``PageParams``.
+
+Usage (from alpha-api/):  python -m benchmarks.bench_list_serialization [repeats]
+"""
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from . import _env  # noqa: F401  (environment defaults, before any app import)
+
+from fastapi import Response  # noqa: E402
+from pydantic import TypeAdapter  # noqa: E402
+from sqlalchemy import insert  # noqa: E402
+
+from app import models, models_goals, schemas  # noqa: E402,F401  (register tables)
+from app.db import Base, SessionLocal, engine  # noqa: E402
+from app.models_goals import Goal  # noqa: E402
+from app.models_reminders import Reminder  # noqa: E402
+from app.models_symptoms import SymptomRecord  # noqa: E402
+from app.models_vitals import VitalRecord  # noqa: E402
+from app.pagination import PageParams  # noqa: E402
+from app.routers import goals, reminders, symptoms, vitals  # noqa: E402
+
+SIZES = (200, 2_000, 20_000)
+
+
+def seed(db, user_id: str, n: int) -> None:
+    now = datetime.utcnow()
+    rows = [{"id": str(uuid.uuid4()), "user_id": user_id, "created_at": now - timedelta(minutes=i),
+             "systolic": 110.0 + i % 40, "diastolic": 70.0 + i % 25, "heart_rate": 55.0 + i % 60,
+             "temperature_c": 36.5 + (i % 20) / 10, "glucose_mgdl": None if i % 3 else 90.0 + i % 90,
+             "weight_kg": None} for i in range(n)]
+    vitals.insert_vital_rows(db, rows)
+    db.execute(insert(SymptomRecord.__table__), [
+        {"id": str(uuid.uuid4()), "user_id": user_id, "created_at": now - timedelta(minutes=i),
+         "description": f"Headache after lunch, day {i} – mild nausea", "severity": ("mild", "moderate", None)[i % 3]}
+        for i in range(n)])
+    db.execute(insert(Goal.__table__), [
+        {"id": str(uuid.uuid4()), "user_id": user_id, "created_at": now - timedelta(minutes=i),
+         "category": "fitness", "target_value": f"{8000 + i} steps", "cadence": "daily"} for i in range(n)])
+    db.execute(insert(Reminder.__table__), [
+        {"id": str(uuid.uuid4()), "user_id": user_id, "message": f"Take meds #{i}",
+         "scheduled_at": now + timedelta(minutes=i), "sent_at": None, "recurrence": None} for i in range(n)])
+    db.commit()
+
+
+# ---- legacy implementations (per-row Pydantic models, FastAPI response_model serialization) ----
+
+def legacy_vitals(db, user, n):
+    rows = (db.query(VitalRecord).filter(VitalRecord.user_id == user.id)
+            .order_by(VitalRecord.created_at.desc(), VitalRecord.id.desc()).limit(n + 1).all()[:n])
+    return [vitals.vital_out(r) for r in rows]
+
+
+def legacy_symptoms(db, user, n):
+    rows = (db.query(SymptomRecord).filter(SymptomRecord.user_id == user.id)
+            .order_by(SymptomRecord.created_at.desc(), SymptomRecord.id.desc()).limit(n + 1).all()[:n])
+    return [schemas.SymptomOut(id=r.id, user_id=r.user_id, created_at=r.created_at,
+                               description=r.description, severity=r.severity) for r in rows]
+
+
+def legacy_goals(db, user, n):
+    rows = (db.query(Goal).filter(Goal.user_id == user.id)
+            .order_by(Goal.created_at.desc(), Goal.id.desc()).limit(n + 1).all()[:n])
+    return [schemas.GoalOut(id=r.id, user_id=r.user_id, created_at=r.created_at, category=r.category,
+                            target_value=r.target_value, cadence=r.cadence) for r in rows]
+
+
+def legacy_reminders(db, user, n):
+    rows = (db.query(Reminder).filter(Reminder.user_id == user.id)
+            .order_by(Reminder.scheduled_at.desc(), Reminder.id.desc()).limit(n + 1).all()[:n])
+    return [reminders.ReminderOut(id=r.id, user_id=r.user_id, message=r.message, scheduled_at=r.scheduled_at,
+                                  sent_at=r.sent_at) for r in rows]
+
+
+ENDPOINTS = (
+    ("vitals", legacy_vitals, list[schemas.VitalOut],
+     lambda db, user, page: vitals.list_vitals(response=Response(), page=page, _etag=None, flag=None, db=db, user=user)),
+    ("symptoms", legacy_symptoms, list[schemas.SymptomOut],
+     lambda db, user, page: symptoms.list_symptoms(response=Response(), page=page, _etag=None, db=db, user=user)),
+    ("goals", legacy_goals, list[schemas.GoalOut],
+     lambda db, user, page: goals.list_goals(response=Response(), page=page, _etag=None, db=db, user=user)),
+    ("reminders", legacy_reminders, list[reminders.ReminderOut],
+     lambda db, user, page: reminders.list_reminders(response=Response(), page=page, _etag=None, db=db, user=user)),
+)
+
+
+def cpu(fn, repeats: int) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        t0 = time.process_time()
+        fn()
+        best = min(best, time.process_time() - t0)
+    return best
+
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    user = models.User(id=str(uuid.uuid4()), email="lists@example.com", password_hash="x")
+    db.add(user)
+    db.commit()
+    seed(db, user.id, max(SIZES))
+
+    print(f"{'endpoint':10s} {'rows':>6s}  {'legacy ms':>10s}  {'fast ms':>8s}  {'speed-up':>8s}")
+    for name, legacy, model, fast in ENDPOINTS:
+        adapter = TypeAdapter(model)
+
+        def legacy_body(n, adapter=adapter, legacy=legacy):
+            # FastAPI: validate the returned objects against response_model, then dump_json
+            body = adapter.dump_json(adapter.validate_python(legacy(db, user, n), from_attributes=True))
+            db.expunge_all()
+            return body
+
+        for n in SIZES:
+            page = PageParams(limit=n)
+            assert legacy_body(n) == fast(db, user, page).body, (name, n)
+            t_legacy = cpu(lambda n=n, body=legacy_body: body(n), repeats)
+            t_fast = cpu(lambda page=page, fast=fast: fast(db, user, page), repeats)
+            print(f"{name:10s} {n:6d}  {t_legacy * 1000:10.2f}  {t_fast * 1000:8.2f}  {t_legacy / t_fast:7.1f}x")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
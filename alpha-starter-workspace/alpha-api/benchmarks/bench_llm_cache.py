@@ -0,0 +1,122 @@
+"""LLM response cache: latency and model calls for a skewed request mix.
+
+Replays N medication decodes and symptom analyses drawn from a Zipf-like
+distribution over a small vocabulary, with random case and whitespace
+variants, against a fake model that sleeps ``latency`` seconds per call
+(the remote API is not contacted). The same mix runs three times:
+
+- cache disabled: every request pays the model latency;
+- cold cache: first occurrences miss, repeats hit the in-process tier;
+- after a "restart" (in-process tier cleared): hits come from the db tier.
+
+Usage (from alpha-api/):  python -m benchmarks.bench_llm_cache [requests] [latency_sec]
+"""
+import asyncio
+import json
+import random
+import statistics
+import sys
+import time
+
+import httpx
+
+from . import _env  # noqa: F401  (environment defaults, before any app import)
+
+from app import models, models_goals  # noqa: E402,F401  (register tables)
+from app.db import Base, engine  # noqa: E402
+from app.services.llm_cache import llm_cache  # noqa: E402
+from app.services.llm_client import llm_client  # noqa: E402
+
+
+MEDS = ["ibuprofen", "paracetamol", "amoxicillin", "metformin", "lisinopril", "atorvastatin", "omeprazole",
+        "cetirizine", "sertraline", "levothyroxine", "amlodipine", "salbutamol"]
+SYMPTOMS = ["headache", "fever", "sore throat", "back pain", "cough", "nausea", "fatigue", "dizziness"]
+SEVERITIES = ["mild", "moderate", "severe"]
+
+
+class FakeModel:
+    def __init__(self, latency: float) -> None:
+        self.latency = latency
+        self.calls = 0
+        self.transport = httpx.MockTransport(self.handle)
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        body = {"purpose": "p", "common_side_effects": ["x"], "interactions": [], "usage": "u", "disclaimer": "d",
+                "advice": ["rest"], "risk_flags": [], "causes": [], "implications": []}
+        return httpx.Response(200, json={"choices": [{"message": {"content": json.dumps(body)}}]})
+
+
+def variant(rnd: random.Random, text: str) -> str:
+    text = text.upper() if rnd.random() < 0.2 else text.capitalize() if rnd.random() < 0.3 else text
+    return (" " * rnd.randint(0, 2)) + text + rnd.choice(["", " ", ".", "  "])
+
+
+def workload(n: int):
+    rnd = random.Random(11)
+    weights_m = [1 / (i + 1) for i in range(len(MEDS))]
+    weights_s = [1 / (i + 1) for i in range(len(SYMPTOMS))]
+    out = []
+    for _ in range(n):
+        if rnd.random() < 0.5:
+            out.append(("meds", variant(rnd, rnd.choices(MEDS, weights_m)[0]), None))
+        else:
+            out.append(("symptoms", variant(rnd, rnd.choices(SYMPTOMS, weights_s)[0]), rnd.choice(SEVERITIES)))
+    return out
+
+
+async def _replay(requests) -> list:
+    times = []
+    for kind, text, severity in requests:
+        t0 = time.perf_counter()
+        if kind == "meds":
+            await llm_client.decodeMedication(text)
+        else:
+            await llm_client.analyzeSymptoms(text, severity)
+        times.append(time.perf_counter() - t0)
+    await llm_client.aclose()
+    return times
+
+
+def replay(requests) -> list:
+    return asyncio.run(_replay(requests))
+
+
+def report(label: str, times: list, model: FakeModel, calls_before: int) -> None:
+    times = sorted(times)
+    p = lambda q: times[min(len(times) - 1, int(q * len(times)))] * 1000  # noqa: E731
+    print(f"{label:18s}: {len(times)} requests {sum(times):6.2f} s  model calls {model.calls - calls_before:4d}  "
+          f"mean {statistics.fmean(times) * 1000:7.2f} ms  p50 {p(0.5):7.2f} ms  p99 {p(0.99):7.2f} ms")
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    latency = float(sys.argv[2]) if len(sys.argv) > 2 else 0.05
+    Base.metadata.create_all(bind=engine)
+    model = FakeModel(latency)
+    llm_client.api_key = "bench"
+    llm_client.transport = model.transport
+    requests = workload(n)
+    print(f"{n} requests over {len(MEDS) + len(SYMPTOMS) * len(SEVERITIES)} distinct inputs, "
+          f"model latency {latency * 1000:.0f} ms")
+
+    llm_cache.enabled = False
+    calls = model.calls
+    report("no cache", replay(requests), model, calls)
+
+    llm_cache.enabled = True
+    llm_cache.purge()
+    calls = model.calls
+    report("cold cache", replay(requests), model, calls)
+
+    llm_cache._memory.clear()
+    calls = model.calls
+    report("after restart (db)", replay(requests), model, calls)
+    s = llm_cache.stats()
+    print(f"stats: memory_hits={s['memory_hits']} store_hits={s['store_hits']} misses={s['misses']} "
+          f"rows={s.get('rows')} hit_rate={s['hit_rate']:.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""LLM client under load: pooled connections, concurrency bound, deadlines, breaker.
+
+Fires N concurrent symptom analyses (distinct inputs, response cache off)
+at ``benchmarks.fake_llm_server`` on localhost and reports wall time,
+latency percentiles, call outcomes and what the server saw (requests, TCP
+connections, peak in-flight):
+
+- naive: a new ``httpx.AsyncClient`` per call, no bound (the old
+  per-request behaviour) - one connection per call, all in flight at once;
+- pooled: the app's client - at most ``LLM_MAX_CONCURRENCY`` in flight over
+  reused keep-alive connections;
+- burst: same, with a short ``LLM_QUEUE_TIMEOUT_SEC`` - callers that cannot
+  get a slot fall back quickly instead of queueing;
+- slow upstream: answers take longer than ``LLM_TIMEOUT_SEC`` - the first
+  calls time out, the breaker opens and the rest fail fast.
+
+Usage (from alpha-api/):  python -m benchmarks.bench_llm_client [requests] [latency_sec]
+"""
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+import httpx
+
+from . import _env  # noqa: F401  (environment defaults, before any app import)
+os.environ.setdefault("LLM_CACHE_ENABLED", "false")
+
+from app.config import settings  # noqa: E402
+from app.services.circuit_breaker import CircuitBreaker  # noqa: E402
+from app.services.llm_client import llm_calls, llm_client  # noqa: E402
+
+from .fake_llm_server import FakeLlmServer  # noqa: E402
+
+RESULTS = ("ok", "timeout", "error", "busy", "circuit_open")
+
+
+async def _naive(server: FakeLlmServer, i: int) -> None:
+    async with httpx.AsyncClient(base_url=server.base_url, timeout=settings.LLM_TIMEOUT_SEC) as http:
+        resp = await http.post("/chat/completions", json={
+            "model": settings.LLM_MODEL,
+            "messages": [{"role": "user", "content": f"Description: cough {i}. Severity: mild"}],
+        })
+        resp.raise_for_status()
+
+
+async def _run(n: int, naive: bool, server: FakeLlmServer) -> list:
+    async def one(i: int) -> float:
+        t0 = time.perf_counter()
+        if naive:
+            await _naive(server, i)
+        else:
+            await llm_client.analyzeSymptoms(f"cough {i}", "mild")
+        return time.perf_counter() - t0
+
+    try:
+        return list(await asyncio.gather(*(one(i) for i in range(n))))
+    finally:
+        await llm_client.aclose()
+
+
+def scenario(label: str, server: FakeLlmServer, n: int, naive: bool = False) -> None:
+    server.reset()
+    llm_client.breaker = CircuitBreaker(settings.LLM_BREAKER_FAILURES, settings.LLM_BREAKER_RESET_SEC)
+    before = {r: llm_calls.value("symptoms", r) for r in RESULTS}
+    t0 = time.perf_counter()
+    times = sorted(asyncio.run(_run(n, naive, server)))
+    wall = time.perf_counter() - t0
+    p = lambda q: times[min(len(times) - 1, int(q * len(times)))] * 1000  # noqa: E731
+    outcomes = {r: int(llm_calls.value("symptoms", r) - before[r]) for r in RESULTS}
+    seen = server.stats()
+    print(f"{label:14s}: {n} calls {wall:6.2f} s  mean {statistics.fmean(times) * 1000:7.1f} ms  "
+          f"p50 {p(0.5):7.1f} ms  p99 {p(0.99):7.1f} ms | server requests {seen['requests']:4d}  "
+          f"connections {seen['connections']:4d}  peak in-flight {seen['max_in_flight']:4d}")
+    if not naive:
+        print(" " * 16 + "outcomes " + "  ".join(f"{r}={c}" for r, c in outcomes.items() if c)
+              + f"  breaker={llm_client.breaker.state}")
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    latency = float(sys.argv[2]) if len(sys.argv) > 2 else 0.05
+    server = FakeLlmServer(latency=latency, jitter=latency / 5).start()
+    settings.LLM_BASE_URL = server.base_url
+    llm_client.api_key = "bench"
+    print(f"fake LLM at {server.base_url}, {latency * 1000:.0f} ms per answer; "
+          f"LLM_MAX_CONCURRENCY={settings.LLM_MAX_CONCURRENCY} LLM_MAX_CONNECTIONS={settings.LLM_MAX_CONNECTIONS}")
+
+    scenario("naive", server, n, naive=True)
+    scenario("pooled", server, n)
+
+    queue_timeout = settings.LLM_QUEUE_TIMEOUT_SEC
+    settings.LLM_QUEUE_TIMEOUT_SEC = latency * 3
+    scenario("burst", server, n)
+    settings.LLM_QUEUE_TIMEOUT_SEC = queue_timeout
+
+    timeout = settings.LLM_TIMEOUT_SEC
+    server.latency, settings.LLM_TIMEOUT_SEC = 2.0, 0.25
+    scenario("slow upstream", server, n)
+    settings.LLM_TIMEOUT_SEC = timeout
+    server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Single-flight LLM calls: a burst of near-identical symptom analyses.
+
+Simulates a "viral symptom" spike: N concurrent ``analyzeSymptoms`` calls
+spread over a few distinct complaints, each typed with random case,
+spacing and trailing punctuation, against ``benchmarks.fake_llm_server``
+on localhost (response cache off, so every call is a miss). The burst
+runs with ``LLM_SINGLE_FLIGHT`` off and on; it reports wall time, latency
+percentiles, upstream requests, issued vs coalesced misses and how many
+callers got the heuristic fallback because no concurrency slot freed up in
+time.
+
+Usage (from alpha-api/):  python -m benchmarks.bench_llm_singleflight [requests] [distinct] [latency_sec]
+"""
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+
+from . import _env  # noqa: F401  (environment defaults, before any app import)
+os.environ.setdefault("LLM_CACHE_ENABLED", "false")
+
+from app.config import settings  # noqa: E402
+from app.services.llm_client import llm_calls, llm_client  # noqa: E402
+
+from .fake_llm_server import FakeLlmServer  # noqa: E402
+
+COMPLAINTS = ["fever and body aches", "sore throat and cough", "headache and fatigue", "runny nose",
+              "chills and fever", "loss of taste", "shortness of breath", "nausea"]
+
+
+def burst(n: int, distinct: int):
+    rnd = random.Random(5)
+    out = []
+    for _ in range(n):
+        text = rnd.choice(COMPLAINTS[:distinct])
+        text = text.upper() if rnd.random() < 0.2 else text.capitalize() if rnd.random() < 0.3 else text
+        out.append(((" " * rnd.randint(0, 2)) + text.replace(" ", rnd.choice([" ", "  "])) + rnd.choice(["", ".", "!"]),
+                    rnd.choice(["mild", "Mild "])))
+    return out
+
+
+async def _run(requests) -> list:
+    async def one(description: str, severity: str) -> float:
+        t0 = time.perf_counter()
+        await llm_client.analyzeSymptoms(description, severity)
+        return time.perf_counter() - t0
+
+    try:
+        return list(await asyncio.gather(*(one(d, s) for d, s in requests)))
+    finally:
+        await llm_client.aclose()
+
+
+def scenario(label: str, server: FakeLlmServer, requests) -> None:
+    server.reset()
+    before = llm_client.stats()
+    busy = llm_calls.value("symptoms", "busy")
+    t0 = time.perf_counter()
+    times = sorted(asyncio.run(_run(requests)))
+    wall = time.perf_counter() - t0
+    p = lambda q: times[min(len(times) - 1, int(q * len(times)))] * 1000  # noqa: E731
+    after = llm_client.stats()
+    print(f"{label:16s}: {len(times)} calls {wall:6.2f} s  mean {statistics.fmean(times) * 1000:7.1f} ms  "
+          f"p50 {p(0.5):7.1f} ms  p99 {p(0.99):7.1f} ms | upstream requests {server.requests:4d}  "
+          f"issued {after['issued'] - before['issued']:4d}  coalesced {after['coalesced'] - before['coalesced']:4d}  "
+          f"fallback (busy) {int(llm_calls.value('symptoms', 'busy') - busy):4d}")
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    distinct = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    latency = float(sys.argv[3]) if len(sys.argv) > 3 else 0.3
+    server = FakeLlmServer(latency=latency, jitter=latency / 5).start()
+    settings.LLM_BASE_URL = server.base_url
+    llm_client.api_key = "bench"
+    requests = burst(n, distinct)
+    print(f"{n} concurrent analyses over {distinct} complaints, fake LLM {latency * 1000:.0f} ms; "
+          f"LLM_MAX_CONCURRENCY={settings.LLM_MAX_CONCURRENCY} LLM_QUEUE_TIMEOUT_SEC={settings.LLM_QUEUE_TIMEOUT_SEC}")
+
+    settings.LLM_SINGLE_FLIGHT = False
+    scenario("no single-flight", server, requests)
+    settings.LLM_SINGLE_FLIGHT = True
+    scenario("single-flight", server, requests)
+    server.stop()
+
+
+if __name__ == "__main__":
+    main()
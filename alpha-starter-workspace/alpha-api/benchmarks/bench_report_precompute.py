@@ -0,0 +1,109 @@
+"""Report precompute: batch throughput and the cost of a Monday-morning herd.
+
+Seeds U users with a month of readings (R per user, plus a few symptoms) and
+their daily rollups, then:
+
+- runs ``report_precompute.run`` with 1 worker and with ``workers`` worker
+  processes (``--restart`` each time) and prints users/s;
+- interrupts a run after a few chunks and resumes it, checking that every
+  active user ends up with both snapshots;
+- replays a "herd" (every user opens their weekly report once, report cache
+  cold) served from snapshots vs computed on the spot.
+
+Throughput only scales with workers up to the number of cores and the
+database's write capacity; on SQLite the upserts serialize on the file lock.
+
+Usage (from alpha-api/):  python -m benchmarks.bench_report_precompute [users] [readings_per_user] [workers]
+"""
+import os
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from . import _env  # noqa: F401  (environment defaults, before any app import)
+
+from sqlalchemy import func, insert, select  # noqa: E402
+
+from app import models, models_goals  # noqa: E402,F401  (register tables)
+from app.db import Base, SessionLocal, engine  # noqa: E402
+from app.models_reports import ReportSnapshot  # noqa: E402
+from app.models_symptoms import SymptomRecord  # noqa: E402
+from app.models_vitals import VitalRecord  # noqa: E402
+from app.services import data_versions, report_precompute, report_summary, vital_flags, vital_rollups  # noqa: E402
+from app.services.report_cache import SOURCES  # noqa: E402
+
+
+def seed(db, users: int, per_user: int) -> list:
+    ids = [str(uuid.uuid4()) for _ in range(users)]
+    db.execute(insert(models.User.__table__),
+               [{"id": uid, "email": f"u{i}@example.com", "password_hash": "x"} for i, uid in enumerate(ids)])
+    start = datetime.utcnow() - timedelta(days=30)
+    step = timedelta(days=30) / per_user
+    rows, symptoms = [], []
+    for n, uid in enumerate(ids):
+        for i in range(per_user):
+            rows.append({"id": str(uuid.uuid4()), "user_id": uid, "created_at": start + i * step,
+                         "systolic": 105.0 + (n + i) % 60, "diastolic": 65.0 + (n + i) % 35,
+                         "heart_rate": 55.0 + (n * 7 + i) % 60, "temperature_c": 36.2 + (i % 20) / 10,
+                         "glucose_mgdl": None if i % 3 else 85.0 + (n + i) % 120, "weight_kg": None})
+        symptoms += [{"id": str(uuid.uuid4()), "user_id": uid, "description": "headache",
+                      "severity": ("mild", "moderate", "severe")[(n + k) % 3],
+                      "created_at": start + timedelta(days=3 * k)} for k in range(n % 5)]
+        if len(rows) >= 50000:
+            vital_flags.stamp_rows(rows)
+            db.execute(insert(VitalRecord.__table__), rows)
+            rows.clear()
+    if rows:
+        vital_flags.stamp_rows(rows)
+        db.execute(insert(VitalRecord.__table__), rows)
+    if symptoms:
+        db.execute(insert(SymptomRecord.__table__), symptoms)
+    db.commit()
+    vital_rollups.rebuild(db)
+    return ids
+
+
+def precompute(label: str, workers: int, **kw) -> dict:
+    stats = report_precompute.run(f"bench-{label}", workers=workers, restart=True, **kw)
+    print(f"precompute {label:10s}: {stats['users']:6d} users {stats['snapshots']:6d} snapshots "
+          f"{stats['seconds']:6.2f} s  {stats['users_per_sec']:7.0f} users/s")
+    return stats
+
+
+def main():
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    per_user = int(sys.argv[2]) if len(sys.argv) > 2 else 120
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else max(2, os.cpu_count() or 1)
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    t0 = time.perf_counter()
+    ids = seed(db, users, per_user)
+    print(f"seeded {users} users x {per_user} readings in {time.perf_counter() - t0:.1f} s "
+          f"({os.cpu_count()} CPUs)")
+
+    precompute("1 worker", 1, chunk=250)
+    precompute(f"{workers} workers", workers, chunk=250)
+
+    # Interrupted after 3 chunks, then resumed under the same job id
+    part = report_precompute.run("bench-resume", workers=1, chunk=250, restart=True, max_chunks=3)
+    rest = report_precompute.run("bench-resume", workers=1, chunk=250)
+    stored = db.execute(select(func.count()).select_from(ReportSnapshot.__table__)).scalar()
+    assert part["users"] + rest["users"] == users and rest["finished"] and stored == 2 * users
+    print(f"resume: {part['users']} users before the stop, {rest['users']} after; {stored} snapshots")
+
+    # Herd: each user reads their weekly summary once (versions read as the endpoint does)
+    for label, read in (("snapshot", report_summary.summary),
+                        ("compute", lambda d, uid, p, v: report_summary.compute_summary(d, uid, p))):
+        t0 = time.perf_counter()
+        for uid in ids:
+            read(db, uid, "week", data_versions.current_many(db, uid, *SOURCES))
+        dt = time.perf_counter() - t0
+        print(f"herd {label:8s}: {users} reads in {dt:6.2f} s  {dt / users * 1000:6.2f} ms/read  "
+              f"{users / dt:7.0f} reads/s")
+    print(f"snapshot lookups fresh={report_summary.snapshot_lookups.value('fresh'):.0f}")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""Range statistics: one streaming pass with sketches vs loading everything.
+
+Seeds one user with N readings over 90 days, then
+
+1. runs ``vital_stats.range_stats`` (moments + KLL sketches) over the whole
+   range, timing it, then again to record the Python heap peak (tracemalloc);
+2. loads the same values into NumPy and computes exact percentiles;
+3. reports the sketch's rank error at p50/p90/p99 per field, and the same
+   for 90 per-day sketches merged into one (what stored daily sketches would
+   give).
+
+Usage (from alpha-api/):  python -m benchmarks.bench_report_stats [rows] [k]
+"""
+import sys
+import time
+import tracemalloc
+import uuid
+from datetime import datetime, timedelta
+
+from . import _env  # noqa: F401  (environment defaults, before any app import)
+
+import numpy as np  # noqa: E402
+from sqlalchemy import insert  # noqa: E402
+
+from app import models, models_goals  # noqa: E402,F401  (register tables)
+from app.db import Base, SessionLocal, engine  # noqa: E402
+from app.models_vitals import VITAL_FIELDS, VitalRecord  # noqa: E402
+from app.services import vital_stats  # noqa: E402
+from app.services.vital_stats import QUANTILES, FieldStats  # noqa: E402
+
+DAYS = 90
+
+
+def seed(db, user_id: str, n: int) -> None:
+    rng = np.random.default_rng(9)
+    start = datetime.utcnow() - timedelta(days=DAYS)
+    step = DAYS * 86400 / n
+    cols = {
+        "systolic": rng.normal(125, 15, n), "diastolic": rng.normal(80, 10, n),
+        "heart_rate": rng.lognormal(4.3, 0.2, n), "temperature_c": rng.normal(36.8, 0.4, n),
+        "glucose_mgdl": rng.gamma(9, 12, n), "weight_kg": rng.normal(80, 2, n),
+    }
+    missing = rng.random((n, len(VITAL_FIELDS))) < 0.3
+    for lo in range(0, n, 20000):
+        hi = min(n, lo + 20000)
+        rows = []
+        for i in range(lo, hi):
+            row = {"id": str(uuid.uuid4()), "user_id": user_id, "created_at": start + timedelta(seconds=i * step)}
+            for j, f in enumerate(VITAL_FIELDS):
+                row[f] = None if missing[i, j] else round(float(cols[f][i]), 1)
+            rows.append(row)
+        db.execute(insert(VitalRecord.__table__), rows)
+    db.commit()
+
+
+def rank_error(sorted_vals: np.ndarray, q: float, estimate: float) -> float:
+    lo = np.searchsorted(sorted_vals, estimate, side="left") / len(sorted_vals)
+    hi = np.searchsorted(sorted_vals, estimate, side="right") / len(sorted_vals)
+    return max(lo - q, q - hi, 0.0)
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+    k = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    user = models.User(id=str(uuid.uuid4()), email="stats@example.com", password_hash="x")
+    db.add(user)
+    db.commit()
+    seed(db, user.id, n)
+    end = datetime.utcnow()
+    start = end - timedelta(days=DAYS + 1)
+
+    t0 = time.perf_counter()
+    readings, stats = vital_stats.range_stats(db, user.id, start, end, k=k)
+    t_sketch = time.perf_counter() - t0
+    # Separate run: tracemalloc slows allocation-heavy code several times over
+    tracemalloc.start()
+    vital_stats.range_stats(db, user.id, start, end, k=k)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    t0 = time.perf_counter()
+    rows = np.array(db.query(*[getattr(VitalRecord, f) for f in VITAL_FIELDS]).all(), dtype=np.float64)
+    exact = {}
+    for i, f in enumerate(VITAL_FIELDS):
+        col = rows[:, i]
+        exact[f] = np.sort(col[~np.isnan(col)])
+    t_exact = time.perf_counter() - t0
+
+    daily = {f: FieldStats(k) for f in VITAL_FIELDS}
+    for d in range(DAYS + 1):
+        _, day_stats = vital_stats.range_stats(db, user.id, start + timedelta(days=d),
+                                               start + timedelta(days=d + 1), k=k)
+        for f in VITAL_FIELDS:
+            daily[f].merge(day_stats[f])
+
+    print(f"{readings} readings, k={k}")
+    print(f"streaming sketches : {t_sketch:7.2f} s  ({readings / t_sketch / 1000:6.0f}k readings/s), "
+          f"heap peak {peak / 2**20:.1f} MiB, {sum(len(s.sketch) for s in stats.values())} items kept")
+    print(f"exact (load + sort): {t_exact:7.2f} s, values held {sum(v.nbytes for v in exact.values()) / 2**20:.1f} MiB")
+    print(f"{'field':14s} {'n':>8s} {'mean err':>9s}  " + "  ".join(f"p{round(q * 100)} rank err (1 / merged)" for q in QUANTILES))
+    for f in VITAL_FIELDS:
+        s, m, vals = stats[f].summary(), daily[f].summary(), exact[f]
+        assert s["count"] == m["count"] == len(vals)
+        errs = []
+        for q in QUANTILES:
+            key = f"p{round(q * 100)}"
+            errs.append(f"{rank_error(vals, q, s[key]):.4f} / {rank_error(vals, q, m[key]):.4f}")
+        print(f"{f:14s} {len(vals):8d} {abs(s['mean'] - vals.mean()):9.1e}  " + "  ".join(f"{e:>25s}" for e in errs))
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
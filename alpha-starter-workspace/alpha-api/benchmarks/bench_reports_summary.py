@@ -0,0 +1,125 @@
+"""Report summary: per-row Python classification vs the daily-rollup path.
+
+Seeds one user with N readings in the last week (random values, dense around
+the flag thresholds), builds the daily rollups, checks that both paths
+produce identical counts and times them, then times a report-cache hit
+(version lookup only).
+
+Usage (from alpha-api/):  python -m benchmarks.bench_reports_summary [rows] [repeats]
+"""
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict
+
+from . import _env  # noqa: F401  (environment defaults, before any app import)
+
+from sqlalchemy import insert  # noqa: E402
+
+from app import models, models_goals  # noqa: E402,F401  (register tables)
+from app.db import Base, SessionLocal, engine  # noqa: E402
+from app.models_vitals import VitalRecord  # noqa: E402
+from app.routers import reports  # noqa: E402
+from app.services import vital_flags, vital_rollups  # noqa: E402
+from app.services.report_cache import report_cache  # noqa: E402
+from app.services.vital_flags import flag_bp, flag_glucose, flag_hr, flag_temp  # noqa: E402
+
+
+EDGES = [34.9, 35, 38, 39, 40, 59.9, 60, 70, 79.9, 80, 90, 100, 100.1, 120, 130, 140, 180, 240]
+
+
+def value(rnd: random.Random):
+    r = rnd.random()
+    if r < 0.1:
+        return None
+    if r < 0.4:
+        return rnd.choice(EDGES)
+    return round(rnd.uniform(20, 260), 1)
+
+
+def seed(db, user_id: str, n: int) -> None:
+    rnd = random.Random(7)
+    start = datetime.utcnow() - timedelta(days=6)
+    step = (6 * 86400) / n
+    rows = []
+    for i in range(n):
+        rows.append({
+            "id": str(uuid.uuid4()), "user_id": user_id,
+            "created_at": start + timedelta(seconds=i * step),
+            "systolic": value(rnd), "diastolic": value(rnd), "heart_rate": value(rnd),
+            "temperature_c": value(rnd), "glucose_mgdl": value(rnd), "weight_kg": None,
+        })
+        if len(rows) == 10000:
+            vital_flags.stamp_rows(rows)
+            db.execute(insert(VitalRecord.__table__), rows)
+            rows.clear()
+    if rows:
+        vital_flags.stamp_rows(rows)
+        db.execute(insert(VitalRecord.__table__), rows)
+    db.commit()
+    # Rows were inserted behind the API's back; build their rollups in one pass
+    vital_rollups.rebuild(db, user_id)
+
+
+def python_counts(db, user_id: str) -> Dict[str, Dict[str, int]]:
+    """The previous implementation: load every row, classify in Python."""
+    start = datetime.utcnow() - timedelta(days=7)
+    out: Dict[str, Dict[str, int]] = {"bp": {}, "hr": {}, "temp": {}, "glucose": {}}
+    rows = (db.query(VitalRecord).filter(VitalRecord.user_id == user_id)
+            .filter(VitalRecord.created_at >= start).order_by(VitalRecord.created_at.desc()).all())
+    for r in rows:
+        for key, flag in (("bp", flag_bp(r.systolic, r.diastolic)), ("hr", flag_hr(r.heart_rate)),
+                          ("temp", flag_temp(r.temperature_c)), ("glucose", flag_glucose(r.glucose_mgdl))):
+            if flag:
+                out[key][flag] = out[key].get(flag, 0) + 1
+    out["total"] = {"": len(rows)}
+    return out
+
+
+def sql_counts(db, user) -> Dict[str, Dict[str, int]]:
+    vs = reports.compute_summary(db, user.id, "week").vitals_summary
+    out = {k: {f: n for f, n in getattr(vs, k).items() if n} for k in ("bp", "hr", "temp", "glucose")}
+    out["total"] = {"": vs.total}
+    return out
+
+
+def best_of(fn, repeats: int) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 150_000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    user = models.User(id=str(uuid.uuid4()), email="bench@example.com", password_hash="x")
+    db.add(user)
+    db.commit()
+    seed(db, user.id, n)
+
+    expected, got = python_counts(db, user.id), sql_counts(db, user)
+    assert expected == got, (expected, got)
+    print(f"parity ok over {n} rows: {got['bp']}")
+
+    t_py = best_of(lambda: (python_counts(db, user.id), db.expunge_all()), repeats)
+    user = db.merge(user)
+    t_sql = best_of(lambda: sql_counts(db, user), repeats)
+    cached = lambda: reports.get_summary(period="week", db=db, user=user)  # noqa: E731
+    cached()
+    t_hit = best_of(cached, repeats)
+    print(f"python per-row : {t_py * 1000:9.1f} ms")
+    print(f"daily rollups  : {t_sql * 1000:9.1f} ms")
+    print(f"cache hit      : {t_hit * 1000:9.3f} ms")
+    print(f"speed-up       : {t_py / t_sql:9.1f}x (rollups), {t_sql / t_hit:.1f}x (cache hit over rollups)")
+    print(f"report cache   : {report_cache.stats()}")
+
+
+if __name__ == "__main__":
+    main()
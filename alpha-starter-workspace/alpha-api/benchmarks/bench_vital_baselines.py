@@ -0,0 +1,100 @@
+"""Rolling baselines: per-reading update cost and vectorized replay.
+
+1. Cost of one O(1) EWMA update (``vital_baselines.step``).
+2. Cost added to a write: ``score_rows`` (load baselines, score, upsert)
+   for a single reading and for a 1000-reading batch, on a SQLite DB.
+3. Replay of N readings: the vectorized ``scan`` vs the same ``step`` loop,
+   after checking that both agree (final state and every z-score).
+
+Usage (from alpha-api/):  python -m benchmarks.bench_vital_baselines [replay_readings]
+"""
+import math
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from . import _env  # noqa: F401  (environment defaults, before any app import)
+
+import numpy as np  # noqa: E402
+
+from app import models, models_goals  # noqa: E402,F401  (register tables)
+from app.config import settings  # noqa: E402
+from app.db import Base, SessionLocal, engine  # noqa: E402
+from app.services import vital_baselines as vb  # noqa: E402
+
+
+def series(n: int) -> np.ndarray:
+    rng = np.random.default_rng(3)
+    x = 72 + 6 * np.sin(np.arange(n) / 300) + rng.normal(0, 3, n)
+    x[rng.random(n) < 0.002] += 50  # spikes
+    return x
+
+
+def bench_step(x: np.ndarray) -> None:
+    values = x[:200_000].tolist()
+    alpha, floor = settings.VITALS_BASELINE_ALPHA, vb.MIN_STD["heart_rate"]
+    state = None
+    t0 = time.perf_counter()
+    for v in values:
+        state, _ = vb.step(state, v, alpha, floor)
+    dt = time.perf_counter() - t0
+    print(f"step()                 : {dt / len(values) * 1e6:8.2f} us/reading")
+
+
+def bench_write_path() -> None:
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    user = models.User(id=str(uuid.uuid4()), email="baseline-bench@example.com", password_hash="x")
+    db.add(user)
+    db.commit()
+    now = datetime.utcnow()
+
+    def rows(k: int, offset: int):
+        return [{"user_id": user.id, "created_at": now + timedelta(seconds=offset + i),
+                 "heart_rate": 70.0 + i % 5, "systolic": 120.0, "diastolic": 80.0} for i in range(k)]
+
+    for label, k, repeats in (("score_rows (1 reading)", 1, 500), ("score_rows (1000 batch)", 1000, 20)):
+        t0 = time.perf_counter()
+        for r in range(repeats):
+            vb.score_rows(db, rows(k, r * k))
+            db.commit()
+        dt = (time.perf_counter() - t0) / repeats
+        print(f"{label:23s}: {dt * 1000:8.2f} ms/call  ({dt / k * 1e6:7.1f} us/reading, incl. load + upsert + commit)")
+    db.close()
+
+
+def bench_replay(x: np.ndarray) -> None:
+    alpha, floor = settings.VITALS_BASELINE_ALPHA, vb.MIN_STD["heart_rate"]
+    t0 = time.perf_counter()
+    state_loop, z_loop = vb._scan_loop(x.tolist(), alpha, floor)
+    t_loop = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    state_vec, z_vec = vb.scan(x, alpha, floor)
+    t_vec = time.perf_counter() - t0
+
+    z_loop = np.asarray(z_loop)
+    assert state_loop[0] == state_vec[0]
+    assert math.isclose(state_loop[1], state_vec[1], rel_tol=1e-9)
+    assert math.isclose(state_loop[2], state_vec[2], rel_tol=1e-6)
+    assert np.array_equal(np.isnan(z_loop), np.isnan(z_vec))
+    ok = ~np.isnan(z_loop)
+    err = float(np.max(np.abs(z_loop[ok] - z_vec[ok])))
+    assert err < 1e-6, err
+    flagged = int(np.sum(np.abs(z_vec[ok]) >= settings.VITALS_ANOMALY_Z))
+    print(f"parity ok: {len(x)} readings, max |dz| {err:.1e}, {flagged} anomalous")
+    print(f"replay step loop       : {t_loop:8.3f} s  ({len(x) / t_loop / 1e6:6.2f} M readings/s)")
+    print(f"replay vectorized scan : {t_vec:8.3f} s  ({len(x) / t_vec / 1e6:6.2f} M readings/s)")
+    print(f"speed-up               : {t_loop / t_vec:8.1f}x")
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000
+    x = series(n)
+    bench_step(x)
+    bench_write_path()
+    bench_replay(x)
+
+
+if __name__ == "__main__":
+    main()
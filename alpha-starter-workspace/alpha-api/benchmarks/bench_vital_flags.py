@@ -0,0 +1,136 @@
+"""Vital flag classification: per-row branches vs the vectorized engine.
+
+First checks (property test) that ``app.services.vital_flags`` agrees with the
+original branch-per-row functions, kept verbatim below as the reference, on
+random readings dense around every threshold plus missing values. Then times
+classifying N readings (all four metrics) both ways.
+
+Usage (from alpha-api/):  python -m benchmarks.bench_vital_flags [readings] [property_cases]
+"""
+import os
+import random
+import sys
+import time
+
+# In-memory database (set before _env, which would pick a temp file)
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+from . import _env  # noqa: F401  (environment defaults, before any app import)
+
+import numpy as np  # noqa: E402
+
+from app.services import vital_flags as vf  # noqa: E402
+
+
+# ---- reference: the branch logic previously duplicated in routers/vitals.py and routers/reports.py ----
+
+def ref_bp(sys, dia):
+    if sys is None or dia is None:
+        return None
+    if sys >= 180 or dia >= 120:
+        return "hypertensive-crisis"
+    if sys >= 140 or dia >= 90:
+        return "hypertension-stage2"
+    if sys >= 130 or dia >= 80:
+        return "hypertension-stage1"
+    if sys >= 120 and dia < 80:
+        return "elevated"
+    return "normal"
+
+
+def ref_hr(hr):
+    if hr is None:
+        return None
+    if hr < 40:
+        return "bradycardia-severe"
+    if hr < 60:
+        return "bradycardia"
+    if hr > 120:
+        return "tachycardia-severe"
+    if hr > 100:
+        return "tachycardia"
+    return "normal"
+
+
+def ref_temp(t):
+    if t is None:
+        return None
+    if t >= 39.0:
+        return "fever-high"
+    if t >= 38.0:
+        return "fever"
+    if t < 35.0:
+        return "hypothermia"
+    return "normal"
+
+
+def ref_glucose(g):
+    if g is None:
+        return None
+    if g >= 240:
+        return "hyperglycemia"
+    if g < 70:
+        return "hypoglycemia"
+    return "normal"
+
+
+THRESHOLDS = [35, 38, 39, 40, 60, 70, 80, 90, 100, 120, 130, 140, 180, 240]
+
+
+def random_value(rnd: random.Random):
+    r = rnd.random()
+    if r < 0.1:
+        return None
+    if r < 0.5:
+        # exactly on a threshold or one ulp-ish either side
+        return rnd.choice(THRESHOLDS) + rnd.choice((-1e-9, 0.0, 1e-9))
+    return rnd.uniform(0, 300)
+
+
+def property_check(cases: int) -> None:
+    rnd = random.Random(2024)
+    cols = {f: [random_value(rnd) for _ in range(cases)]
+            for f in ("systolic", "diastolic", "heart_rate", "temperature_c", "glucose_mgdl")}
+    checks = (
+        (vf.BP, ref_bp, vf.flag_bp), (vf.HR, ref_hr, vf.flag_hr),
+        (vf.TEMP, ref_temp, vf.flag_temp), (vf.GLUCOSE, ref_glucose, vf.flag_glucose),
+    )
+    for metric, ref, scalar in checks:
+        columns = [cols[f] for f in metric.fields]
+        expected = [ref(*vals) for vals in zip(*columns, strict=True)]
+        assert [scalar(*vals) for vals in zip(*columns, strict=True)] == expected, metric.name
+        assert vf.labels(metric, vf.codes(metric, *columns)) == expected, metric.name
+        tally = {k: expected.count(k) for k in metric.labels}
+        assert vf.counts(metric, vf.codes(metric, *columns)) == tally, metric.name
+    print(f"property check ok: {cases} random readings x 4 metrics (scalar, vectorized, counts)")
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000_000
+    cases = int(sys.argv[2]) if len(sys.argv) > 2 else 200_000
+    property_check(cases)
+
+    rng = np.random.default_rng(1)
+    arrays = {f: rng.uniform(20, 260, n) for f in ("systolic", "diastolic", "heart_rate", "temperature_c", "glucose_mgdl")}
+    for a in arrays.values():
+        a[rng.random(n) < 0.1] = np.nan
+    lists = {f: [None if v != v else v for v in a.tolist()] for f, a in arrays.items()}
+
+    t0 = time.perf_counter()
+    for s, d, hr, t, g in zip(lists["systolic"], lists["diastolic"], lists["heart_rate"],
+                              lists["temperature_c"], lists["glucose_mgdl"], strict=True):
+        ref_bp(s, d), ref_hr(hr), ref_temp(t), ref_glucose(g)
+    t_rows = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    for metric in vf.METRICS:
+        vf.codes(metric, *(arrays[f] for f in metric.fields))
+    t_vec = time.perf_counter() - t0
+
+    print(f"{n} readings x 4 metrics")
+    print(f"per-row branches : {t_rows:8.2f} s  ({n / t_rows / 1e6:6.2f} M readings/s)")
+    print(f"vectorized codes : {t_vec:8.2f} s  ({n / t_vec / 1e6:6.2f} M readings/s)")
+    print(f"speed-up         : {t_rows / t_vec:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
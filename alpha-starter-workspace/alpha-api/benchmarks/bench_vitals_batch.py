@@ -0,0 +1,49 @@
+"""Ingestion throughput: POST /vitals one reading at a time vs POST /vitals/batch.
+
+Usage (from alpha-api/):  python -m benchmarks.bench_vitals_batch [readings] [batch_size]
+"""
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+from . import _env  # noqa: F401  (environment defaults, before any app import)
+
+from fastapi.testclient import TestClient  # type: ignore
+
+from app.main import app  # type: ignore
+
+
+def readings(n: int):
+    rnd = random.Random(1)
+    start = datetime.utcnow() - timedelta(minutes=n)
+    return [{"heart_rate": rnd.uniform(50, 130), "measured_at": (start + timedelta(minutes=i)).isoformat()}
+            for i in range(n)]
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1440
+    batch = int(sys.argv[2]) if len(sys.argv) > 2 else 1440
+    client = TestClient(app)
+    r = client.post("/auth/register", json={"email": "bench@example.com", "password": "bench1234"})
+    headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+    data = readings(n)
+
+    t0 = time.perf_counter()
+    for d in data:
+        client.post("/vitals", headers=headers, json={"heart_rate": d["heart_rate"]})
+    single = n / (time.perf_counter() - t0)
+
+    t0 = time.perf_counter()
+    for i in range(0, n, batch):
+        r = client.post("/vitals/batch", headers=headers, json={"readings": data[i:i + batch]})
+        assert r.status_code == 201, r.text
+    batched = n / (time.perf_counter() - t0)
+
+    print(f"single-item POST /vitals : {single:10.0f} readings/s")
+    print(f"POST /vitals/batch ({batch:>4}) : {batched:10.0f} readings/s")
+    print(f"speed-up                 : {batched / single:10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
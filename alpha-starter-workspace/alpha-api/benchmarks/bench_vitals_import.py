@@ -0,0 +1,121 @@
+"""Streaming import: throughput and peak memory of POST /vitals/import.
+
+The body is generated lazily and fed to the ASGI app in 64 KiB chunks (the
+TestClient would buffer the whole upload), so peak RSS reflects the server
+side only. Memory should stay flat as the row count grows.
+
+Usage (from alpha-api/):  python -m benchmarks.bench_vitals_import [rows] [ndjson|csv]
+"""
+import asyncio
+import json
+import random
+import resource
+import sys
+import time
+from datetime import datetime, timedelta
+
+from . import _env  # noqa: F401  (environment defaults, before any app import)
+
+from fastapi.testclient import TestClient  # type: ignore
+
+from app.main import app  # type: ignore
+
+
+CHUNK = 64 * 1024
+
+
+def body_chunks(n: int, fmt: str, stats: dict):
+    rnd = random.Random(n)
+    # Cycle a pool of readings so generating the body stays cheap next to the server
+    pool = [(rnd.randint(95, 190), rnd.randint(55, 125), rnd.randint(40, 140), rnd.randint(60, 260))
+            for _ in range(997)]
+    start = datetime(2020, 1, 1)
+    buf = ["measured_at,systolic,diastolic,heart_rate,glucose_mgdl\n"] if fmt == "csv" else []
+    size = 0
+    for i in range(n):
+        ts = (start + timedelta(minutes=i)).isoformat()
+        sys_, dia, hr, glu = pool[i % len(pool)]
+        if fmt == "csv":
+            buf.append(f"{ts},{sys_},{dia},{hr},{glu}\n")
+        else:
+            buf.append(json.dumps({"measured_at": ts, "systolic": sys_, "diastolic": dia,
+                                   "heart_rate": hr, "glucose_mgdl": glu}) + "\n")
+        if len(buf) >= 512:
+            data = "".join(buf).encode()
+            buf.clear()
+            size += len(data)
+            for j in range(0, len(data), CHUNK):
+                yield data[j:j + CHUNK]
+    data = "".join(buf).encode()
+    size += len(data)
+    stats["bytes"] = size
+    if data:
+        yield data
+
+
+async def post_stream(path: str, headers: dict, chunks) -> tuple:
+    it = iter(chunks)
+    pending = [next(it, b"")]
+    done = asyncio.Event()
+
+    async def receive():
+        if not pending:
+            # Body finished: behave like a server and wait for the disconnect
+            await done.wait()
+            return {"type": "http.disconnect"}
+        chunk = pending.pop()
+        nxt = next(it, None)
+        if nxt is not None:
+            pending.append(nxt)
+        return {"type": "http.request", "body": chunk, "more_body": nxt is not None}
+
+    status, out = {}, []
+
+    async def send(msg):
+        if msg["type"] == "http.response.start":
+            status["code"] = msg["status"]
+        elif msg["type"] == "http.response.body":
+            out.append(msg.get("body", b""))
+            if not msg.get("more_body"):
+                done.set()
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "",
+        "query_string": b"", "client": ("127.0.0.1", 50000), "server": ("testserver", 80),
+        "headers": [(k.lower().encode(), v.encode()) for k, v in headers.items()],
+    }
+    await app(scope, receive, send)
+    return status.get("code"), json.loads(b"".join(out) or b"null")
+
+
+def peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0  # KiB on Linux
+
+
+def run(n: int, fmt: str, headers: dict) -> None:
+    stats: dict = {}
+    ctype = "text/csv" if fmt == "csv" else "application/x-ndjson"
+    before = peak_rss_mb()
+    t0 = time.perf_counter()
+    code, body = asyncio.run(post_stream("/vitals/import", {**headers, "content-type": ctype},
+                                         body_chunks(n, fmt, stats)))
+    dt = time.perf_counter() - t0
+    assert code == 200 and body["imported"] == n, (code, body)
+    print(f"{n:>10} rows  {stats['bytes'] / 1e6:8.1f} MB  {dt:7.1f} s  {n / dt:9.0f} rows/s  "
+          f"chunks={body['chunks']:<5} peak RSS {before:7.1f} -> {peak_rss_mb():7.1f} MB")
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000
+    fmt = sys.argv[2] if len(sys.argv) > 2 else "ndjson"
+    client = TestClient(app)
+    r = client.post("/auth/register", json={"email": "bench@example.com", "password": "bench1234"})
+    headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+    # Small warm-up run first: peak RSS should barely move for the large one
+    for size in (max(1, n // 20), n):
+        run(size, fmt, headers)
+
+
+if __name__ == "__main__":
+    main()
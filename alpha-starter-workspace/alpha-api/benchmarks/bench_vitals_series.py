@@ -0,0 +1,89 @@
+"""Chart series: raw rows vs day buckets vs LTTB points for a year of readings.
+
+Seeds one user with a year of minute-level heart-rate readings, then times
+``GET /vitals/series`` with ``bucket=day``/``bucket=hour`` and ``points=N``.
+The payload size is compared with shipping every raw reading, and the
+Python heap peak (tracemalloc) while downsampling shows that rows are
+streamed rather than loaded at once.
+
+Usage (from alpha-api/):  python -m benchmarks.bench_vitals_series [minutes_between_readings] [points]
+"""
+import json
+import math
+import sys
+import time
+import tracemalloc
+import uuid
+from datetime import datetime, timedelta
+
+from . import _env  # noqa: F401  (environment defaults, before any app import)
+
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import insert  # noqa: E402
+
+from app.db import SessionLocal  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models_vitals import VitalRecord  # noqa: E402
+from app.services import vital_series  # noqa: E402
+
+
+def seed(db, user_id: str, step_min: int) -> int:
+    end = datetime.utcnow().replace(second=0, microsecond=0)
+    start = end - timedelta(days=365)
+    n = 365 * 24 * 60 // step_min
+    rows = []
+    for i in range(n):
+        t = start + timedelta(minutes=i * step_min)
+        # daily rhythm + slow drift + an occasional spike
+        hr = 70 + 12 * math.sin(i * step_min / 1440 * 2 * math.pi) + 5 * math.sin(i / 5000)
+        if i % 9973 == 0:
+            hr += 60
+        rows.append({"id": str(uuid.uuid4()), "user_id": user_id, "created_at": t, "heart_rate": round(hr, 1)})
+        if len(rows) == 20000:
+            db.execute(insert(VitalRecord.__table__), rows)
+            rows.clear()
+    if rows:
+        db.execute(insert(VitalRecord.__table__), rows)
+    db.commit()
+    return n
+
+
+def timed_get(client, headers, params):
+    t0 = time.perf_counter()
+    r = client.get("/vitals/series", headers=headers, params=params)
+    dt = time.perf_counter() - t0
+    assert r.status_code == 200, r.text
+    return dt, len(r.content), r.json()
+
+
+def main():
+    step = int(sys.argv[1]) if len(sys.argv) > 1 else 1
+    points = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    with TestClient(app) as client:
+        r = client.post("/auth/register", json={"email": "series@example.com", "password": "pass1234"})
+        headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+        user_id = client.get("/auth/me", headers=headers).json()["id"]
+        db = SessionLocal()
+        t0 = time.perf_counter()
+        n = seed(db, user_id, step)
+        print(f"seeded {n} readings in {time.perf_counter() - t0:.1f} s")
+
+        since = (datetime.utcnow() - timedelta(days=366)).isoformat()
+        raw_bytes = n * len(json.dumps({"t": datetime.utcnow().isoformat(), "v": 71.3}))
+        print(f"raw readings (estimate)     : {raw_bytes / 1e6:8.2f} MB")
+        for params in ({"bucket": "day"}, {"bucket": "hour"}, {"points": points}):
+            dt, size, body = timed_get(client, headers, {"metric": "heart_rate", "from": since, **params})
+            shape = f"{len(body['buckets'])} buckets" if body["buckets"] else f"{len(body['points'])} points"
+            print(f"{str(params):28s}: {dt * 1000:8.1f} ms  {size / 1e3:9.1f} kB  {shape} of {body['total']}")
+
+        start = datetime.utcnow() - timedelta(days=366)
+        tracemalloc.start()
+        total, pts = vital_series.downsample(db, user_id, "heart_rate", start, datetime.utcnow(), points)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"downsample {total} -> {len(pts)} points: python heap peak {peak / 1e6:.2f} MB")
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""Local OpenAI-compatible chat-completions server for load tests.
+
+Answers ``POST /v1/chat/completions`` after ``latency`` seconds (plus up to
+``jitter``) with a JSON body the app's medication / symptom parsers accept.
+``error_rate`` of the requests get a 503 and ``hang_rate`` never answer
+(exercising timeouts). HTTP/1.1 keep-alive is supported, and the server
+counts requests and TCP connections, so a client that reuses connections
+shows far fewer connections than requests. ``GET /stats`` returns the
+counters.
+
+Run standalone and point the API at it:
+
+    python -m benchmarks.fake_llm_server --port 8089 --latency 0.3
+    LLM_BASE_URL=http://127.0.0.1:8089/v1 OPENAI_API_KEY=fake uvicorn app.main:app
+
+or start it in-process from a benchmark with ``FakeLlmServer(...).start()``.
+"""
+import argparse
+import asyncio
+import json
+import random
+import threading
+from typing import Any, Dict, Optional
+
+
+class FakeLlmServer:
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.3, jitter: float = 0.0,
+                 error_rate: float = 0.0, hang_rate: float = 0.0, seed: int = 0) -> None:
+        self.host, self.port = host, port
+        self.latency, self.jitter = latency, jitter
+        self.error_rate, self.hang_rate = error_rate, hang_rate
+        self._rnd = random.Random(seed)
+        self.requests = 0
+        self.connections = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._server: Optional[asyncio.base_events.Server] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}/v1"
+
+    def stats(self) -> Dict[str, Any]:
+        return {"requests": self.requests, "connections": self.connections, "errors": self.errors,
+                "in_flight": self.in_flight, "max_in_flight": self.max_in_flight}
+
+    def reset(self) -> None:
+        self.requests = self.connections = self.errors = self.max_in_flight = 0
+
+    @staticmethod
+    def answer(user_message: str) -> Dict[str, Any]:
+        if user_message.startswith("Medication"):
+            content = {"purpose": "Relieves pain and inflammation.", "common_side_effects": ["stomach upset"],
+                       "interactions": ["blood thinners"], "usage": "Follow the label.", "disclaimer": "General info."}
+        else:
+            content = {"advice": ["Rest and hydrate."], "causes": ["Viral infection"], "implications": [],
+                       "risk_flags": [], "disclaimer": "Not a diagnosis."}
+        return {"id": "chatcmpl-fake", "object": "chat.completion",
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": json.dumps(content)},
+                             "finish_reason": "stop"}]}
+
+    async def _respond(self, writer: asyncio.StreamWriter, status: int, body: Dict[str, Any]) -> None:
+        data = json.dumps(body).encode()
+        reason = {200: "OK", 404: "Not Found", 503: "Service Unavailable"}.get(status, "Error")
+        writer.write(f"HTTP/1.1 {status} {reason}\r\nContent-Type: application/json\r\n"
+                     f"Content-Length: {len(data)}\r\nConnection: keep-alive\r\n\r\n".encode() + data)
+        await writer.drain()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                lines = head.decode("latin-1").split("\r\n")
+                method, path, _ = lines[0].split(" ", 2)
+                headers = {k.strip().lower(): v.strip() for k, _, v in (ln.partition(":") for ln in lines[1:] if ln)}
+                raw = await reader.readexactly(int(headers.get("content-length", 0)))
+                if method == "GET" and path == "/stats":
+                    await self._respond(writer, 200, self.stats())
+                    continue
+                if method != "POST" or not path.endswith("/chat/completions"):
+                    await self._respond(writer, 404, {"error": "not found"})
+                    continue
+                self.requests += 1
+                self.in_flight += 1
+                self.max_in_flight = max(self.max_in_flight, self.in_flight)
+                try:
+                    roll = self._rnd.random()
+                    if roll < self.hang_rate:
+                        await asyncio.sleep(3600)
+                    await asyncio.sleep(self.latency + self._rnd.random() * self.jitter)
+                    if roll < self.hang_rate + self.error_rate:
+                        self.errors += 1
+                        await self._respond(writer, 503, {"error": {"message": "overloaded"}})
+                        continue
+                    messages = json.loads(raw or b"{}").get("messages") or [{}]
+                    await self._respond(writer, 200, self.answer(str(messages[-1].get("content", ""))))
+                finally:
+                    self.in_flight -= 1
+        except (asyncio.IncompleteReadError, ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self) -> None:
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        async with self._server:
+            await self._server.serve_forever()
+
+    def start(self) -> "FakeLlmServer":
+        """Serve from a daemon thread; returns once the port is bound."""
+        ready = threading.Event()
+
+        def run() -> None:
+            self._loop = asyncio.new_event_loop()
+            self._server = self._loop.run_until_complete(asyncio.start_server(self._handle, self.host, self.port))
+            self.port = self._server.sockets[0].getsockname()[1]
+            ready.set()
+            self._loop.run_forever()
+
+        threading.Thread(target=run, name="fake-llm", daemon=True).start()
+        ready.wait()
+        return self
+
+    async def _shutdown(self) -> None:
+        self._server.close()
+        handlers = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+        for task in handlers:
+            task.cancel()
+        await asyncio.gather(*handlers, return_exceptions=True)
+
+    def stop(self) -> None:
+        if self._loop is not None and self._server is not None:
+            asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop).result()
+            self._loop.call_soon_threadsafe(self._loop.stop)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake OpenAI-compatible chat-completions server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency", type=float, default=0.3, help="seconds per answer")
+    parser.add_argument("--jitter", type=float, default=0.1, help="extra random seconds, up to this much")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests answered with 503")
+    parser.add_argument("--hang-rate", type=float, default=0.0, help="share of requests never answered")
+    args = parser.parse_args()
+    server = FakeLlmServer(args.host, args.port, args.latency, args.jitter, args.error_rate, args.hang_rate)
+    print(f"fake LLM on {server.base_url} (latency {args.latency}s, errors {args.error_rate:.0%}, hangs {args.hang_rate:.0%})")
+    try:
+        asyncio.run(server.serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+import argparse
+import json
+from datetime import date
+
+from app.services import cohorts
+from app.services.cohorts import cohort_engine
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Vital flag distribution per profile cohort (age band / sex / activity level).')
+    parser.add_argument('--metric', default='bp', choices=[m.name for m in cohorts.METRICS])
+    parser.add_argument('--by', default=','.join(cohorts.DIMENSIONS), help='comma-separated dimensions (default: all)')
+    parser.add_argument('--from', dest='start', type=date.fromisoformat, help='first UTC day (default: COHORT_DEFAULT_DAYS before --to)')
+    parser.add_argument('--to', dest='end', type=date.fromisoformat, help='last UTC day (default: today)')
+    parser.add_argument('--source', default='rollups', choices=cohorts.SOURCES, help='daily rollups (fast) or raw readings')
+    parser.add_argument('--workers', type=int, help='concurrent chunk queries (default: COHORT_WORKERS)')
+    parser.add_argument('--chunk', type=int, help='users per chunk (default: COHORT_CHUNK_USERS)')
+    parser.add_argument('--json', action='store_true', help='print the full result as JSON')
+    args = parser.parse_args()
+    try:
+        q = cohorts.make_query(args.metric, [d for d in args.by.split(',') if d.strip()], args.start, args.end, args.source)
+    except ValueError as e:
+        parser.error(str(e))
+    result = cohort_engine.compute(q, workers=args.workers, chunk=args.chunk)
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+    labels = cohorts.metric_by_name(q.metric).labels
+    print('\t'.join(list(q.by) + ['users', 'readings'] + list(labels)))
+    for c in result['cohorts']:
+        shares = [f"{c['shares'][label] * 100:.1f}%" for label in labels]
+        print('\t'.join([c[d] for d in q.by] + [str(c['users']), str(c['readings'])] + shares))
+    print(f"{len(result['cohorts'])} cohorts, {sum(c['readings'] for c in result['cohorts'])} readings "
+          f"from {q.source} {q.start}..{q.end} in {result['chunks']} chunks, {result['seconds']:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+from contextlib import nullcontext
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0008_hot_query_indexes'
+down_revision = '0007_email_verification'
+branch_labels = None
+depends_on = None
+
+
+# (name, table, columns) — per-user, time-ordered list/report queries
+COMPOSITE_INDEXES = [
+    ('ix_vital_records_user_id_created_at', 'vital_records', ['user_id', 'created_at']),
+    ('ix_symptom_reports_user_id_created_at', 'symptom_reports', ['user_id', 'created_at']),
+    ('ix_audit_events_user_id_created_at', 'audit_events', ['user_id', 'created_at']),
+    ('ix_goals_user_id_created_at', 'goals', ['user_id', 'created_at']),
+    ('ix_goal_progress_user_id_goal_id_created_at', 'goal_progress', ['user_id', 'goal_id', 'created_at']),
+    ('ix_reminders_user_id_scheduled_at', 'reminders', ['user_id', 'scheduled_at']),
+]
+
+# Dispatcher scan: sent_at IS NULL AND scheduled_at <= now
+PENDING_REMINDERS = 'ix_reminders_pending_scheduled_at'
+PENDING_WHERE = sa.text('sent_at IS NULL')
+
+
+def _concurrently() -> bool:
+    # Postgres can build indexes without blocking writes, outside a transaction
+    return op.get_context().dialect.name == 'postgresql'
+
+
+def upgrade() -> None:
+    kw = {'postgresql_concurrently': True} if _concurrently() else {}
+    with op.get_context().autocommit_block() if _concurrently() else nullcontext():
+        for name, table, cols in COMPOSITE_INDEXES:
+            op.create_index(name, table, cols, **kw)
+        op.create_index(
+            PENDING_REMINDERS, 'reminders', ['scheduled_at'],
+            postgresql_where=PENDING_WHERE, sqlite_where=PENDING_WHERE, **kw,
+        )
+
+
+def downgrade() -> None:
+    kw = {'postgresql_concurrently': True} if _concurrently() else {}
+    with op.get_context().autocommit_block() if _concurrently() else nullcontext():
+        op.drop_index(PENDING_REMINDERS, table_name='reminders', **kw)
+        for name, table, _cols in reversed(COMPOSITE_INDEXES):
+            op.drop_index(name, table_name=table, **kw)
+
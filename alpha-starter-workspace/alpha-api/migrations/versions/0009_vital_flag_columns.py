@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+from contextlib import nullcontext
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0009_vital_flag_columns'
+down_revision = '0008_hot_query_indexes'
+branch_labels = None
+depends_on = None
+
+
+# Rules as of this revision, frozen here so later edits to
+# app.services.vital_flags cannot change what this migration writes
+FLAG_CASES = {
+    'bp_flag': (
+        "CASE WHEN (systolic IS NULL OR diastolic IS NULL) THEN NULL"
+        " WHEN (systolic >= 180 OR diastolic >= 120) THEN 'hypertensive-crisis'"
+        " WHEN (systolic >= 140 OR diastolic >= 90) THEN 'hypertension-stage2'"
+        " WHEN (systolic >= 130 OR diastolic >= 80) THEN 'hypertension-stage1'"
+        " WHEN (systolic >= 120 AND diastolic < 80) THEN 'elevated'"
+        " ELSE 'normal' END"
+    ),
+    'hr_flag': (
+        "CASE WHEN (heart_rate IS NULL) THEN NULL"
+        " WHEN (heart_rate < 40) THEN 'bradycardia-severe'"
+        " WHEN (heart_rate < 60) THEN 'bradycardia'"
+        " WHEN (heart_rate > 120) THEN 'tachycardia-severe'"
+        " WHEN (heart_rate > 100) THEN 'tachycardia'"
+        " ELSE 'normal' END"
+    ),
+    'temp_flag': (
+        "CASE WHEN (temperature_c IS NULL) THEN NULL"
+        " WHEN (temperature_c >= 39.0) THEN 'fever-high'"
+        " WHEN (temperature_c >= 38.0) THEN 'fever'"
+        " WHEN (temperature_c < 35.0) THEN 'hypothermia'"
+        " ELSE 'normal' END"
+    ),
+    'glucose_flag': (
+        "CASE WHEN (glucose_mgdl IS NULL) THEN NULL"
+        " WHEN (glucose_mgdl >= 240) THEN 'hyperglycemia'"
+        " WHEN (glucose_mgdl < 70) THEN 'hypoglycemia'"
+        " ELSE 'normal' END"
+    ),
+}
+FLAG_COLUMNS = list(FLAG_CASES)
+FLAG_INDEXES = [(f'ix_vital_records_user_id_{c}_created_at', ['user_id', c, 'created_at']) for c in FLAG_COLUMNS]
+BACKFILL_BATCH = 5000
+
+vital_records = sa.table(
+    'vital_records',
+    sa.column('id', sa.String),
+    *(sa.column(c, sa.String) for c in FLAG_COLUMNS),
+)
+
+
+def _postgres() -> bool:
+    return op.get_context().dialect.name == 'postgresql'
+
+
+def _flag_values() -> dict:
+    return {c: sa.literal_column(sql) for c, sql in FLAG_CASES.items()}
+
+
+def _backfill() -> None:
+    if op.get_context().as_sql:
+        # Offline (--sql): a single statement, no batching possible
+        op.execute(vital_records.update().values(**_flag_values()))
+        return
+    bind = op.get_bind()
+    last_id = ''
+    while True:
+        ids = bind.execute(
+            sa.select(vital_records.c.id).where(vital_records.c.id > last_id)
+            .order_by(vital_records.c.id).limit(BACKFILL_BATCH)
+        ).scalars().all()
+        if not ids:
+            break
+        bind.execute(vital_records.update().where(vital_records.c.id.in_(ids)).values(**_flag_values()))
+        last_id = ids[-1]
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('vital_records') as b:
+        for c in FLAG_COLUMNS:
+            b.add_column(sa.Column(c, sa.String(length=32), nullable=True))
+    # On Postgres each backfill batch commits on its own and the indexes are
+    # built CONCURRENTLY, so writers are never blocked for the whole table
+    kw = {'postgresql_concurrently': True} if _postgres() else {}
+    with op.get_context().autocommit_block() if _postgres() else nullcontext():
+        _backfill()
+        for name, cols in FLAG_INDEXES:
+            op.create_index(name, 'vital_records', cols, **kw)
+
+
+def downgrade() -> None:
+    kw = {'postgresql_concurrently': True} if _postgres() else {}
+    with op.get_context().autocommit_block() if _postgres() else nullcontext():
+        for name, _cols in reversed(FLAG_INDEXES):
+            op.drop_index(name, table_name='vital_records', **kw)
+    with op.batch_alter_table('vital_records') as b:
+        for c in reversed(FLAG_COLUMNS):
+            b.drop_column(c)
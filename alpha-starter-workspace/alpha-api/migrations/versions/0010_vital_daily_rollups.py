@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0010_vital_daily_rollups'
+down_revision = '0009_vital_flag_columns'
+branch_labels = None
+depends_on = None
+
+
+# Backfill as of this revision, frozen here (not built from app code) so
+# later changes to the rollup fields or flag labels cannot change it
+BACKFILL = """
+INSERT INTO vital_daily_rollups (
+    user_id, day, readings, systolic_n, systolic_sum, systolic_sumsq, systolic_min, systolic_max,
+    diastolic_n, diastolic_sum, diastolic_sumsq, diastolic_min, diastolic_max, heart_rate_n,
+    heart_rate_sum, heart_rate_sumsq, heart_rate_min, heart_rate_max, temperature_c_n,
+    temperature_c_sum, temperature_c_sumsq, temperature_c_min, temperature_c_max, glucose_mgdl_n,
+    glucose_mgdl_sum, glucose_mgdl_sumsq, glucose_mgdl_min, glucose_mgdl_max, weight_kg_n,
+    weight_kg_sum, weight_kg_sumsq, weight_kg_min, weight_kg_max, bp_normal, bp_elevated,
+    bp_hypertension_stage1, bp_hypertension_stage2, bp_hypertensive_crisis, hr_normal, hr_bradycardia,
+    hr_bradycardia_severe, hr_tachycardia, hr_tachycardia_severe, temp_normal, temp_fever,
+    temp_fever_high, temp_hypothermia, glucose_normal, glucose_hypoglycemia, glucose_hyperglycemia,
+    updated_at
+)
+SELECT
+    user_id,
+    {day} AS day,
+    count(*) AS readings,
+    count(systolic),
+    coalesce(sum(systolic), 0.0),
+    coalesce(sum(systolic * systolic), 0.0),
+    min(systolic),
+    max(systolic),
+    count(diastolic),
+    coalesce(sum(diastolic), 0.0),
+    coalesce(sum(diastolic * diastolic), 0.0),
+    min(diastolic),
+    max(diastolic),
+    count(heart_rate),
+    coalesce(sum(heart_rate), 0.0),
+    coalesce(sum(heart_rate * heart_rate), 0.0),
+    min(heart_rate),
+    max(heart_rate),
+    count(temperature_c),
+    coalesce(sum(temperature_c), 0.0),
+    coalesce(sum(temperature_c * temperature_c), 0.0),
+    min(temperature_c),
+    max(temperature_c),
+    count(glucose_mgdl),
+    coalesce(sum(glucose_mgdl), 0.0),
+    coalesce(sum(glucose_mgdl * glucose_mgdl), 0.0),
+    min(glucose_mgdl),
+    max(glucose_mgdl),
+    count(weight_kg),
+    coalesce(sum(weight_kg), 0.0),
+    coalesce(sum(weight_kg * weight_kg), 0.0),
+    min(weight_kg),
+    max(weight_kg),
+    coalesce(sum(CASE WHEN bp_flag = 'normal' THEN 1 ELSE 0 END), 0),
+    coalesce(sum(CASE WHEN bp_flag = 'elevated' THEN 1 ELSE 0 END), 0),
+    coalesce(sum(CASE WHEN bp_flag = 'hypertension-stage1' THEN 1 ELSE 0 END), 0),
+    coalesce(sum(CASE WHEN bp_flag = 'hypertension-stage2' THEN 1 ELSE 0 END), 0),
+    coalesce(sum(CASE WHEN bp_flag = 'hypertensive-crisis' THEN 1 ELSE 0 END), 0),
+    coalesce(sum(CASE WHEN hr_flag = 'normal' THEN 1 ELSE 0 END), 0),
+    coalesce(sum(CASE WHEN hr_flag = 'bradycardia' THEN 1 ELSE 0 END), 0),
+    coalesce(sum(CASE WHEN hr_flag = 'bradycardia-severe' THEN 1 ELSE 0 END), 0),
+    coalesce(sum(CASE WHEN hr_flag = 'tachycardia' THEN 1 ELSE 0 END), 0),
+    coalesce(sum(CASE WHEN hr_flag = 'tachycardia-severe' THEN 1 ELSE 0 END), 0),
+    coalesce(sum(CASE WHEN temp_flag = 'normal' THEN 1 ELSE 0 END), 0),
+    coalesce(sum(CASE WHEN temp_flag = 'fever' THEN 1 ELSE 0 END), 0),
+    coalesce(sum(CASE WHEN temp_flag = 'fever-high' THEN 1 ELSE 0 END), 0),
+    coalesce(sum(CASE WHEN temp_flag = 'hypothermia' THEN 1 ELSE 0 END), 0),
+    coalesce(sum(CASE WHEN glucose_flag = 'normal' THEN 1 ELSE 0 END), 0),
+    coalesce(sum(CASE WHEN glucose_flag = 'hypoglycemia' THEN 1 ELSE 0 END), 0),
+    coalesce(sum(CASE WHEN glucose_flag = 'hyperglycemia' THEN 1 ELSE 0 END), 0),
+    :now
+FROM vital_records
+GROUP BY user_id, {day}
+"""
+
+
+def upgrade() -> None:
+    op.create_table(
+        'vital_daily_rollups',
+        sa.Column('user_id', sa.String(length=36), sa.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('day', sa.Date(), primary_key=True),
+        sa.Column('readings', sa.Integer(), nullable=False),
+        sa.Column('systolic_n', sa.Integer(), nullable=False),
+        sa.Column('systolic_sum', sa.Float(), nullable=False),
+        sa.Column('systolic_sumsq', sa.Float(), nullable=False),
+        sa.Column('systolic_min', sa.Float(), nullable=True),
+        sa.Column('systolic_max', sa.Float(), nullable=True),
+        sa.Column('diastolic_n', sa.Integer(), nullable=False),
+        sa.Column('diastolic_sum', sa.Float(), nullable=False),
+        sa.Column('diastolic_sumsq', sa.Float(), nullable=False),
+        sa.Column('diastolic_min', sa.Float(), nullable=True),
+        sa.Column('diastolic_max', sa.Float(), nullable=True),
+        sa.Column('heart_rate_n', sa.Integer(), nullable=False),
+        sa.Column('heart_rate_sum', sa.Float(), nullable=False),
+        sa.Column('heart_rate_sumsq', sa.Float(), nullable=False),
+        sa.Column('heart_rate_min', sa.Float(), nullable=True),
+        sa.Column('heart_rate_max', sa.Float(), nullable=True),
+        sa.Column('temperature_c_n', sa.Integer(), nullable=False),
+        sa.Column('temperature_c_sum', sa.Float(), nullable=False),
+        sa.Column('temperature_c_sumsq', sa.Float(), nullable=False),
+        sa.Column('temperature_c_min', sa.Float(), nullable=True),
+        sa.Column('temperature_c_max', sa.Float(), nullable=True),
+        sa.Column('glucose_mgdl_n', sa.Integer(), nullable=False),
+        sa.Column('glucose_mgdl_sum', sa.Float(), nullable=False),
+        sa.Column('glucose_mgdl_sumsq', sa.Float(), nullable=False),
+        sa.Column('glucose_mgdl_min', sa.Float(), nullable=True),
+        sa.Column('glucose_mgdl_max', sa.Float(), nullable=True),
+        sa.Column('weight_kg_n', sa.Integer(), nullable=False),
+        sa.Column('weight_kg_sum', sa.Float(), nullable=False),
+        sa.Column('weight_kg_sumsq', sa.Float(), nullable=False),
+        sa.Column('weight_kg_min', sa.Float(), nullable=True),
+        sa.Column('weight_kg_max', sa.Float(), nullable=True),
+        sa.Column('bp_normal', sa.Integer(), nullable=False),
+        sa.Column('bp_elevated', sa.Integer(), nullable=False),
+        sa.Column('bp_hypertension_stage1', sa.Integer(), nullable=False),
+        sa.Column('bp_hypertension_stage2', sa.Integer(), nullable=False),
+        sa.Column('bp_hypertensive_crisis', sa.Integer(), nullable=False),
+        sa.Column('hr_normal', sa.Integer(), nullable=False),
+        sa.Column('hr_bradycardia', sa.Integer(), nullable=False),
+        sa.Column('hr_bradycardia_severe', sa.Integer(), nullable=False),
+        sa.Column('hr_tachycardia', sa.Integer(), nullable=False),
+        sa.Column('hr_tachycardia_severe', sa.Integer(), nullable=False),
+        sa.Column('temp_normal', sa.Integer(), nullable=False),
+        sa.Column('temp_fever', sa.Integer(), nullable=False),
+        sa.Column('temp_fever_high', sa.Integer(), nullable=False),
+        sa.Column('temp_hypothermia', sa.Integer(), nullable=False),
+        sa.Column('glucose_normal', sa.Integer(), nullable=False),
+        sa.Column('glucose_hypoglycemia', sa.Integer(), nullable=False),
+        sa.Column('glucose_hyperglycemia', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+    )
+    # Backfill with one INSERT .. SELECT .. GROUP BY; from here on the API keeps
+    # the table current and `python rebuild_rollups.py` repairs any drift.
+    # CAST(.. AS DATE) is numeric in SQLite; date() yields the ISO string Date expects
+    day = 'date(created_at)' if op.get_context().dialect.name == 'sqlite' else 'CAST(created_at AS DATE)'
+    now = sa.bindparam('now', datetime.utcnow(), type_=sa.DateTime())
+    op.execute(sa.text(BACKFILL.replace('{day}', day)).bindparams(now))
+
+
+def downgrade() -> None:
+    op.drop_table('vital_daily_rollups')
@@ -0,0 +1,34 @@
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0011_vital_baselines'
+down_revision = '0010_vital_daily_rollups'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'vital_baselines',
+        sa.Column('user_id', sa.String(length=36), sa.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('field', sa.String(length=32), primary_key=True),
+        sa.Column('n', sa.Integer(), nullable=False),
+        sa.Column('mean', sa.Float(), nullable=False),
+        sa.Column('var', sa.Float(), nullable=False),
+        sa.Column('last_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+    )
+    with op.batch_alter_table('vital_records') as b:
+        b.add_column(sa.Column('anomaly_score', sa.Float(), nullable=True))
+        b.add_column(sa.Column('anomaly_metrics', sa.String(length=128), nullable=True))
+    # Baselines start empty; backfill them (and per-reading scores) with
+    # `python replay_baselines.py --stamp` after upgrading
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('vital_records') as b:
+        b.drop_column('anomaly_metrics')
+        b.drop_column('anomaly_score')
+    op.drop_table('vital_baselines')
@@ -0,0 +1,24 @@
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0012_data_versions'
+down_revision = '0011_vital_baselines'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Rows appear on the first write per (user, collection); a missing row means version 0
+    op.create_table(
+        'data_versions',
+        sa.Column('user_id', sa.String(length=36), sa.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('collection', sa.String(length=32), primary_key=True),
+        sa.Column('version', sa.BigInteger(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('data_versions')
@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0013_report_snapshots'
+down_revision = '0012_data_versions'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'report_snapshots',
+        sa.Column('user_id', sa.String(length=36), sa.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('period', sa.String(length=16), primary_key=True),
+        sa.Column('vitals_version', sa.BigInteger(), nullable=False),
+        sa.Column('symptoms_version', sa.BigInteger(), nullable=False),
+        sa.Column('payload', sa.Text(), nullable=False),
+        sa.Column('computed_at', sa.DateTime(), nullable=False),
+    )
+    op.create_table(
+        'report_jobs',
+        sa.Column('job_id', sa.String(length=64), primary_key=True),
+        sa.Column('periods', sa.String(length=64), nullable=False),
+        sa.Column('cursor', sa.String(length=36), nullable=True),
+        sa.Column('users_done', sa.Integer(), nullable=False),
+        sa.Column('snapshots', sa.Integer(), nullable=False),
+        sa.Column('seconds', sa.Float(), nullable=False),
+        sa.Column('started_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('report_jobs')
+    op.drop_table('report_snapshots')
@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0014_llm_cache'
+down_revision = '0013_report_snapshots'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'llm_cache_entries',
+        sa.Column('key', sa.String(length=64), primary_key=True),
+        sa.Column('kind', sa.String(length=16), nullable=False),
+        sa.Column('value', sa.Text(), nullable=False),
+        sa.Column('hits', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('expires_at', sa.DateTime(), nullable=False),
+    )
+    op.create_index('ix_llm_cache_entries_expires_at', 'llm_cache_entries', ['expires_at'])
+    op.create_index('ix_llm_cache_entries_kind_created_at', 'llm_cache_entries', ['kind', 'created_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_llm_cache_entries_kind_created_at', table_name='llm_cache_entries')
+    op.drop_index('ix_llm_cache_entries_expires_at', table_name='llm_cache_entries')
+    op.drop_table('llm_cache_entries')
@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+import argparse
+from datetime import date
+
+from app.services import report_precompute
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Precompute weekly/monthly report snapshots for all active users.')
+    parser.add_argument('--job', default=f'reports-{date.today():%Y-%m-%d}', help='job id; rerunning the same id resumes it')
+    parser.add_argument('--period', action='append', choices=report_precompute.PERIODS, help='period to compute (repeatable; default: week and month)')
+    parser.add_argument('--workers', type=int, help='worker processes (default: REPORT_PRECOMPUTE_WORKERS or CPU count; 1 = in-process)')
+    parser.add_argument('--chunk', type=int, help='users per chunk (default: REPORT_PRECOMPUTE_CHUNK)')
+    parser.add_argument('--restart', action='store_true', help='start the job over from the first user')
+    parser.add_argument('--max-chunks', type=int, help='stop after this many chunks (the job stays resumable)')
+    parser.add_argument('--quiet', action='store_true', help='no per-chunk progress lines')
+    args = parser.parse_args()
+
+    def progress(s):
+        print(f"  {s['users']} users, {s['snapshots']} snapshots, {s['users_per_sec']:.0f} users/s", flush=True)
+
+    stats = report_precompute.run(
+        args.job, tuple(args.period or report_precompute.PERIODS), workers=args.workers, chunk=args.chunk,
+        restart=args.restart, max_chunks=args.max_chunks, progress=None if args.quiet else progress,
+    )
+    if stats['skipped']:
+        print(f'{args.job} already finished (use --restart to run it again)')
+        return
+    if stats['resumed_from']:
+        print(f"resumed {args.job} after user {stats['resumed_from']}")
+    state = 'finished' if stats['finished'] else 'stopped (rerun to resume)'
+    print(f"{args.job} {state}: {stats['users']} users, {stats['snapshots']} snapshots in "
+          f"{stats['seconds']:.1f}s ({stats['users_per_sec']:.0f} users/s)")
+
+
+if __name__ == '__main__':
+    main()
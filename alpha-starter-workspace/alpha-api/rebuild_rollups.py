@@ -0,0 +1,24 @@
+from __future__ import annotations
+
+import argparse
+from datetime import date
+
+from app.db import SessionLocal
+from app.services import vital_rollups
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Recompute vital_daily_rollups from vital_records.')
+    parser.add_argument('--user', help='only this user id (default: all users)')
+    parser.add_argument('--since', type=date.fromisoformat, help='first day to recompute, YYYY-MM-DD (default: all)')
+    args = parser.parse_args()
+    db = SessionLocal()
+    try:
+        n = vital_rollups.rebuild(db, user_id=args.user, since=args.since)
+    finally:
+        db.close()
+    print(f'rebuilt {n} rollup rows')
+
+
+if __name__ == '__main__':
+    main()
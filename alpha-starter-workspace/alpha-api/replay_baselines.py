@@ -0,0 +1,25 @@
+from __future__ import annotations
+
+import argparse
+import time
+
+from app.db import SessionLocal
+from app.services import vital_baselines
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Recompute vital_baselines from vital_records history.')
+    parser.add_argument('--user', action='append', help='only this user id (repeatable; default: all users)')
+    parser.add_argument('--stamp', action='store_true', help='also rewrite anomaly_score/anomaly_metrics on every reading')
+    args = parser.parse_args()
+    db = SessionLocal()
+    t0 = time.perf_counter()
+    try:
+        users, readings = vital_baselines.replay(db, args.user, stamp=args.stamp)
+    finally:
+        db.close()
+    print(f'replayed {readings} readings for {users} users in {time.perf_counter() - t0:.1f}s')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,8 @@
+import asyncio
 import os
 import json
+import random
+from datetime import datetime, timedelta
 from typing import Dict
 
 # Configure environment before importing the app
@@ -9,10 +12,27 @@ os.environ.setdefault("JWT_ALG", "HS256")
 os.environ.setdefault("JWT_EXPIRE_MINUTES", "60")
 # Use JSON array form to satisfy pydantic-settings parsing for List[str]
 os.environ.setdefault("CORS_ORIGINS", "[]")
+os.environ.setdefault("ADMIN_EMAILS", "admin@example.com")
 
+import httpx  # type: ignore
 from fastapi.testclient import TestClient  # type: ignore
+from pydantic import TypeAdapter  # type: ignore
 
+from app.config import settings  # type: ignore
 from app.main import app  # type: ignore
+from app.db import SessionLocal  # type: ignore
+from app import models, schemas  # type: ignore
+from app.routers import vitals as vitals_router  # type: ignore
+from app.models_email_verification import EmailVerification  # type: ignore
+from app.models_symptoms import SymptomRecord  # type: ignore
+from app.security import new_uuid  # type: ignore
+from app.services import cohorts, data_versions, query_stats, report_precompute, vital_baselines, vital_flags, vital_rollups, vitals_import  # type: ignore
+from app.services.quantile_sketch import KLLSketch, merged  # type: ignore
+from app.services.circuit_breaker import CircuitBreaker  # type: ignore
+from app.services.llm_cache import llm_cache  # type: ignore
+from app.services.llm_client import llm_client  # type: ignore
+from app.services.report_cache import report_cache  # type: ignore
+from app.services.report_summary import snapshot_lookups  # type: ignore
 
 
 client = TestClient(app)
@@ -93,6 +113,69 @@ def run():
     must_ok(r)
     assert isinstance(r.json(), list)
 
+    # 6a) Batch ingestion with per-item status
+    r = client.post(
+        "/vitals/batch",
+        headers=auth_headers(token),
+        json={"readings": [
+            {"heart_rate": 130, "measured_at": "2024-01-01T08:00:00Z"},
+            {},
+        ]},
+    )
+    must_ok(r, 201)
+    body = r.json()
+    assert body["created"] == 1 and body["failed"] == 1
+    assert body["items"][0]["hr_flag"] == "tachycardia-severe"
+    assert body["items"][1]["status"] == "error"
+    r = client.post("/vitals/batch", headers=auth_headers(token),
+                    json={"readings": [{}] * (settings.VITALS_BATCH_MAX + 1)})
+    must_ok(r, 422)
+
+    # 6b) Keyset pagination: walk pages of one until the cursor runs out
+    for hr in (60, 61):
+        must_ok(client.post("/vitals", headers=auth_headers(token), json={"heart_rate": hr}), 201)
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 1, **({"cursor": cursor} if cursor else {})}
+        r = client.get("/vitals", headers=auth_headers(token), params=params)
+        must_ok(r)
+        seen.extend(v["id"] for v in r.json())
+        cursor = r.headers.get("x-next-cursor")
+        if not cursor:
+            break
+    assert len(seen) == len(set(seen)) == 4
+
+    # 6c) Streaming import (NDJSON and CSV) with per-line errors
+    ndjson = (
+        '{"heart_rate": 72, "measured_at": "2023-06-01T08:00:00Z"}\n'
+        "not json\n"
+        "\n"
+        '{"systolic": "abc"}\n'
+        '{"glucose_mgdl": 95, "measured_at": "2023-06-01T09:00:00"}'
+    )
+    r = client.post("/vitals/import", headers={**auth_headers(token), "Content-Type": "application/x-ndjson"},
+                    content=ndjson)
+    must_ok(r)
+    body = r.json()
+    assert body["imported"] == 2 and body["failed"] == 2, body
+    assert [e["line"] for e in body["errors"]] == [2, 4]
+    csv_body = "measured_at,systolic,diastolic,heart_rate\n2023-06-02T08:00:00,121,79,\n2023-06-02T09:00:00,,,\n"
+    r = client.post("/vitals/import", headers={**auth_headers(token), "Content-Type": "text/csv"}, content=csv_body)
+    must_ok(r)
+    body = r.json()
+    assert body["format"] == "csv" and body["imported"] == 1 and body["failed"] == 1, body
+
+    # The line limit is in bytes and holds for complete lines inside one chunk
+    async def split(*chunks):
+        async def gen():
+            for c in chunks:
+                yield c
+        return [item async for item in vitals_import.iter_lines(gen(), 8)]
+
+    assert asyncio.run(split(b"ok\r\n123456789\n12345678\r\n\xc3\xa9\xc3\xa9\xc3\xa9\xc3\xa9\xc3\xa9\nend")) == [
+        (1, "ok"), (2, None), (3, "12345678"), (4, None), (5, "end")]
+    assert asyncio.run(split(b"1234", b"567890", b"12\nok", b"\xc3", b"\xa9\n")) == [(1, None), (2, "ok\u00e9")]
+
     # 7) Symptoms create/list
     r = client.post(
         "/symptoms",
@@ -117,6 +200,485 @@ def run():
     r = client.get("/reports/summary?period=week", headers=auth_headers(token))
     must_ok(r)
 
+    # 9a) SQL-side flag counts agree with the per-row Python flags on random data
+    rnd = random.Random(42)
+    edges = [None, 34.9, 35, 37, 38, 39, 39.5, 40, 59.9, 60, 70, 79.9, 80, 89.9, 90, 100, 100.1,
+             119.9, 120, 120.5, 129.9, 130, 140, 179.9, 180, 239.9, 240]
+    base = datetime.utcnow() - timedelta(days=3)
+    readings = [
+        {f: rnd.choice(edges + [rnd.uniform(20, 260)])
+         for f in ("systolic", "diastolic", "heart_rate", "temperature_c", "glucose_mgdl")}
+        | {"weight_kg": 70, "measured_at": (base + timedelta(minutes=i)).isoformat()}
+        for i in range(300)
+    ]
+    must_ok(client.post("/vitals/batch", headers=auth_headers(token), json={"readings": readings}), 201)
+    since = (datetime.utcnow() - timedelta(days=6)).isoformat()
+
+    def check_summary():
+        r = client.get("/vitals", headers=auth_headers(token), params={"since": since, "limit": 500})
+        must_ok(r)
+        listed = r.json()
+        r = client.get("/reports/summary?period=week", headers=auth_headers(token))
+        must_ok(r)
+        vs = r.json()["vitals_summary"]
+        assert vs["total"] == len(listed), (vs["total"], len(listed))
+        for key, flag in (("bp", "bp_flag"), ("hr", "hr_flag"), ("temp", "temp_flag"), ("glucose", "glucose_flag")):
+            expected: Dict[str, int] = {}
+            for v in listed:
+                if v[flag]:
+                    expected[v[flag]] = expected.get(v[flag], 0) + 1
+            assert {k: n for k, n in vs[key].items() if n} == expected, (key, vs[key], expected)
+        return listed, vs
+
+    listed, vs = check_summary()
+
+    # 9a') ?flag= filter returns exactly the flagged readings
+    r = client.get("/vitals", headers=auth_headers(token),
+                   params={"flag": "hypertensive-crisis", "since": since, "limit": 500})
+    must_ok(r)
+    assert len(r.json()) == vs["bp"]["hypertensive-crisis"]
+    assert all(v["bp_flag"] == "hypertensive-crisis" for v in r.json())
+    r = client.get("/vitals", headers=auth_headers(token), params={"flag": "hr:normal", "since": since, "limit": 500})
+    must_ok(r)
+    assert len(r.json()) == vs["hr"]["normal"]
+    r = client.get("/vitals", headers=auth_headers(token), params={"flag": "not-a-flag"})
+    must_ok(r, 400)
+
+    # 9b) Vectorized classification matches the scalar helpers (same random readings)
+    for metric in vital_flags.METRICS:
+        cols = [[rd.get(f) for rd in readings] for f in metric.fields]
+        scalar = [vital_flags.classify(metric, *vals) for vals in zip(*cols, strict=True)]
+        assert vital_flags.labels(metric, vital_flags.codes(metric, *cols)) == scalar, metric.name
+
+    # 9c) Daily rollups stay exact through update/delete and match a full rebuild
+    r = client.put(f"/vitals/{listed[0]['id']}", headers=auth_headers(token),
+                   json={"systolic": 185, "diastolic": 95, "heart_rate": 130})
+    must_ok(r)
+    r = client.delete(f"/vitals/{listed[1]['id']}", headers=auth_headers(token))
+    must_ok(r, 204)
+    _, vs = check_summary()
+    db = SessionLocal()
+    try:
+        vital_rollups.rebuild(db)
+    finally:
+        db.close()
+    assert check_summary()[1] == vs
+
+    # 9d) Chart series: bucket stats agree with the raw readings; LTTB keeps the end points
+    r = client.get("/vitals/series", headers=auth_headers(token),
+                   params={"metric": "heart_rate", "from": since, "bucket": "day"})
+    must_ok(r)
+    series = r.json()
+    hrs = [v["heart_rate"] for v in check_summary()[0] if v["heart_rate"] is not None]
+    assert series["total"] == len(hrs) == sum(b["count"] for b in series["buckets"])
+    assert min(b["min"] for b in series["buckets"]) == min(hrs)
+    assert max(b["max"] for b in series["buckets"]) == max(hrs)
+    for bucket in ("hour", "week"):
+        r = client.get("/vitals/series", headers=auth_headers(token),
+                       params={"metric": "heart_rate", "from": since, "bucket": bucket})
+        must_ok(r)
+        assert sum(b["count"] for b in r.json()["buckets"]) == len(hrs)
+    r = client.get("/vitals/series", headers=auth_headers(token),
+                   params={"metric": "heart_rate", "from": since, "points": 20})
+    must_ok(r)
+    pts = r.json()["points"]
+    assert len(pts) == 20 and r.json()["total"] == len(hrs)
+    assert [p["t"] for p in pts] == sorted(p["t"] for p in pts)
+    r = client.get("/vitals/series", headers=auth_headers(token),
+                   params={"metric": "heart_rate", "bucket": "day", "points": 20})
+    must_ok(r, 400)
+
+    # 9e) Rolling baselines: a steady user's spike is anomalous; replay reproduces the state
+    r = client.post("/auth/register", json={"email": "baseline@example.com", "password": password})
+    must_ok(r, 201)
+    token2 = r.json()["access_token"]
+    for i in range(15):
+        r = client.post("/vitals", headers=auth_headers(token2), json={"heart_rate": 70 + (i % 3) - 1, "systolic": 118})
+        must_ok(r, 201)
+    assert r.json()["anomaly_score"] is not None and r.json()["anomalies"] == []
+    r = client.post("/vitals", headers=auth_headers(token2), json={"heart_rate": 135, "systolic": 119})
+    must_ok(r, 201)
+    assert r.json()["anomalies"] == ["heart_rate"], r.json()
+    user2 = client.get("/auth/me", headers=auth_headers(token2)).json()["id"]
+    db = SessionLocal()
+    try:
+        stored = {b.field: (b.n, b.mean, b.var) for b in db.query(models.VitalBaseline).filter_by(user_id=user2)}
+        vital_baselines.replay(db, [user2], stamp=True)
+        db.expire_all()
+        replayed = {b.field: (b.n, b.mean, b.var) for b in db.query(models.VitalBaseline).filter_by(user_id=user2)}
+    finally:
+        db.close()
+    assert stored.keys() == replayed.keys() == {"heart_rate", "systolic"}
+    for f in stored:
+        assert stored[f][0] == replayed[f][0] and all(abs(a - b) < 1e-9 for a, b in zip(stored[f][1:], replayed[f][1:], strict=True))
+    r = client.get("/vitals", headers=auth_headers(token2), params={"limit": 1})
+    must_ok(r)
+    assert r.json()[0]["anomalies"] == ["heart_rate"]
+    r = client.post("/account/delete", headers=auth_headers(token2), json={"password": password})
+    must_ok(r, 204)
+
+    # 9f) Conditional GET: unchanged collections answer 304, any write changes the ETag
+    for path in ("/vitals", "/symptoms", "/goals", "/reminders", "/profiles/me"):
+        r = client.get(path, headers=auth_headers(token))
+        must_ok(r)
+        etag = r.headers["ETag"]
+        r = client.get(path, headers={**auth_headers(token), "If-None-Match": etag})
+        must_ok(r, 304)
+        assert r.content == b"" and r.headers["ETag"] == etag
+    r = client.get("/vitals", headers=auth_headers(token), params={"limit": 5})
+    assert r.headers["ETag"] != etag
+    etag = r.headers["ETag"]
+    must_ok(client.post("/vitals", headers=auth_headers(token), json={"heart_rate": 72}), 201)
+    r = client.get("/vitals", headers={**auth_headers(token), "If-None-Match": etag}, params={"limit": 5})
+    must_ok(r)
+    assert r.headers["ETag"] != etag and r.json()[0]["heart_rate"] == 72
+    r = client.get("/profiles/me", headers=auth_headers(token))
+    etag = r.headers["ETag"]
+    must_ok(client.put("/profiles/me", headers=auth_headers(token), json={**r.json(), "age": 41}))
+    r = client.get("/profiles/me", headers={**auth_headers(token), "If-None-Match": etag})
+    must_ok(r)
+    assert r.json()["age"] == 41
+
+    # 9g) Fast list serialization emits the same JSON bytes as the Pydantic models
+    r = client.get("/vitals", headers=auth_headers(token), params={"limit": 100})
+    must_ok(r)
+    db = SessionLocal()
+    try:
+        recs = (db.query(models.VitalRecord).filter_by(user_id=r.json()[0]["user_id"])
+                .order_by(models.VitalRecord.created_at.desc(), models.VitalRecord.id.desc()).limit(100).all())
+        expected = TypeAdapter(list[schemas.VitalOut]).dump_json([vitals_router.vital_out(v) for v in recs])
+    finally:
+        db.close()
+    assert r.content == expected
+
+    # 9h) Report summary cache: repeat reads hit, API writes invalidate, and a
+    # write that skips invalidate (another worker) is caught by the versions
+    def summary():
+        r = client.get("/reports/summary?period=week", headers=auth_headers(token))
+        must_ok(r)
+        return r.json()
+
+    first = summary()
+    hits = report_cache.stats()["hits"]
+    assert summary() == first and report_cache.stats()["hits"] == hits + 1
+    r = client.get("/reports/export?period=week", headers=auth_headers(token))
+    must_ok(r)
+    assert r.text == first["markdown"] and report_cache.stats()["hits"] == hits + 2
+    must_ok(client.post("/symptoms", headers=auth_headers(token), json={"description": "cache check", "severity": "mild"}), 201)
+    assert summary()["symptom_summary"]["total"] == first["symptom_summary"]["total"] + 1
+    stale = report_cache.stats()["stale"]
+    db = SessionLocal()
+    try:
+        uid = db.query(models.User.id).filter_by(email=email).scalar()
+        db.add(SymptomRecord(id=new_uuid(), user_id=uid, description="other worker", severity="mild"))
+        data_versions.bump(db, uid, "symptoms")
+        db.commit()
+    finally:
+        db.close()
+    assert summary()["symptom_summary"]["total"] == first["symptom_summary"]["total"] + 2
+    assert report_cache.stats()["stale"] == stale + 1
+
+    # 9i) Range stats: exact count/mean/stddev, percentiles within the sketch's
+    # rank error of the exact ones; sketches of parts merge to the same accuracy
+    r = client.get("/reports/stats", headers=auth_headers(token), params={"from": since})
+    must_ok(r)
+    stats = r.json()
+    listed = check_summary()[0]
+    assert stats["readings"] == len(listed)
+
+    def rank_error(sorted_vals, q, estimate):
+        # Distance from q to the estimate's rank interval (readings repeat values)
+        lo = sum(1 for v in sorted_vals if v < estimate) / len(sorted_vals)
+        hi = sum(1 for v in sorted_vals if v <= estimate) / len(sorted_vals)
+        return max(lo - q, q - hi, 0.0)
+
+    for f, m in stats["metrics"].items():
+        vals = sorted(v[f] for v in listed if v[f] is not None)
+        assert m["count"] == len(vals), f
+        if len(vals) < 2:
+            continue
+        mean = sum(vals) / len(vals)
+        sd = (sum((v - mean) ** 2 for v in vals) / (len(vals) - 1)) ** 0.5
+        assert abs(m["mean"] - mean) < 1e-6 and abs(m["stddev"] - sd) < 1e-6, f
+        assert (m["min"], m["max"]) == (vals[0], vals[-1]), f
+        for q in (0.5, 0.9, 0.99):
+            assert rank_error(vals, q, m[f"p{round(q * 100)}"]) <= 0.02, (f, q)
+    r = client.get("/reports/stats", headers=auth_headers(token),
+                   params={"from": datetime.utcnow().isoformat(), "to": since})
+    must_ok(r, 400)
+
+    rnd = random.Random(5)
+    values = [rnd.lognormvariate(4, 0.5) for _ in range(50000)]
+    exact = sorted(values)
+    whole, parts = KLLSketch(k=200, seed=1), []
+    whole.update_many(values)
+    for day in range(10):
+        part = KLLSketch(k=200, seed=day)
+        part.update_many(values[day::10])
+        parts.append(KLLSketch.from_dict(json.loads(json.dumps(part.to_dict()))))
+    combined = merged(parts, k=200, seed=2)
+    assert whole.n == combined.n == len(values) and len(whole) < 1000
+    for sketch in (whole, combined):
+        for q, est in zip((0.5, 0.9, 0.99), sketch.quantiles((0.5, 0.9, 0.99)), strict=True):
+            assert rank_error(exact, q, est) <= 0.01, (q, est)
+
+    # 9j) Streaming exports: CSV / NDJSON rows match the list endpoint, Parquet
+    # is 501 without pyarrow
+    listed = check_summary()[0]
+    r = client.get("/reports/export/vitals", headers=auth_headers(token), params={"format": "ndjson", "from": since})
+    must_ok(r)
+    assert r.headers["content-type"].startswith("application/x-ndjson")
+    exported = [json.loads(line) for line in r.text.splitlines()]
+    by_id = {v["id"]: v for v in listed}
+    assert len(exported) == len(listed) and all(e["id"] in by_id for e in exported)
+    assert [e["created_at"] for e in exported] == sorted(e["created_at"] for e in exported)
+    for e in exported:
+        v = by_id[e["id"]]
+        assert all(e[k] == v[k] for k in ("systolic", "heart_rate", "bp_flag", "glucose_flag", "anomaly_score"))
+    r = client.get("/reports/export/vitals", headers=auth_headers(token), params={"format": "csv", "from": since})
+    must_ok(r)
+    assert "attachment" in r.headers["content-disposition"]
+    csv_rows = r.text.splitlines()
+    assert csv_rows[0].startswith("id,created_at,systolic") and len(csv_rows) == len(listed) + 1
+    r = client.get("/reports/export/symptoms", headers=auth_headers(token), params={"format": "csv"})
+    must_ok(r)
+    r2 = client.get("/symptoms", headers=auth_headers(token), params={"limit": 500})
+    assert len(r.text.splitlines()) == len(r2.json()) + 1
+    r = client.get("/reports/export/vitals", headers=auth_headers(token), params={"format": "parquet"})
+    assert r.status_code in (200, 501)
+    if r.status_code == 200:
+        assert r.content[:4] == b"PAR1" and r.content[-4:] == b"PAR1"
+
+    # 9k) Report precompute: an interrupted job resumes after its cursor,
+    # snapshots are served while fresh and skipped after a write
+    db = SessionLocal()
+    try:
+        for i in range(4):
+            other = models.User(id=new_uuid(), email=f"precompute{i}-{email}", password_hash="x")
+            db.add(other)
+            db.flush()
+            db.add(SymptomRecord(id=new_uuid(), user_id=other.id, description="precompute", severity="mild"))
+        db.commit()
+        active = len(report_precompute.active_users(db, datetime.utcnow() - timedelta(days=30), None, 1000))
+    finally:
+        db.close()
+    assert active >= 5
+    job = f"smoke-{new_uuid()}"
+    part = report_precompute.run(job, workers=1, chunk=2, max_chunks=1)
+    assert part["users"] == 2 and not part["finished"]
+    rest = report_precompute.run(job, workers=1, chunk=2)
+    assert part["resumed_from"] is None and rest["resumed_from"] is not None
+    assert rest["finished"] and part["users"] + rest["users"] == active
+    assert rest["snapshots"] == 2 * rest["users"]
+    assert report_precompute.run(job, workers=1)["skipped"]
+    pooled = report_precompute.run(job, workers=2, chunk=2, restart=True)
+    assert pooled["finished"] and pooled["users"] == active
+    report_cache.clear()
+    fresh = snapshot_lookups.value("fresh")
+    before = summary()
+    assert snapshot_lookups.value("fresh") == fresh + 1
+    report_cache.clear()
+    assert before == summary()
+    must_ok(client.post("/symptoms", headers=auth_headers(token), json={"description": "after precompute", "severity": "mild"}), 201)
+    stale = snapshot_lookups.value("stale")
+    assert summary()["symptom_summary"]["total"] == before["symptom_summary"]["total"] + 1
+    assert snapshot_lookups.value("stale") == stale + 1
+
+    # 9l) Cohort analytics: admin only (listed in ADMIN_EMAILS and verified);
+    # rollups and raw readings agree with a per-row count by profile; a repeat
+    # query is served from the cache
+    r = client.post("/auth/register", json={"email": "admin@example.com", "password": password})
+    if r.status_code != 201:
+        r = client.post("/auth/login", json={"email": "admin@example.com", "password": password})
+        must_ok(r)
+    admin_token = r.json()["access_token"]
+    if r.status_code == 201:
+        # Registering a listed address is not enough until it is verified
+        must_ok(client.get("/admin/cohorts", headers=auth_headers(admin_token)), 403)
+        must_ok(client.delete("/admin/llm-cache", headers=auth_headers(admin_token)), 403)
+        must_ok(client.post("/auth/email/verify/request", json={"email": "admin@example.com"}), 204)
+        db = SessionLocal()
+        try:
+            admin_id = db.query(models.User.id).filter(models.User.email == "admin@example.com").scalar()
+            verify_token = (db.query(EmailVerification.token).filter(EmailVerification.user_id == admin_id)
+                            .order_by(EmailVerification.expires_at.desc()).first()[0])
+        finally:
+            db.close()
+        must_ok(client.post("/auth/email/verify/confirm", json={"token": verify_token}), 204)
+    must_ok(client.put("/profiles/me", headers=auth_headers(admin_token),
+                       json={"age": 52, "sex": "Female", "activity_level": "moderate"}))
+    for sys_, dia in ((118, 76), (135, 85), (150, 95), (185, 100)):
+        must_ok(client.post("/vitals", headers=auth_headers(admin_token),
+                            json={"systolic": sys_, "diastolic": dia}), 201)
+    params = {"by": "sex,age_band", "from": "2000-01-01", "to": (datetime.utcnow() + timedelta(days=1)).date().isoformat()}
+    must_ok(client.get("/admin/cohorts", headers=auth_headers(token), params=params), 403)
+    must_ok(client.get("/admin/cohorts", headers=auth_headers(admin_token), params={"by": "zodiac"}), 400)
+    db = SessionLocal()
+    try:
+        expected: Dict[tuple, Dict[str, int]] = {}
+        for rec, prof in (db.query(models.VitalRecord, models.HealthProfile)
+                          .outerjoin(models.HealthProfile, models.HealthProfile.user_id == models.VitalRecord.user_id)):
+            age = prof.age if prof else None
+            band = next((label for label, lo in reversed(cohorts.AGE_BANDS) if age is not None and age >= lo), "unknown")
+            sex = (prof.sex or "unknown").lower() if prof else "unknown"
+            counts = expected.setdefault((band, sex), {})
+            if rec.bp_flag:
+                counts[rec.bp_flag] = counts.get(rec.bp_flag, 0) + 1
+    finally:
+        db.close()
+    def same_cohorts(a, b):
+        # Counts exact; means/stddevs up to float summation order
+        def close(x, y):
+            return x == y or (x is not None and y is not None and abs(x - y) <= 1e-9 * max(1.0, abs(x)))
+        return len(a) == len(b) and all(
+            {k: v for k, v in ca.items() if k != "fields"} == {k: v for k, v in cb.items() if k != "fields"}
+            and all(close(ca["fields"][f][s], cb["fields"][f][s]) for f in ca["fields"] for s in ("n", "mean", "stddev"))
+            for ca, cb in zip(a, b, strict=True)
+        )
+
+    by_source = {}
+    for source in ("rollups", "readings"):
+        r = client.get("/admin/cohorts", headers=auth_headers(admin_token), params={**params, "source": source})
+        must_ok(r)
+        body = r.json()
+        assert body["by"] == ["age_band", "sex"] and not body["cached"]
+        by_source[source] = body["cohorts"]
+        got = {(c["age_band"], c["sex"]): {k: v for k, v in c["flags"].items() if v} for c in body["cohorts"]}
+        assert got == expected, (source, got, expected)
+    assert same_cohorts(by_source["rollups"], by_source["readings"])
+    female = next(c for c in by_source["rollups"] if (c["age_band"], c["sex"]) == ("45-59", "female"))
+    assert female["users"] == 1 and female["readings"] == 4 and female["fields"]["systolic"]["mean"] == 147.0
+    r = client.get("/admin/cohorts", headers=auth_headers(admin_token), params={**params, "by": "age_band,sex"})
+    must_ok(r)
+    assert r.json()["cached"] and r.json()["cohorts"] == by_source["rollups"]
+    partial = cohorts.CohortAggregate(cohorts.metric_by_name("bp"))
+    q = cohorts.make_query("bp", ["age_band", "sex"], datetime(2000, 1, 1).date(), datetime.utcnow().date(), "readings")
+    db = SessionLocal()
+    try:
+        ranges = list(cohorts.user_ranges(db, 1))
+    finally:
+        db.close()
+    assert len(ranges) > 2
+    for lo, hi in ranges:
+        partial.merge(cohorts.aggregate_range(q, lo, hi))
+    assert same_cohorts(partial.cohorts(q.by), cohorts.cohort_engine.compute(q, workers=3, chunk=2)["cohorts"])
+
+    # 9m) LLM response cache: normalized repeats are served without a model
+    # call (in-process tier, then the persistent tier), med decodes are shared
+    # across users unless they carry a context, and an admin purge empties it
+    class FakeModel:
+        calls = 0
+        fail = False
+
+        @classmethod
+        def handle(cls, request):
+            if cls.fail:
+                return httpx.Response(503, json={"error": "down"})
+            cls.calls += 1
+            user_msg = json.loads(request.content)["messages"][-1]["content"]
+            body = ({"purpose": f"answer {cls.calls}", "common_side_effects": [], "interactions": [],
+                     "usage": "label", "disclaimer": "d"} if user_msg.startswith("Medication")
+                    else {"advice": [f"answer {cls.calls}"], "risk_flags": []})
+            return httpx.Response(200, json={"choices": [{"message": {"content": json.dumps(body)}}]})
+
+    saved_key, saved_transport, saved_breaker = llm_client.api_key, llm_client.transport, llm_client.breaker
+    llm_client.api_key, llm_client.transport, llm_client._upstream = "test", httpx.MockTransport(FakeModel.handle), None
+    try:
+        must_ok(client.delete("/admin/llm-cache", headers=auth_headers(admin_token)))
+        first = client.post("/meds/decoder", headers=auth_headers(token), json={"name": "Ibuprofen"})
+        must_ok(first, 201)
+        again = client.post("/meds/decoder", headers=auth_headers(admin_token), json={"name": "  ibuprofen. "})
+        assert again.json() == first.json() and FakeModel.calls == 1
+        with_context = client.post("/meds/decoder", headers=auth_headers(token),
+                                   json={"name": "ibuprofen", "user_context": {"age": 30}})
+        assert with_context.json()["purpose"] == "answer 2"
+        before = llm_cache.stats()
+        llm_cache._memory.clear()
+        r = client.post("/symptoms/analyze", headers=auth_headers(token), json={"description": "Headache", "severity": "mild"})
+        must_ok(r)
+        r2 = client.post("/symptoms/analyze", headers=auth_headers(token), json={"description": "headache ", "severity": "Mild"})
+        assert r2.json() == r.json() and FakeModel.calls == 3
+        llm_cache._memory.clear()
+        again = client.post("/meds/decoder", headers=auth_headers(token), json={"name": "ibuprofen"})
+        assert again.json() == first.json() and FakeModel.calls == 3
+        stats = llm_cache.stats()
+        assert stats["store_hits"] == before["store_hits"] + 1 and stats["memory_hits"] >= before["memory_hits"] + 1
+        assert stats["backend"] == "db" and stats["rows"] == 3
+        must_ok(client.delete("/admin/llm-cache", headers=auth_headers(token)), 403)
+        r = client.delete("/admin/llm-cache", headers=auth_headers(admin_token), params={"kind": "meds"})
+        must_ok(r)
+        assert r.json()["store"] == 2 and llm_cache.stats()["rows"] == 1
+        client.post("/meds/decoder", headers=auth_headers(token), json={"name": "ibuprofen"})
+        assert FakeModel.calls == 4
+
+        # 9n) Single flight: concurrent identical misses share one upstream call,
+        # and each caller gets its own copy of the answer
+        async def slow_model(request):
+            await asyncio.sleep(0.05)
+            return FakeModel.handle(request)
+
+        async def burst():
+            llm_client.transport = httpx.MockTransport(slow_model)
+            try:
+                return await asyncio.gather(*(llm_client.analyzeSymptoms(v, "moderate")
+                                              for v in ("Flu aches", "flu aches ", "FLU ACHES.", "flu  aches")))
+            finally:
+                await llm_client.aclose()
+                llm_client.transport = httpx.MockTransport(FakeModel.handle)
+
+        calls, flights = FakeModel.calls, llm_client.stats()
+        answers = asyncio.run(burst())
+        assert FakeModel.calls == calls + 1 and all(a == answers[0] for a in answers)
+        answers[0]["advice"].append("edited")
+        assert answers[1]["advice"] == [f"answer {FakeModel.calls}"]
+        stats = llm_client.stats()
+        assert stats["issued"] == flights["issued"] + 1 and stats["coalesced"] == flights["coalesced"] + 3
+
+        # 9o) Upstream outage: LLM_BREAKER_FAILURES errors in a row open the
+        # breaker, after which calls fail fast to the heuristic answer
+        llm_client.breaker = CircuitBreaker(2, 60.0)
+        FakeModel.fail = True
+        for i in range(3):
+            r = client.post("/symptoms/analyze", headers=auth_headers(token),
+                            json={"description": f"fever day {i}", "severity": "mild"})
+            must_ok(r)
+            assert "Hydrate and rest; monitor temperature." in r.json()["advice"]
+        assert llm_client.breaker.stats()["state"] == "open" and llm_client.breaker.rejected == 1
+        stats = client.get("/healthz/stats").json()["llm_client"]
+        assert stats["breaker_open"] and stats["breaker_opened"] == 1
+        assert 'alpha_llm_calls_total{kind="symptoms",result="circuit_open"}' in client.get("/metrics").text
+
+        # 9p) A half-open trial call that is cancelled gives its slot back, so
+        # the next call can close the breaker once the upstream recovers
+        now = [0.0]
+        llm_client.breaker = CircuitBreaker(1, 30.0, clock=lambda: now[0])
+        llm_client.breaker.record_failure()
+        now[0] = 31.0
+        FakeModel.fail = False
+
+        async def hung_model(request):
+            await asyncio.sleep(30)
+
+        async def cancelled_trial():
+            llm_client.transport = httpx.MockTransport(hung_model)
+            try:
+                call = asyncio.ensure_future(llm_client._complete("symptoms", "system", "Description: trial"))
+                await asyncio.sleep(0.05)
+                call.cancel()
+                await asyncio.gather(call, return_exceptions=True)
+            finally:
+                await llm_client.aclose()
+                llm_client.transport = httpx.MockTransport(FakeModel.handle)
+
+        asyncio.run(cancelled_trial())
+        assert llm_client.breaker.state == "half_open"
+        r = client.post("/symptoms/analyze", headers=auth_headers(token), json={"description": "trial", "severity": "mild"})
+        must_ok(r)
+        assert r.json()["advice"] == [f"answer {FakeModel.calls}"] and llm_client.breaker.state == "closed"
+    finally:
+        llm_client.api_key, llm_client.transport, llm_client.breaker = saved_key, saved_transport, saved_breaker
+        llm_client._upstream = None
+
     # 10) Meds decoder (expect 501 if no OPENAI_API_KEY)
     r = client.post(
         "/meds/decoder",
@@ -129,6 +691,29 @@ def run():
     r = client.get("/reminders/preview", headers=auth_headers(token))
     must_ok(r)
 
+    # 11a) Metrics exposition
+    r = client.get("/metrics")
+    must_ok(r)
+    assert "alpha_http_request_duration_seconds_bucket" in r.text
+
+    # 11b) SQL stats: DEBUG adds the per-request headers, a route over the
+    # statement budget is counted
+    debug, budget = settings.DEBUG, settings.SQL_QUERY_BUDGET
+    try:
+        settings.DEBUG = True
+        r = client.get("/vitals", headers=auth_headers(token))
+        must_ok(r)
+        assert int(r.headers["X-DB-Query-Count"]) >= 1
+        assert float(r.headers["X-DB-Time-Ms"]) >= 0
+        exceeded = query_stats.db_budget_exceeded.value("/vitals")
+        settings.SQL_QUERY_BUDGET = 0
+        must_ok(client.get("/vitals", headers=auth_headers(token)))
+        assert query_stats.db_budget_exceeded.value("/vitals") == exceeded + 1
+    finally:
+        settings.DEBUG, settings.SQL_QUERY_BUDGET = debug, budget
+    r = client.get("/vitals", headers=auth_headers(token))
+    assert "X-DB-Query-Count" not in r.headers
+
     # 12) Account export/delete
     r = client.get("/account/export", headers=auth_headers(token))
     must_ok(r)